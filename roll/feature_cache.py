@@ -0,0 +1,132 @@
+import copy
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+DEFAULT_CACHE_DIR = "~/.qlibAssistant/feature_cache/"
+CACHE_SUFFIX = ".pkl"
+
+# 默认处理器与 fit 区间无关的 handler:
+# Alpha158 默认 infer_processors=[]，learn_processors 为 DropnaLabel + CSZScoreNorm(截面标准化)，
+# 因此不同训练窗口只要 instruments/start/end 相同，特征面板就完全一致，可以共用一份缓存。
+FIT_FREE_HANDLERS = {"Alpha158"}
+
+
+def is_fit_free(handler_config: dict) -> bool:
+    """handler 的处理器是否与 fit 区间无关（默认处理器的 Alpha158）"""
+    h_kwargs = handler_config.get("kwargs", {})
+    explicit_procs = "infer_processors" in h_kwargs or "learn_processors" in h_kwargs
+    return handler_config.get("class") in FIT_FREE_HANDLERS and not explicit_procs
+
+
+def _canonical_handler_kwargs(handler_config: dict) -> dict:
+    h_kwargs = dict(handler_config.get("kwargs", {}))
+    if is_fit_free(handler_config):
+        h_kwargs.pop("fit_start_time", None)
+        h_kwargs.pop("fit_end_time", None)
+    return h_kwargs
+
+
+def handler_key(handler_config: dict) -> str:
+    """由 (handler 类, instruments, start/end, processors[, fit 区间]) 计算缓存键"""
+    payload = {
+        "class": handler_config.get("class"),
+        "module_path": handler_config.get("module_path"),
+        "kwargs": _canonical_handler_kwargs(handler_config),
+    }
+    text = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class FeatureCache:
+    """
+    磁盘特征缓存：把 DataHandler（含已处理好的数据）整体 pickle 下来，
+    同一批训练里 handler 配置相同的任务直接加载，不再从原始 bin 重新计算 Alpha158。
+
+    data_version 取本地数据指纹 utils.data_fingerprint (与预测缓存相同)，数据更新或历史修正后旧缓存自动失效并被清理。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, data_version: str = ""):
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR).expanduser()
+        self.data_version = str(data_version).strip()
+
+    def path_for(self, handler_config: dict) -> Path:
+        h_class = handler_config.get("class")
+        instruments = handler_config.get("kwargs", {}).get("instruments")
+        name = f"{self.data_version}_{h_class}_{instruments}_{handler_key(handler_config)}{CACHE_SUFFIX}"
+        return self.cache_dir / name
+
+    def exists(self, handler_config: dict) -> bool:
+        return self.path_for(handler_config).exists()
+
+    def build(self, handler_config: dict) -> Path:
+        """计算 handler 并原子地写入缓存（先写临时文件再 rename，避免并发读到半截文件）"""
+        from qlib.utils import init_instance_by_config
+
+        path = self.path_for(handler_config)
+        if path.exists():
+            return path
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.clean_stale()
+        logger.info(f"构建特征缓存: {path.name}")
+        handler = init_instance_by_config(handler_config)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        handler.to_pickle(tmp_path, dump_all=True)
+        os.replace(tmp_path, path)
+        return path
+
+    def clean_stale(self):
+        """删除其它数据版本的缓存文件"""
+        if not self.cache_dir.exists():
+            return
+        for file in self.cache_dir.glob(f"*{CACHE_SUFFIX}"):
+            if not file.name.startswith(f"{self.data_version}_"):
+                logger.info(f"删除过期特征缓存: {file.name}")
+                file.unlink(missing_ok=True)
+
+    def cached_task(self, task: dict, panel: Optional[tuple] = None) -> dict:
+        """
+        返回 handler 指向缓存文件的 task 副本（qlib 支持 "file://xxx.pkl" 形式的 handler）。
+        给定共享面板 panel 时查找 panel_handler 对应的缓存；缓存不存在时原样返回 task。
+        """
+        handler_config = task["dataset"]["kwargs"]["handler"]
+        if not isinstance(handler_config, dict):
+            return task
+        path = self.path_for(panel_handler(handler_config, panel))
+        if not path.exists():
+            return task
+
+        exec_task = copy.deepcopy(task)
+        exec_task["dataset"]["kwargs"]["handler"] = f"file://{path}"
+        return exec_task
+
+
+def widest_panel(tasks: list) -> Optional[tuple]:
+    """
+    start_custom 的各窗口是同一终点、不同长度的嵌套区间，返回最宽窗口的 (train 起点, test 终点)。
+    训练时各窗口的 handler 区间统一为它，特征面板只在最宽窗口上计算一次（落到同一份特征缓存），
+    各窗口的 train/valid/test 由 DatasetH 按 segments 从这份面板上切片得到。
+    """
+    if not tasks:
+        return None
+    segments_list = [task["dataset"]["kwargs"]["segments"] for task in tasks]
+    start_time = min(str(seg["train"][0]) for seg in segments_list)
+    end_time = max(str(seg["test"][1]) for seg in segments_list)
+    return start_time, end_time
+
+
+def panel_handler(handler_config: dict, panel: Optional[tuple] = None) -> dict:
+    """
+    训练实际使用的 handler 配置：给定共享面板且 handler 与 fit 区间无关时，返回区间改为 panel 的副本；
+    其余 handler 加宽区间只会多算数据，原样返回。recorder 中保存的 task 始终是原始配置。
+    """
+    if not panel or not isinstance(handler_config, dict) or not is_fit_free(handler_config):
+        return handler_config
+    new_config = copy.deepcopy(handler_config)
+    new_config["kwargs"]["start_time"], new_config["kwargs"]["end_time"] = panel
+    return new_config
@@ -0,0 +1,258 @@
+import copy
+import functools
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from qlib.utils import init_instance_by_config
+
+from feature_cache import handler_key, is_fit_free
+
+PARAMS_FILE = "params.pkl"
+
+
+@dataclass
+class InferJob:
+    """一个 recorder 的推理任务"""
+    exp_name: str
+    rid: str
+    rec: Any
+    dataset_config: dict = field(default_factory=dict)
+
+
+def inference_dataset_config(task: dict, predict_start, predict_end) -> dict:
+    """
+    把训练 task 的 dataset 改写为推理用配置：test 段为预测区间，handler 截止到预测结束日。
+    处理器与 fit 区间无关的 handler (默认 Alpha158) 只需从预测开始日算起，
+    qlib 计算表达式时会自动向前多取滚动窗口所需的历史数据，特征值不变。
+    """
+    predict_start, predict_end = pd.Timestamp(predict_start), pd.Timestamp(predict_end)
+    dataset_config = copy.deepcopy(task["dataset"])
+    dataset_config["kwargs"]["segments"]["test"] = (predict_start, predict_end)
+    handler_config = dataset_config["kwargs"]["handler"]
+    handler_config["kwargs"]["end_time"] = predict_end
+    if is_fit_free(handler_config):
+        handler_config["kwargs"]["start_time"] = predict_start
+    return dataset_config
+
+
+def predict_chunks(ranges, calendar, chunk_days: int) -> List[tuple]:
+    """
+    把若干 (start, end) 预测区间合并为交易日并集，再切成最多 chunk_days 个连续交易日的 (start, end) 块。
+    重叠的区间只预测一次；互不相邻的区间各自成块，不计算中间的空档。
+    """
+    calendar = pd.DatetimeIndex(calendar)
+    mask = np.zeros(len(calendar), dtype=bool)
+    for start, end in ranges:
+        mask |= (calendar >= pd.Timestamp(start)) & (calendar <= pd.Timestamp(end))
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return []
+
+    chunks = []
+    for run in np.split(idx, np.flatnonzero(np.diff(idx) > 1) + 1):
+        for i in range(0, len(run), max(int(chunk_days), 1)):
+            part = run[i:i + max(int(chunk_days), 1)]
+            chunks.append((calendar[part[0]], calendar[part[-1]]))
+    return chunks
+
+
+def dataset_group_key(dataset_config: dict) -> str:
+    """有效 handler 配置 + 预测区间相同的推理任务共用一份 dataset"""
+    test_seg = [str(t) for t in dataset_config["kwargs"]["segments"]["test"]]
+    handler = dataset_config["kwargs"]["handler"]
+    # 已落盘共享的 handler 以文件路径为键
+    h_key = handler if isinstance(handler, str) else handler_key(handler)
+    return f"{h_key}_{json.dumps(test_seg)}"
+
+
+def group_jobs(jobs: List[InferJob]) -> Dict[str, List[InferJob]]:
+    groups: Dict[str, List[InferJob]] = {}
+    for job in jobs:
+        groups.setdefault(dataset_group_key(job.dataset_config), []).append(job)
+    return groups
+
+
+def run_grouped_inference(jobs: List[InferJob], on_dataset: Optional[Callable] = None) -> list:
+    """
+    按 dataset 分组推理：每组只计算一次特征，组内所有模型在同一份 dataset 上 predict。
+    返回与 jobs 顺序一致的 [exp_name, rid, pred_score] 列表。
+    on_dataset(dataset_config, dataset): 每组 dataset 构建后回调，调用方可借此复用已算好的特征
+    """
+    groups = group_jobs(jobs)
+    logger.info(f"推理: {len(jobs)} 个模型, {len(groups)} 份 dataset")
+
+    preds = {}
+    for group in groups.values():
+        dataset = init_instance_by_config(group[0].dataset_config)
+        if on_dataset is not None:
+            on_dataset(group[0].dataset_config, dataset)
+        for job in group:
+            model = job.rec.load_object(PARAMS_FILE)
+            preds[(job.exp_name, job.rid)] = model.predict(dataset, segment="test")
+    return [[job.exp_name, job.rid, preds[(job.exp_name, job.rid)]] for job in jobs]
+
+
+def _group_sums(values: np.ndarray, starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """
+    按组求和 (values 已按组连续排列)。同样大小的组拼成 (组数, 组大小) 矩阵后按行求和，
+    与逐组 Series.sum() 的 numpy pairwise 求和顺序一致，结果逐位相同。
+    """
+    sums = np.empty(len(sizes), dtype=np.float64)
+    for size in np.unique(sizes):
+        groups = np.flatnonzero(sizes == size)
+        rows = starts[groups][:, None] + np.arange(size)
+        sums[groups] = values[rows].sum(axis=1)
+    return sums
+
+
+def aggregate_scores(df: pd.DataFrame, keys=("datetime", "instrument")) -> pd.DataFrame:
+    """
+    多模型集成打分: 按 keys 分组计算权重加权平均分 avg_score (权重和为 0 时取简单平均) 与正分占比 pos_ratio。
+    df 为长表，至少包含 score / weight 列；一次向量化完成所有分组，不逐组调用 Python 函数。
+    """
+    keys = list(keys)
+    grouper = df.groupby(keys, sort=True)
+    codes = grouper.ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")  # 组内保持原始行序
+    sizes = np.bincount(codes)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    score = df["score"].to_numpy(dtype=np.float64)[order]
+    weight = df["weight"].to_numpy(dtype=np.float64)[order]
+    # 与 pandas 的 skipna 求和一致：NaN 视为 0
+    weighted = _group_sums(np.nan_to_num(score * weight, nan=0.0), starts, sizes)
+    weight_sum = _group_sums(np.nan_to_num(weight, nan=0.0), starts, sizes)
+    score_sum = _group_sums(np.nan_to_num(score, nan=0.0), starts, sizes)
+    score_count = _group_sums((~np.isnan(score)).astype(np.float64), starts, sizes)
+    positive = _group_sums((score > 0).astype(np.float64), starts, sizes)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_score = np.where(score_count > 0, score_sum / score_count, np.nan)
+        avg_score = np.where(weight_sum != 0, weighted / weight_sum, mean_score)
+    ret = grouper.size().index.to_frame(index=False)
+    ret["avg_score"] = avg_score
+    ret["pos_ratio"] = positive / sizes
+    return ret
+
+
+def limit_model_threads(model, threads: int):
+    """限制 qlib 模型内部 booster 预测时的线程数（训练时保存的线程参数往往是整机核数）"""
+    inner = getattr(model, "model", None)
+    module = type(inner).__module__
+    if module.startswith("lightgbm"):
+        inner.predict = functools.partial(inner.predict, num_threads=threads)
+    elif module.startswith("xgboost"):
+        inner.set_param({"nthread": threads})
+    elif module.startswith("catboost"):
+        inner.predict = functools.partial(inner.predict, thread_count=threads)
+    return model
+
+
+# --- 推理子进程 ---
+_WORKER_THREADS = 1
+_WORKER_DATASETS: Dict[str, Any] = {}
+
+
+def _infer_worker_init(region, provider_uri, uri_folder, threads):
+    """推理子进程初始化：记录线程数 (加载模型时由 limit_model_threads 生效) 并重新初始化 qlib"""
+    global _WORKER_THREADS
+    _WORKER_THREADS = threads
+
+    import qlib
+    from qlib.config import C
+
+    exp_manager = C["exp_manager"]
+    exp_manager["kwargs"]["uri"] = "file:" + str(Path(uri_folder).expanduser())
+    qlib.init(provider_uri=provider_uri, region=region, exp_manager=exp_manager)
+
+
+def _infer_worker_predict(exp_name, rid, dataset_config):
+    """子进程中加载一个 recorder 的模型并在 (按组缓存的) dataset 上预测"""
+    from qlib.workflow import R
+
+    key = dataset_group_key(dataset_config)
+    if key not in _WORKER_DATASETS:
+        _WORKER_DATASETS.clear()  # 各组依次调度，只保留当前组的数据
+        _WORKER_DATASETS[key] = init_instance_by_config(dataset_config)
+    rec = R.get_exp(experiment_name=exp_name).get_recorder(recorder_id=rid)
+    model = limit_model_threads(rec.load_object(PARAMS_FILE), _WORKER_THREADS)
+    return model.predict(_WORKER_DATASETS[key], segment="test")
+
+
+def _share_group_dataset(group: List[InferJob], tmp_dir: str, idx: int, on_dataset: Optional[Callable] = None) -> dict:
+    """主进程为一组计算一次特征并写入临时 pickle，子进程通过 file:// handler 直接加载"""
+    dataset = init_instance_by_config(group[0].dataset_config)
+    if on_dataset is not None:
+        on_dataset(group[0].dataset_config, dataset)
+    path = os.path.join(tmp_dir, f"group_{idx}.pkl")
+    dataset.handler.to_pickle(path, dump_all=True)
+    shared_config = copy.deepcopy(group[0].dataset_config)
+    shared_config["kwargs"]["handler"] = f"file://{path}"
+    return shared_config
+
+
+def run_parallel_inference(jobs: List[InferJob], workers: int, threads: int, mp_context=None, on_dataset=None, **qlib_kwargs):
+    """
+    多进程推理：每组特征在主进程计算一次后共享给子进程，各 recorder 分发到 workers 个子进程预测。
+    以 jobs 的顺序流式产出 [exp_name, rid, pred_score]；单个 recorder 失败只记录并跳过，不中断整体。
+    on_dataset: 同 run_grouped_inference，在主进程中回调
+    qlib_kwargs: region / provider_uri / uri_folder，用于子进程初始化 qlib
+    """
+    groups = group_jobs(jobs)
+    logger.info(f"并行推理: {len(jobs)} 个模型, {len(groups)} 份 dataset, {workers} 个进程 x {threads} 线程")
+    job_index = {id(job): idx for idx, job in enumerate(jobs)}
+    tmp_dir = tempfile.mkdtemp(prefix="qlib_infer_")
+    failed = []
+    try:
+        initargs = (qlib_kwargs.get("region"), qlib_kwargs["provider_uri"], qlib_kwargs["uri_folder"], threads)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context or multiprocessing.get_context("spawn"),
+            initializer=_infer_worker_init,
+            initargs=initargs,
+        ) as pool:
+            # 按组提交，同一进程连续处理同一组的模型，组内特征只加载一次
+            futures = {}
+            for group_idx, group in enumerate(groups.values()):
+                try:
+                    shared_config = _share_group_dataset(group, tmp_dir, group_idx, on_dataset)
+                except Exception as e:
+                    logger.error(f"推理特征计算失败，跳过该组 {len(group)} 个 recorder: {e}")
+                    failed.extend((job.exp_name, job.rid, str(e)) for job in group)
+                    continue
+                for job in group:
+                    future = pool.submit(_infer_worker_predict, job.exp_name, job.rid, shared_config)
+                    futures[future] = job_index[id(job)]
+
+            # 按 jobs 顺序产出：先完成的结果暂存，等前面的都到齐再依次交出
+            submitted = set(futures.values())
+            done = {idx: None for idx in range(len(jobs)) if idx not in submitted}
+            next_idx = 0
+            for future in as_completed(futures):
+                idx = futures[future]
+                job = jobs[idx]
+                try:
+                    done[idx] = [job.exp_name, job.rid, future.result()]
+                except Exception as e:
+                    logger.error(f"推理失败 {job.exp_name} {job.rid}: {e}")
+                    failed.append((job.exp_name, job.rid, str(e)))
+                    done[idx] = None
+                while next_idx in done:
+                    result = done.pop(next_idx)
+                    next_idx += 1
+                    if result is not None:
+                        yield result
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if failed:
+            logger.warning(f"推理完成，{len(failed)}/{len(jobs)} 个 recorder 失败: {[rid for _, rid, _ in failed]}")
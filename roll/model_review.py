@@ -1,13 +1,168 @@
+import multiprocessing
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 from pprint import pprint
-from utils import append_to_file, TradeDate
+from utils import append_to_file, calculate_file_sha256, TradeDate
+from score_store import partition_columns, partition_path, read_partition
+from review_cache import REVIEW_CACHE_VERSION, ReviewCache
 
 top_num_list = [10, 20, 30, 50, 80, 100]
+profit_num_list = [0.01 * i for i in range(1, 11)]  # 止盈线 1% ~ 10%
+
+
+def topk_review_metrics(df, top_nums=top_num_list, profit_nums=profit_num_list) -> pd.DataFrame:
+    """
+    按 avg_score 排序后各 TopK 的复盘指标：各止盈线胜率 (n2high > n1close * (1 + p) 的占比)、
+    持有一天平均收益、一天正收益占比。只排序一次，所有 (K, 止盈线) 组合由前缀累计计数一次得到，
+    K 列表与止盈线网格加密时耗时基本不变。
+    """
+    ordered = df.sort_values(by="avg_score", ascending=False)
+    n = len(ordered)
+    sizes = np.minimum(np.asarray(top_nums), n)
+    ends = np.maximum(sizes - 1, 0)
+
+    # 只有排名在最大 K 以内的股票参与统计
+    top = ordered.iloc[:sizes.max()] if n else ordered
+    # 保持价格列原有类型 (D.features 为 float32)，止盈倍数转为同一类型，与逐列 n1close * (1 + p) 的比较结果一致
+    n1close = top["n1close"].to_numpy()
+    n2high = top["n2high"].to_numpy()
+    multipliers = (1 + np.asarray(profit_nums, dtype=np.float64)).astype(n1close.dtype)
+    # (股票, 止盈线) 是否触及止盈，按排名累计后取各 K 的前缀计数
+    hit = n2high[:, None] > n1close[:, None] * multipliers[None, :]
+    hit_counts = np.cumsum(hit, axis=0)
+    positive = (top["real_label"] * top["avg_score"]).to_numpy() > 0
+    positive_counts = np.cumsum(positive)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        win_rates = hit_counts[ends].T / sizes if n else np.full((len(profit_nums), len(sizes)), np.nan)
+        radios = positive_counts[ends] / sizes if n else np.full(len(sizes), np.nan)
+    avg_profits = [ordered["real_label"].iloc[:size].mean() for size in sizes]
+
+    index = [f"止盈{p * 100:g}%胜率" for p in profit_nums] + ["持有一天平均收益", "一天正收益占比"]
+    values = np.vstack([win_rates, avg_profits, radios])
+    return pd.DataFrame(values, index=index, columns=[f"Top{k}" for k in top_nums])
+
+def _prefix_means(values: np.ndarray, lengths: np.ndarray, k: int) -> np.ndarray:
+    """
+    每行前 min(k, lengths) 个值的均值 (忽略 NaN，全为 NaN 时为 NaN)。长度相同的行一起按行求和，
+    与对每行切片调用 Series.mean() 的 pairwise 求和顺序一致，结果逐位相同。
+    """
+    sizes = np.minimum(lengths, k)
+    filled = np.where(np.isnan(values), 0.0, values)
+    counts = np.empty(len(values))
+    sums = np.empty(len(values))
+    for size in np.unique(sizes):
+        rows = sizes == size
+        sums[rows] = filled[rows, :size].sum(axis=1)
+        counts[rows] = (~np.isnan(values[rows, :size])).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def _skipna_accumulate(values: np.ndarray, valid: np.ndarray, func, fill) -> np.ndarray:
+    """按列累计 (与 pandas cumprod / cummax 的 skipna 语义相同: 无效位置不参与累计，结果为 NaN)"""
+    ok = valid & ~np.isnan(values)
+    result = func.accumulate(np.where(ok, values, fill), axis=0)
+    result[~ok] = np.nan
+    return result
+
+
+def topk_backtest(df_ret: Dict[str, pd.DataFrame], csi300_df, date_range_list, top_nums=top_num_list,
+                  initial_cash=1.0, fee_rate=0.002) -> Dict[int, pd.DataFrame]:
+    """
+    每日按打分顺序持有前 K 只股票的组合回测，所有 K 一起计算，返回 {K: 每日明细与净值}。
+    df_ret: {日期: 当日打分结果 (按 avg_score 降序, 含 instrument / real_label)}
+    股票先编码为 (日期 x 排名) 的整数矩阵，换手率 (当日持仓中次日不再持有的比例) 由相邻两日的编码一次比对得到；
+    净值、回撤在 (日期 x K) 矩阵上一次累乘 / 累计最大。fee_rate: 双边交易成本 (佣金+印花税+滑点预估)
+    """
+    max_k = max(top_nums)
+    n_days = len(date_range_list)
+    instruments = np.full((n_days, max_k), None, dtype=object)
+    labels = np.full((n_days, max_k), np.nan)
+    lengths = np.zeros(n_days, dtype=np.int64)
+    for d, date in enumerate(date_range_list):
+        head = df_ret[date].head(max_k)
+        lengths[d] = len(head)
+        instruments[d, :len(head)] = head["instrument"].to_numpy(dtype=object)
+        labels[d, :len(head)] = head["real_label"].to_numpy(dtype=np.float64)
+    codes, uniques = pd.factorize(instruments.ravel())  # 缺失为 -1
+    codes = codes.reshape(n_days, max_k)
+
+    # 基准 (CSI300 通常不计手续费，作为理想参考)，同一日期取第一行。
+    # 缺失日期为 None，列类型由 pandas 推断 (均有数据时保持 D.features 的 float32，有缺失时为 float64)
+    first_rows = csi300_df.drop_duplicates("datetime").set_index("datetime")["csi300_real_label"]
+    csi300_column = pd.DataFrame({"csi300_real_label": [first_rows.get(pd.Timestamp(date)) for date in date_range_list]})
+    csi300_labels = csi300_column["csi300_real_label"].to_numpy()
+    if csi300_labels.dtype == object:
+        csi300_labels = csi300_labels.astype(np.float64)
+
+    # 以 (日期序号, 股票编码) 为键：当日持仓是否仍在次日持仓中
+    n_codes = len(uniques) + 1
+    day_index = np.arange(n_days)[:, None]
+    avg_real_label = np.empty((n_days, len(top_nums)))
+    turnover_rate = np.full((n_days, len(top_nums)), np.nan)
+    for i, k in enumerate(top_nums):
+        held = codes[:, :k] >= 0
+        keys = day_index * n_codes + codes[:, :k]
+        kept = np.isin(keys + n_codes, keys[held]) & held
+        n_held = held.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            turnover = np.where(n_held > 0, (n_held - kept.sum(axis=1)) / k, np.nan)
+        turnover_rate[:-1, i] = turnover[:-1]  # 最后一日没有次日持仓
+        avg_real_label[:, i] = _prefix_means(labels, lengths, k)
+
+    # 去掉没有收益数据的日期 (NaN) 后逐日扣费累乘
+    valid = ~np.isnan(avg_real_label)
+    daily_net_ret = avg_real_label - (turnover_rate * fee_rate)
+    strategy_equity = initial_cash * _skipna_accumulate(1 + daily_net_ret, valid, np.multiply, 1.0)
+    csi300_factor = np.repeat((1 + csi300_labels)[:, None], len(top_nums), axis=1)
+    csi300_equity = initial_cash * _skipna_accumulate(csi300_factor, valid, np.multiply, 1.0)
+    max_equity = _skipna_accumulate(strategy_equity, valid, np.maximum, -np.inf)
+    drawdown = (strategy_equity - max_equity) / max_equity
+
+    results = {}
+    for i, k in enumerate(top_nums):
+        data = {"date": list(date_range_list)}
+        for j in range(k):
+            data[f"top{j + 1}"] = instruments[:, j].tolist()
+        data["avg_real_label"] = avg_real_label[:, i]
+        data["csi300_real_label"] = csi300_labels
+        data["turnover_rate"] = turnover_rate[:, i]
+        rows = valid[:, i]
+        df = pd.DataFrame(data)[rows].copy()
+        df["daily_net_ret"] = daily_net_ret[rows, i]
+        df["strategy_equity"] = strategy_equity[rows, i]
+        df["csi300_equity"] = csi300_equity[rows, i]
+        df["max_equity"] = max_equity[rows, i]
+        df["drawdown"] = drawdown[rows, i]
+        results[k] = df
+    return results
+
+
+def _review_scores(subdir: Path, date_str, real_df, n1, n2, echo=True):
+    """
+    单个结果目录的复盘：读取 ret / filter_ret 并统计 TopK 指标。不依赖 ModelReviewHelper 的状态，可在子进程中执行。
+    返回 (markdown, ret 结果, filter_ret 结果)
+    """
+    # 不读 'KMID' 及其右侧所有表项（包含 KMID）
+    df_filter_ret = ModelReviewHelper._read_scores(subdir, date_str, "filter_ret", stop_column="KMID")
+    df_ret = ModelReviewHelper._read_scores(subdir, date_str, "ret", stop_column="KMID")
+
+    if echo:
+        print("分析 df_ret:")
+    df_ret, ret_markdown = ModelReviewHelper._review_csv(df_ret, real_df, n1, n2, echo)
+    if echo:
+        print("分析 df_filter_ret:")
+    df_filter_ret, filter_markdown = ModelReviewHelper._review_csv(df_filter_ret, real_df, n1, n2, echo)
+    markdown = f"### {date_str}_ret.csv\n" + ret_markdown + f"### {date_str}_filter_ret.csv\n" + filter_markdown
+    return markdown, df_ret, df_filter_ret
+
 
 class ModelReviewHelper:
     """负责模型预测结果的回测复盘逻辑，拆分自 ModelCLI 降低单文件复杂度。"""
@@ -29,8 +184,13 @@ class ModelReviewHelper:
         self.backtest_result_df = {}
         self.backtest_result_df_filter = {}
 
+        # 复盘用的 (datetime, instrument) 面板，review 开始时一次性加载
+        self.panel = None
+
     # ---------- CSV 单日回测 ----------
-    def _review_csv(self, df, real_df, n1, n2):
+    @staticmethod
+    def _review_csv(df, real_df, n1, n2, echo=True):
+        """返回 (合并了真实收益与次日价格的 df, 该日 TopK 指标表的 markdown)；echo 为 False 时不打印"""
         df = df[df["avg_score"] > 0].copy()  # 避免 SettingWithCopyWarning
         real_map = real_df.drop_duplicates("instrument").set_index("instrument")["real_label"]
         df["real_label"] = df["instrument"].map(real_map)
@@ -38,8 +198,9 @@ class ModelReviewHelper:
         df["error"] = df["avg_score"] - df["real_label"]
         df["abs_error"] = df["error"].abs()
 
-        date_str = df["datetime"].iloc[0]
-        print(f"分析 {date_str} csv")
+        date_str = str(pd.Timestamp(df["datetime"].iloc[0]).date())
+        if echo:
+            print(f"分析 {date_str} csv")
 
         n1_renamed = n1[["instrument", "close"]].rename(columns={"close": "n1close"})
         n2_renamed = n2[["instrument", "high"]].rename(columns={"high": "n2high"})
@@ -47,41 +208,7 @@ class ModelReviewHelper:
         df = df.merge(n1_renamed, on="instrument", how="left")
         df = df.merge(n2_renamed, on="instrument", how="left")
 
-        profit_num_list = [0.01 * i for i in range(1, 11)]  # 0.01 ~ 0.10
-
-        topk_result_dict = {}
-        topk_result_index = [
-            "止盈1%胜率",
-            "止盈2%胜率",
-            "止盈3%胜率",
-            "止盈4%胜率",
-            "止盈5%胜率",
-            "止盈6%胜率",
-            "止盈7%胜率",
-            "止盈8%胜率",
-            "止盈9%胜率",
-            "止盈10%胜率",
-            "持有一天平均收益",
-            "一天正收益占比",
-        ]
-
-        for top_num in top_num_list:
-            topk_df = df.sort_values(by="avg_score", ascending=False).head(top_num)
-            topk_avg_profit = topk_df["real_label"].mean()
-            topk_radio = ((topk_df["real_label"] * topk_df["avg_score"]) > 0).sum() / len(topk_df)
-
-            profit_list = []
-            for profit_num in profit_num_list:
-                topk_df_profit = (topk_df["n2high"] > topk_df["n1close"] * (1 + profit_num)).sum() / len(
-                    topk_df
-                )
-                profit_list.append(topk_df_profit)
-
-            profit_list.append(topk_avg_profit)
-            profit_list.append(topk_radio)
-            topk_result_dict[f"Top{top_num}"] = profit_list
-
-        topk_result_df = pd.DataFrame(topk_result_dict, index=topk_result_index)
+        topk_result_df = topk_review_metrics(df)
         topk_result_df.index.name = date_str
 
         def to_percent(val):
@@ -89,11 +216,11 @@ class ModelReviewHelper:
                 return f"{val * 100:.2f}%"
             return val
 
-        pct_df = topk_result_df.applymap(to_percent)
-        print(pct_df.to_markdown(index=True))
-
-        self.review_result_string += pct_df.to_markdown(index=True) + "\n"
-        return df
+        pct_df = topk_result_df.map(to_percent)
+        markdown = pct_df.to_markdown(index=True)
+        if echo:
+            print(markdown)
+        return df, markdown + "\n"
 
     # ---------- 遍历单日子目录 ----------
     def _extract_date_from_csv_name(self, subdir: Path):
@@ -106,9 +233,32 @@ class ModelReviewHelper:
             None,
         )
 
-    def _review_subdir(self, subdir: Path):
+    @staticmethod
+    def _read_scores(subdir: Path, date_str, kind, stop_column=None, parse_dates=False):
+        """
+        读取某次结果某日的 ret / filter_ret：优先按列读取结果目录下的 Parquet 打分库，
+        没有打分库的旧结果目录回退到 CSV。
+        stop_column: 只保留该列左侧的列（如 KMID，即去掉附带的 Alpha158 特征）
+        """
+        path = partition_path(subdir, kind, date_str)
+        if path.exists():
+            columns = partition_columns(path)
+            if stop_column in columns:
+                columns = columns[:columns.index(stop_column)]
+            return read_partition(path, columns)
+
+        df = pd.read_csv(subdir / f"{date_str}_{kind}.csv", parse_dates=["datetime"] if parse_dates else False)
+        if stop_column in df.columns:
+            df = df.iloc[:, :df.columns.get_loc(stop_column)]
+        return df
+
+    def _review_task(self, subdir: Path):
+        """
+        复盘前的准备：确定日期、从面板取真实收益与后两日价格。
+        返回 (该目录 markdown 的开头, _review_scores 的参数；不能复盘时为 None)
+        """
         print(f"- {subdir.name}")
-        self.review_result_string += f"## {subdir.name}\n"
+        markdown = f"## {subdir.name}\n"
 
         date_str = self._extract_date_from_csv_name(subdir)
         if date_str:
@@ -119,13 +269,12 @@ class ModelReviewHelper:
         idx = self.trade_date.get_date_index(date_str)
         if idx is None:
             logger.info(f"{subdir.name} 日期 {date_str} 不在交易日日历中，不能复盘")
-            return
+            return markdown, None
 
         # 复盘依赖下一个与下下个交易日，任一缺失都不执行复盘。
         if idx + 2 >= len(self.trade_date.get_trade_date_list()):
             logger.info(f"还不能复盘 {date_str}")
-            self.review_result_string += f"还不能复盘 {date_str}\n"
-            return
+            return markdown + f"还不能复盘 {date_str}\n", None
 
         next1_date = self.trade_date.get_next_date(date_str, 1) if idx + 1 < len(self.trade_date.get_trade_date_list()) else None
         next2_date = self.trade_date.get_next_date(date_str, 2) if idx + 2 < len(self.trade_date.get_trade_date_list()) else None
@@ -136,51 +285,146 @@ class ModelReviewHelper:
             f"下2个交易日: {next2_date if next2_date else '[未知日期]'}]"
         )
 
-        df_filter_ret = pd.read_csv(subdir / f"{date_str}_filter_ret.csv")
-        df_ret = pd.read_csv(subdir / f"{date_str}_ret.csv")
-
-        real_df = self.cli.get_real_label(dates={"start": date_str, "end": date_str})
-        real_df = real_df.reset_index()
+        real_df = self._real_label(date_str)
+        next1_date_original_data = self._original_data(next1_date)
+        next2_date_original_data = self._original_data(next2_date)
+        return markdown, (subdir, date_str, real_df, next1_date_original_data, next2_date_original_data)
 
-        # 删除 'KMID' 及其右侧所有表项（包含 KMID）
-        for name, df in [("df_ret", df_ret), ("df_filter_ret", df_filter_ret)]:
-            if df is not None and not df.empty:
-                if "KMID" in df.columns:
-                    kmid_idx = df.columns.get_loc("KMID")
-                    if name == "df_ret":
-                        df_ret = df.iloc[:, :kmid_idx]
-                    else:
-                        df_filter_ret = df.iloc[:, :kmid_idx]
-                else:
-                    print(f"⚠️ {name} 中不存在 'KMID' 列，未做裁剪。")
-
-        next1_date_original_data = self.cli.get_orignal_data(
-            dates={"start": next1_date, "end": next1_date}
-        )
-        next2_date_original_data = self.cli.get_orignal_data(
-            dates={"start": next2_date, "end": next2_date}
-        )
+    def _run_reviews(self, subdirs):
+        """
+        按 subdirs 顺序产出 (subdir, markdown, (ret 结果, filter_ret 结果) 或 None)。
+        review_workers > 1 时各目录的读取与统计分发到多进程执行，主进程只做准备并按目录顺序合并，结果与串行一致。
+        """
+        workers = min(int(self.kwargs.get("review_workers") or 1), len(subdirs))
+        if workers <= 1:
+            for subdir in subdirs:
+                markdown, args = self._review_task(subdir)
+                if args is None:
+                    yield subdir, markdown, None
+                    continue
+                scores_markdown, df_ret, df_filter_ret = _review_scores(*args)
+                yield subdir, markdown + scores_markdown, (df_ret, df_filter_ret)
+            return
 
-        print("分析 df_ret:")
-        self.review_result_string += f"### {date_str}_ret.csv\n"
-        df = self._review_csv(df_ret, real_df, next1_date_original_data, next2_date_original_data)
-        self.review_result_df[subdir.name] = df
+        # traincli 依赖 qlib 训练组件，放在这里导入，子进程加载本模块时不必导入
+        from traincli import resolve_start_method
+
+        logger.info(f"并行复盘: {len(subdirs)} 个目录, {workers} 个进程")
+        mp_context = multiprocessing.get_context(resolve_start_method(self.kwargs.get("worker_start_method")))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+            tasks = []
+            for subdir in subdirs:
+                markdown, args = self._review_task(subdir)
+                future = pool.submit(_review_scores, *args, echo=False) if args is not None else None
+                tasks.append((subdir, markdown, future))
+            for subdir, markdown, future in tasks:
+                if future is None:
+                    yield subdir, markdown, None
+                    continue
+                scores_markdown, df_ret, df_filter_ret = future.result()
+                yield subdir, markdown + scores_markdown, (df_ret, df_filter_ret)
+
+    def _collect_review(self, name, markdown, result):
+        self.review_result_string += markdown
+        if result is not None:
+            self.review_result_df[name], self.review_result_df_filter[name] = result
+
+    # ---------- 复盘数据 ----------
+    def _preload_panel(self, subdirs):
+        """
+        一次取出所有子目录复盘所需的 [最早预测日, 最晚预测日的下下个交易日] 区间的 real_label 与价格，
+        之后各日只在内存面板上切片，不再每个目录三次调用 D.features
+        """
+        trade_dates = set(self.trade_date.get_trade_date_list())
+        dates = [d for d in map(self._extract_date_from_csv_name, subdirs) if d in trade_dates]
+        if not dates:
+            return
+        start, end = min(dates), self.trade_date.get_next_date(max(dates), 2)
+        self.panel = self.cli.get_review_panel(dates={"start": start, "end": end})
+        logger.info(f"复盘数据已加载: {start} ~ {end}, {len(self.panel)} 行")
 
-        print("分析 df_filter_ret:")
-        self.review_result_string += f"### {date_str}_filter_ret.csv\n"
-        df = self._review_csv(
-            df_filter_ret, real_df, next1_date_original_data, next2_date_original_data
-        )
-        self.review_result_df_filter[subdir.name] = df
+    def _panel_day(self, date_str):
+        """面板中某日的数据 (索引 instrument)；面板未加载或不含该日时返回 None"""
+        if self.panel is None:
+            return None
+        date = pd.Timestamp(date_str)
+        if date not in self.panel.index.get_level_values("datetime"):
+            return None
+        return self.panel.xs(date, level="datetime")
+
+    def _real_label(self, date_str):
+        """某日的 real_label，列 [instrument, real_label]"""
+        day = self._panel_day(date_str)
+        if day is None:
+            return self.cli.get_real_label(dates={"start": date_str, "end": date_str}).reset_index()
+        return day[["real_label"]].reset_index()
+
+    def _original_data(self, date_str):
+        """某日的复权价格，列 [instrument, close, open, high, low]"""
+        day = self._panel_day(date_str)
+        if day is None:
+            return self.cli.get_orignal_data(dates={"start": date_str, "end": date_str})
+        return day.drop(columns="real_label").reset_index()
+
+    # ---------- 复盘缓存 ----------
+    def _review_key(self, subdir: Path):
+        """
+        复盘缓存键：目录名、输入打分文件 (Parquet 分区或 CSV) 的哈希、该日及其后两个交易日。
+        还不能复盘 (后两个交易日数据未到) 的目录返回 None，不缓存，数据到齐后自然重算。
+        """
+        date_str = self._extract_date_from_csv_name(subdir)
+        trade_dates = self.trade_date.get_trade_date_list()
+        if date_str not in trade_dates:
+            return None
+        idx = trade_dates.index(date_str)
+        if idx + 2 >= len(trade_dates):
+            return None
+        files = []
+        for kind in ("ret", "filter_ret"):
+            path = partition_path(subdir, kind, date_str)
+            files.append(path if path.exists() else subdir / f"{date_str}_{kind}.csv")
+        return {
+            "version": REVIEW_CACHE_VERSION,
+            "subdir": subdir.name,
+            "files": [calculate_file_sha256(f) for f in files],
+            "calendar": trade_dates[idx: idx + 3],
+        }
+
+    def _review_cached_subdirs(self, subdirs, cache: ReviewCache):
+        """逐目录复盘：命中缓存的目录直接取用结果与 markdown 片段，其余复盘后写回缓存。返回命中的目录名"""
+        keys = {subdir.name: self._review_key(subdir) for subdir in subdirs}
+        hits = {}
+        for name, key in keys.items():
+            entry = cache.get(name, key) if key else None
+            if entry is not None:
+                hits[name] = entry
+        logger.info(f"复盘缓存命中 {len(hits)}/{len(subdirs)} 个目录")
+
+        misses = [subdir for subdir in subdirs if subdir.name not in hits]
+        self._preload_panel(misses)
+        reviewed = {subdir.name: (markdown, result) for subdir, markdown, result in self._run_reviews(misses)}
+        for subdir in subdirs:
+            name = subdir.name
+            if name in hits:
+                self._collect_review(name, hits[name]["markdown"], (hits[name]["ret"], hits[name]["filter_ret"]))
+                continue
+            markdown, result = reviewed[name]
+            self._collect_review(name, markdown, result)
+            if keys[name] and result is not None:
+                cache.put(name, keys[name], {"markdown": markdown, "ret": result[0], "filter_ret": result[1]})
+        return set(hits)
 
     # ---------- 最终结果落盘 ----------
-    def save_review_result(self):
+    def save_review_result(self, unchanged=()):
+        """unchanged: 结果与上次相同的目录 (命中复盘缓存)，对应文件已存在时不再重写"""
         review_dir = Path("../review_csv")
         review_dir.mkdir(parents=True, exist_ok=True)
-        for name, df in self.review_result_df.items():
-            df.to_csv(review_dir / f"{name}_ret.csv", index=True)
-        for name, df in self.review_result_df_filter.items():
-            df.to_csv(review_dir / f"{name}_filter_ret.csv", index=True)
+        for suffix, results in (("ret", self.review_result_df), ("filter_ret", self.review_result_df_filter)):
+            for name, df in results.items():
+                path = review_dir / f"{name}_{suffix}.csv"
+                if name in unchanged and path.exists():
+                    continue
+                df.to_csv(path, index=True)
 
     def _get_review_subdirs(self) -> list[Path] | None:
         """获取复盘用的子目录列表，按日期倒序。目录不存在时返回 None。"""
@@ -207,14 +451,20 @@ class ModelReviewHelper:
         if sorted_subdirs is None:
             return
 
-        for subdir in sorted_subdirs:
-            self._review_subdir(subdir)
+        # 开启 review_cache 时只复盘新增或刚满足复盘条件的日期，其余从缓存拼出报告
+        unchanged = set()
+        if self.kwargs.get("review_cache"):
+            unchanged = self._review_cached_subdirs(sorted_subdirs, ReviewCache(self.kwargs.get("review_cache_dir")))
+        else:
+            self._preload_panel(sorted_subdirs)
+            for subdir, markdown, result in self._run_reviews(sorted_subdirs):
+                self._collect_review(subdir.name, markdown, result)
 
         print(self.review_result_string)
         append_to_file("/tmp/review_result.md", self.review_result_string, mmode="w")
         logger.info("review result saved to /tmp/review_result.md")
 
-        self.save_review_result()
+        self.save_review_result(unchanged)
         logger.info("review result saved to ../review_csv")
 
         pprint(self.review_result_df)
@@ -234,94 +484,22 @@ class ModelReviewHelper:
         # 两个: ret 和 filter_ret
         for subdir in sorted_subdirs:
             date_str = self._extract_date_from_csv_name(subdir)
-            df_ret = pd.read_csv(subdir / f"{date_str}_ret.csv", parse_dates=["datetime"])
+            df_ret = self._read_scores(subdir, date_str, "ret", parse_dates=True)
             # 直接覆盖原列，保持 real_label 列位置不变，避免 merge 产生 _x/_y 列
             df_ret["real_label"] = df_ret.set_index(["datetime", "instrument"]).index.map(real_label_map)
 
-            df_filter_ret = pd.read_csv(subdir / f"{date_str}_filter_ret.csv", parse_dates=["datetime"])
+            df_filter_ret = self._read_scores(subdir, date_str, "filter_ret", parse_dates=True)
             df_filter_ret["real_label"] = df_filter_ret.set_index(["datetime", "instrument"]).index.map(real_label_map)
 
             self.review_result_df[date_str] = df_ret
             self.review_result_df_filter[date_str] = df_filter_ret
 
-    def _calculate_daily_equity(self, df, initial_cash=1.0, fee_rate=0.002):
-        """
-        df: 你截图中的表格数据
-        fee_rate: 双边交易成本 (佣金+印花税+滑点预估)
-        """
-        # 1. 预处理：去掉没有收益数据的末尾行 (NaN)
-        df = df.dropna(subset=['avg_real_label']).copy()
-
-        # 2. 计算每日扣费后的净收益率
-        # 净收益 = 原始平均收益 - (换手率 * 费率)
-        df['daily_net_ret'] = df['avg_real_label'] - (df['turnover_rate'] * fee_rate)
-
-        # 3. 计算累计净值 (核心连乘)
-        # cumprod() 会计算 (1+r1)*(1+r2)*...
-        df['strategy_equity'] = initial_cash * (1 + df['daily_net_ret']).cumprod()
-
-        # 4. 同理计算基准净值 (CSI300 通常不计手续费，作为理想参考)
-        df['csi300_equity'] = initial_cash * (1 + df['csi300_real_label']).cumprod()
-        df['max_equity'] = df['strategy_equity'].cummax()
-        df['drawdown'] = (df['strategy_equity'] - df['max_equity']) / df['max_equity']
-
-        return df
-
-    def _backtest_handle_df_topk(self, df_ret, csi300_df, date_range_list, name, top_num):
-        logger.info(f"backtest handle df {name} top {top_num}")
-        df_topk = []
-        for date in date_range_list:
-            df_topk_ret = df_ret[date]
-            # 获取df_ret的instrument排序前10名
-            topk_instruments = df_topk_ret['instrument'].head(top_num).tolist()
-            # 计算 top10 instrument 的 avg_score 平均值
-            avg_real_label = df_topk_ret[df_topk_ret['instrument'].isin(topk_instruments)]['real_label'].mean()
-            # 根据 date 合并 csi300_df
-            csi300_row = csi300_df[csi300_df['datetime'] == pd.to_datetime(date)]
-            if not csi300_row.empty:
-                csi300_label = csi300_row.iloc[0]["csi300_real_label"]
-            else:
-                csi300_label = None
-            # 将每一行数据作为字典存入列表，最后汇总为一个 DataFrame
-            row_dict = {'date': date}
-            for i, inst in enumerate(topk_instruments):
-                row_dict[f'top{i+1}'] = inst
-            # 填充不足10只股票
-            for i in range(len(topk_instruments), top_num):
-                row_dict[f'top{i+1}'] = None
-            row_dict['avg_real_label'] = avg_real_label
-            row_dict['csi300_real_label'] = csi300_label
-            df_topk.append(row_dict)
-        df_topk = pd.DataFrame(df_topk)
-        # 计算换手率
-        turnover_rates = []
-        for i in range(len(df_topk)):
-            if i == len(df_topk) - 1:
-                turnover_rates.append(float('nan'))
-            else:
-                curr_top = set([df_topk.loc[i, f"top{j+1}"] for j in range(top_num) if pd.notnull(df_topk.loc[i, f"top{j+1}"])])
-                next_top = set([df_topk.loc[i+1, f"top{j+1}"] for j in range(top_num) if pd.notnull(df_topk.loc[i+1, f"top{j+1}"])])
-                if len(curr_top) == 0:
-                    turnover_rates.append(float('nan'))
-                else:
-                    # 换手率定义为当前位置的 top10 有多少支被下一期 top10 替换掉
-                    changed = curr_top - next_top
-                    turnover_rate = len(changed) / top_num
-                    turnover_rates.append(turnover_rate)
-        df_topk["turnover_rate"] = turnover_rates
-
-
-
-        df_equity = self._calculate_daily_equity(df_topk)
-        print(df_equity)
-        if name == "ret":
-            self.backtest_result_df[top_num] = df_equity
-        else:
-            self.backtest_result_df_filter[top_num] = df_equity
-
     def _backtest_handle_df(self, df_ret, csi300_df, date_range_list, name):
-        for top_num in top_num_list:
-            self._backtest_handle_df_topk(df_ret, csi300_df, date_range_list, name, top_num)
+        results = self.backtest_result_df if name == "ret" else self.backtest_result_df_filter
+        for top_num, df_equity in topk_backtest(df_ret, csi300_df, date_range_list).items():
+            logger.info(f"backtest handle df {name} top {top_num}")
+            print(df_equity)
+            results[top_num] = df_equity
 
 
     def save_backtest_result(self):
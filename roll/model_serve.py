@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+from loguru import logger
+from qlib.data import D
+from qlib.data.cache import H
+
+from model_infer import aggregate_scores, run_grouped_inference
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class ScoreService:
+    """
+    常驻内存的集成打分服务：一次性完成 get_model_list、加载所有模型、计算最近一段时间的特征并预测，
+    之后的打分请求只在内存中的预测面板上切片聚合，毫秒级返回。
+    reload() 在后台重建全部状态后整体替换，重建期间旧状态继续提供服务。
+    """
+
+    def __init__(self, cli, days=None):
+        self.cli = cli
+        self.days = days
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.scores = None  # MultiIndex (datetime, instrument) -> avg_score / pos_ratio
+        self.info = {}
+
+    def _predict_range(self):
+        """预测区间: 指定 days 时取本地数据最近 days 个交易日，否则使用配置中的 predict_dates"""
+        if self.days:
+            calendar = D.calendar(freq="day")
+            return pd.Timestamp(calendar[-int(self.days)]), pd.Timestamp(calendar[-1])
+        p_dates = self.cli.kwargs["predict_dates"][0]
+        return pd.Timestamp(p_dates["start"]), pd.Timestamp(p_dates["end"])
+
+    def load(self):
+        """重新筛选模型、计算特征并预测，完成后原子替换服务状态"""
+        with self._reload_lock:
+            start = time.time()
+            # 清空 qlib 进程内的日历 / 股票池 / 特征缓存，以及上次筛选的模型状态，读取最新的本地数据与模型
+            H.clear()
+            self.cli.reset_model_state()
+            predict_start, predict_end = self._predict_range()
+            jobs = self.cli._inference_jobs(predict_start, predict_end)
+            frames = []
+            for _, rid, pred in run_grouped_inference(jobs):
+                df = pred.to_frame(name="score").reset_index()
+                df["weight"] = self.cli.rid_weight.get(rid, 0.0)
+                frames.append(df)
+            if not frames:
+                raise RuntimeError("没有可用的模型")
+
+            panel = pd.concat(frames, ignore_index=True)
+            panel["datetime"] = pd.to_datetime(panel["datetime"])
+            scores = aggregate_scores(panel).set_index(["datetime", "instrument"]).sort_index()
+            info = {
+                "models": len(jobs),
+                "start": str(predict_start.date()),
+                "end": str(predict_end.date()),
+                "dates": [str(d.date()) for d in scores.index.get_level_values("datetime").unique()],
+                "loaded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "load_seconds": round(time.time() - start, 1),
+            }
+            with self._lock:
+                self.scores, self.info = scores, info
+            logger.info(f"打分服务已加载: {info['models']} 个模型, {info['start']} ~ {info['end']} ({info['load_seconds']}s)")
+            return info
+
+    def query(self, date=None, instruments=None, top=None) -> dict:
+        """某日 (默认最新一日) 的集成打分，按 avg_score 降序，可按股票列表过滤、取前 top 个"""
+        with self._lock:
+            scores, info = self.scores, self.info
+        if scores is None:
+            raise RuntimeError("服务尚未加载完成")
+
+        dates = scores.index.get_level_values("datetime")
+        date = pd.Timestamp(date) if date else dates.max()
+        if date not in dates:
+            raise KeyError(f"{date.date()} 不在已加载的预测区间 {info['start']} ~ {info['end']}")
+
+        day = scores.xs(date, level="datetime")
+        if instruments:
+            day = day[day.index.isin(instruments)]
+        day = day.sort_values("avg_score", ascending=False)
+        if top:
+            day = day.head(int(top))
+        return {
+            "date": str(date.date()),
+            "count": len(day),
+            "scores": [
+                {"instrument": inst, "avg_score": float(row.avg_score), "pos_ratio": float(row.pos_ratio)}
+                for inst, row in day.iterrows()
+            ],
+        }
+
+
+def _make_handler(service: ScoreService):
+    class ScoreHandler(BaseHTTPRequestHandler):
+        def _send(self, code, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                if url.path == "/score":
+                    date = None
+                    if params.get("date"):
+                        try:
+                            date = pd.Timestamp(params["date"])
+                        except ValueError:
+                            self._send(400, {"error": f"无法解析日期: {params['date']}"})
+                            return
+                    instruments = [i.strip() for i in params["instruments"].split(",")] if params.get("instruments") else None
+                    self._send(200, service.query(date, instruments, params.get("top")))
+                elif url.path == "/reload":
+                    if self.command != "POST":
+                        self._send(405, {"error": "use POST /reload"})
+                    else:
+                        self._send(200, service.load())
+                elif url.path == "/health":
+                    self._send(200, service.info)
+                else:
+                    self._send(404, {"error": f"unknown path {url.path}"})
+            except KeyError as e:
+                self._send(400, {"error": e.args[0] if e.args else str(e)})
+            except Exception as e:
+                logger.exception(e)
+                self._send(500, {"error": str(e)})
+
+        def do_GET(self):
+            self._route()
+
+        def do_POST(self):
+            self._route()
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return ScoreHandler
+
+
+def serve(cli, host=None, port=None, days=None):
+    """加载打分服务并在 host:port 上阻塞提供 HTTP 接口 (/score /reload /health)"""
+    host, port = host or DEFAULT_HOST, port or DEFAULT_PORT
+    service = ScoreService(cli, days=days)
+    service.load()
+    server = ThreadingHTTPServer((host, int(port)), _make_handler(service))
+    logger.info(f"打分服务监听 http://{host}:{port}  (GET /score?date=&instruments=&top=, POST /reload, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("打分服务已停止")
+    finally:
+        server.server_close()
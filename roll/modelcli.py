@@ -2,6 +2,7 @@ from loguru import logger
 from utils import (
     check_match_in_list,
     append_to_file,
+    data_fingerprint,
     get_normalized_stock_list,
 )
 import numpy as np
@@ -12,25 +13,48 @@ from qlib.data import D
 from qlib.workflow import R
 from qlib.config import C
 from pathlib import Path
-from qlib.utils import init_instance_by_config
 from tqdm import tqdm
 from functools import partialmethod
 from datetime import datetime
 from qlib.contrib.data.handler import Alpha158, Alpha360
+from qlib.contrib.data.loader import Alpha158DL
 from dataclasses import dataclass, field
 from typing import Dict, List
+import multiprocessing
 
 from model_backup import (
     compress_mlruns as _compress_mlruns,
     decompress_mlruns as _decompress_mlruns,
 )
+from model_infer import (
+    InferJob,
+    aggregate_scores,
+    inference_dataset_config,
+    predict_chunks,
+    run_grouped_inference,
+    run_parallel_inference,
+)
 from model_review import ModelReviewHelper
+from predict_cache import PredictionCache, instruments_key, model_hash
+from score_store import write_scores
+from feature_cache import is_fit_free
+from train_manifest import TrainManifest, manifest_path, recorder_entry
+from train_resource import get_core_budget, threads_per_fit
+from traincli import resolve_start_method
 
 # --- 常量定义：解决 Magic Strings 问题 ---
-PARAMS_FILE = "params.pkl"
-SIG_ANALYSIS_DIR = "sig_analysis"
-REQUIRED_ARTIFACTS = [PARAMS_FILE, SIG_ANALYSIS_DIR]
 DEFAULT_EXP_NAME = 'Default'
+# ret 结果附带的 Alpha158 特征所用股票池，以及 filter_ret_df 用到的特征列
+ALPHA_INSTRUMENTS = 'csi300'
+FILTER_FEATURES = ['STD5', 'STD20', 'STD60', 'ROC10', 'ROC20', 'ROC60']
+# 复盘用的真实收益 (T+1 收盘买入、T+2 收盘卖出) 与复权价格
+REAL_LABEL_FIELD = 'Ref($close, -2)/Ref($close, -1) - 1'
+ORIGINAL_FIELDS = {
+    'close': '$close * $factor',
+    'open': '$open * $factor',
+    'high': '$high * $factor',
+    'low': '$low * $factor',
+}
 
 @dataclass
 class ModelContext:
@@ -43,12 +67,13 @@ class ModelCLI:
     """
     def __init__(self, region=REG_CN, **kwargs):
         self.kwargs = kwargs
+        self.region = region
         self._init_qlib(region)
         # 复盘逻辑拆分到独立助手类，降低本文件认知复杂度
         self.reviewer = ModelReviewHelper(self)
-        # 注意：dataclasses.field 只能用于 dataclass 字段，这里必须用普通 dict
-        self.rid_rank_icir: Dict[str, float] = {}
-        self.rid_weight: Dict[str, float] = {}
+        self.reset_model_state()
+        # 推理阶段算好的原始 Alpha158 特征 {(start, end): DataFrame}，供 ret 结果合并与过滤复用
+        self._alpha_features: Dict[tuple, pd.DataFrame] = {}
 
     @staticmethod
     def _round3(x: float) -> float:
@@ -75,12 +100,49 @@ class ModelCLI:
         """
         辅助方法：判定一个 recorder 是否符合条件 (降低认知复杂度的核心)
         """
-        artifacts = recorder.list_artifacts()
-        # 使用 all() 检查所有必要产物是否存在，消除硬编码字符串
-        if not artifacts or not all(f in artifacts for f in REQUIRED_ARTIFACTS):
+        # 必要产物是否齐全记录在训练清单中，不再逐个列 artifacts
+        if not self._rec_meta(recorder)["complete"]:
             return False
         return self.filter_rec(recorder)
 
+    def _manifest(self, exp_id):
+        return TrainManifest(manifest_path(self.kwargs["uri_folder"], exp_id))
+
+    def _rec_meta(self, rec):
+        """
+        recorder 的索引条目（IC 统计、训练区间、模型 / 数据集类、训练时间），读取实验的训练清单。
+        清单中没有的老 recorder 从 pickle 计算一次，稍后由 _flush_rec_index 写回清单。
+        """
+        exp_id = str(rec.experiment_id)
+        if exp_id not in self._rec_index:
+            self._rec_index[exp_id] = self._manifest(exp_id).load()
+        index = self._rec_index[exp_id]
+
+        entry = index.get(rec.id)
+        if entry is None or (entry["complete"] and "ic" not in entry):
+            entry = recorder_entry(rec)
+            index[rec.id] = entry
+            self._rec_index_backfill.setdefault(exp_id, {})[rec.id] = entry
+        return entry
+
+    def reset_model_state(self):
+        """清空模型筛选相关的状态，下次 get_model_list 重新读取训练清单 (常驻服务重载时用)"""
+        # 注意：dataclasses.field 只能用于 dataclass 字段，这里必须用普通 dict
+        self.rid_rank_icir: Dict[str, float] = {}
+        self.rid_weight: Dict[str, float] = {}
+        # 各实验训练清单中的 recorder 索引 {exp_id: {rid: entry}}，以及待写回的补建条目
+        self._rec_index: Dict[str, dict] = {}
+        self._rec_index_backfill: Dict[str, dict] = {}
+
+    def _flush_rec_index(self):
+        """把补建的条目写回各实验的训练清单（只写已存在的实验目录）"""
+        for exp_id, entries in self._rec_index_backfill.items():
+            manifest = self._manifest(exp_id)
+            if manifest.path.parent.is_dir():
+                manifest.update(entries)
+                logger.info(f"补建模型索引: {manifest.path} ({len(entries)} 个 recorder)")
+        self._rec_index_backfill = {}
+
     def get_model_list(self):
         """
         获取模型列表：通过 Early Return 和辅助函数降低嵌套层级
@@ -111,6 +173,7 @@ class ModelCLI:
             # 只有当这个实验下有符合条件的记录时才添加
             if mc.rid:
                 ret.append(mc)
+        self._flush_rec_index()
         # 通过 rank_icir 为 rid_weight 分配权重（归一化处理）
         total_rank_icir = sum(self.rid_rank_icir[rid] for mc in ret for rid in mc.rid)
         self.rid_weight = {}
@@ -132,10 +195,7 @@ class ModelCLI:
         logger.info(f"experiment num: {len(ret)}, rid num: {total_rids}")
 
     def get_ic_info(self, rec):
-        ic_pkl = rec.load_object(f"{SIG_ANALYSIS_DIR}/ic.pkl")
-        ric_pkl = rec.load_object(f"{SIG_ANALYSIS_DIR}/ric.pkl")
-        ic, rank_ic = ic_pkl.mean(), ric_pkl.mean()
-        icir, rank_icir = ic / ic_pkl.std(), rank_ic / ric_pkl.std()
+        ic, icir, rank_ic, rank_icir = self._rec_meta(rec)["ic"]
 
         ic_info = {
             "IC": float(np.around(ic, 3)),
@@ -146,20 +206,20 @@ class ModelCLI:
         return ic_info, [ic, icir, rank_ic, rank_icir]
 
     def get_train_time(self, rec):
-        task = rec.load_object("task")
-        start_time = rec.info['start_time'].split()[0]
-        end_time = rec.info['end_time'].split()[0]
-        data_train = task['dataset']['kwargs']['segments']['train']
+        meta = self._rec_meta(rec)
+        start_time = meta['start_time'].split()[0]
+        end_time = meta['end_time'].split()[0]
+        data_train = meta['train']
         return [data_train[0], data_train[1]], [start_time, end_time]
 
     def print_rec(self, rec):
-        task = rec.load_object("task")
+        meta = self._rec_meta(rec)
         ic_info, _ = self.get_ic_info(rec)
         data_train_vec, train_time_vec = self.get_train_time(rec)
         info = {
             "id": rec.id,
-            "model": task["model"]['class'],
-            "dataset": task['dataset']['kwargs']['handler']['class'],
+            "model": meta["model"],
+            "dataset": meta["dataset"],
             "ic_info": ic_info,
             "data_train_vec": data_train_vec,
             "train_time_vec": train_time_vec,
@@ -192,42 +252,179 @@ class ModelCLI:
                 logger.info(f"删除 Experiment: {name} {exp.id}")
                 R.delete_exp(experiment_name=name)
                 continue
+            deleted = []
             for rid in recorders:
                 if not self._is_valid_recorder(exp.get_recorder(recorder_id=rid)):
                     logger.info(f"Experiment: {name} 删除 Recorder: {rid} ")
                     exp.delete_recorder(rid)
-
-    def analysis(self):
-        ret = []
-        model_list = self.get_model_list()
-        for mc in model_list:
+                    deleted.append(rid)
+            self._flush_rec_index()
+            # 同步训练清单，被删除的时间段下次会重新训练
+            manifest = self._manifest(exp.id)
+            if deleted and manifest.exists():
+                manifest.remove(deleted)
+                for rid in deleted:
+                    self._rec_index.get(str(exp.id), {}).pop(rid, None)
+            if deleted:
+                PredictionCache(self.kwargs.get("predict_cache_dir")).invalidate(deleted)
+
+    def _inference_recs(self):
+        """筛选出的 recorder 及其训练 task: [(exp_name, rid, rec, task)]"""
+        recs = []
+        for mc in self.get_model_list():
             exp = R.get_exp(experiment_name=mc.exp_name)
             for rid in mc.rid:
                 rec = exp.get_recorder(recorder_id=rid)
-                task = rec.load_object("task")
-                model = rec.load_object(PARAMS_FILE)
                 self.print_rec(rec)
+                recs.append((mc.exp_name, rid, rec, rec.load_object("task")))
+        return recs
+
+    def _inference_jobs(self, predict_date1, predict_date2, recs=None):
+        """筛选出的每个 recorder 生成一个推理任务 (预测区间 predict_date1 ~ predict_date2)"""
+        if recs is None:
+            recs = self._inference_recs()
+        return [
+            InferJob(exp_name, rid, rec, inference_dataset_config(task, predict_date1, predict_date2))
+            for exp_name, rid, rec, task in recs
+        ]
 
-                dataset_config = task['dataset']
-                p_dates = self.kwargs['predict_dates'][0]
-                predict_date1, predict_date2 = pd.Timestamp(p_dates['start']), pd.Timestamp(p_dates['end'])
-
-                dataset_config['kwargs']['segments']['test'] = (predict_date1, predict_date2)
-                dataset_config['kwargs']['handler']['kwargs']['end_time'] = predict_date2
+    def _predict_chunks(self):
+        """predict_dates 中所有区间的交易日并集，按 predict_chunk_days 个交易日切块"""
+        ranges = [(pd.Timestamp(d['start']), pd.Timestamp(d['end'])) for d in self.kwargs['predict_dates']]
+        calendar = D.calendar(start_time=min(s for s, _ in ranges), end_time=max(e for _, e in ranges), freq='day')
+        return predict_chunks(ranges, calendar, int(self.kwargs.get("predict_chunk_days") or 20))
+
+    def analysis(self, predict_date1=None, predict_date2=None, recs=None):
+        """预测 predict_date1 ~ predict_date2 (默认 predict_dates 的第一个区间)，返回 [[exp_name, rid, pred], ...]"""
+        if predict_date1 is None:
+            p_dates = self.kwargs['predict_dates'][0]
+            predict_date1, predict_date2 = p_dates['start'], p_dates['end']
+        return list(self._predict(predict_date1, predict_date2, recs))
+
+    def _predict(self, predict_date1, predict_date2, recs=None):
+        """analysis 的内部实现；infer_workers > 1 且未开启预测缓存时返回流式生成器，供 selection 边预测边汇总"""
+        predict_date1, predict_date2 = pd.Timestamp(predict_date1), pd.Timestamp(predict_date2)
+        jobs = self._inference_jobs(predict_date1, predict_date2, recs)
+        self._alpha_features = {}
+        cache = self._predict_cache()
+        if cache is not None:
+            return self._cached_inference(jobs, cache, predict_date1, predict_date2)
+        return self._run_inference(jobs)
+
+    def _run_inference(self, jobs):
+        # 相同 handler 配置的模型共用一份特征；infer_workers > 1 时多进程并行预测，结果流式交给 collect
+        infer_workers = int(self.kwargs.get("infer_workers") or 1)
+        if infer_workers > 1:
+            threads = self.kwargs.get("infer_threads") or threads_per_fit(
+                get_core_budget(self.kwargs.get("core_budget")), infer_workers
+            )
+            return run_parallel_inference(
+                jobs,
+                workers=infer_workers,
+                threads=int(threads),
+                mp_context=multiprocessing.get_context(resolve_start_method(self.kwargs.get("worker_start_method"))),
+                region=self.region,
+                provider_uri=self.kwargs.get("provider_uri"),
+                uri_folder=self.kwargs.get("uri_folder"),
+                on_dataset=self._keep_alpha_features,
+            )
+        return run_grouped_inference(jobs, on_dataset=self._keep_alpha_features)
+
+    def _predict_cache(self):
+        if not self.kwargs.get("predict_cache"):
+            return None
+        return PredictionCache(
+            self.kwargs.get("predict_cache_dir"),
+            self.kwargs.get("predict_cache_max_mb"),
+            data_version=data_fingerprint(self.kwargs["provider_uri"]),
+        )
 
-                dataset = init_instance_by_config(dataset_config)
-                pred_score = model.predict(dataset, segment="test")
-                ret.append([mc.exp_name, rid, pred_score])
-        return ret
+    def _cached_inference(self, jobs, cache, predict_date1, predict_date2):
+        """
+        先查预测缓存，每个模型只预测缺失日期所在的 [最早缺失日, 最晚缺失日] 区间，
+        新结果按日写回缓存后与命中部分拼接，返回结果与 _run_inference 一致 (按 jobs 顺序)。
+        """
+        dates = [pd.Timestamp(d) for d in D.calendar(start_time=predict_date1, end_time=predict_date2, freq='day')]
+        plan, todo = [], []
+        for job in jobs:
+            m_hash = model_hash(job.rec)
+            key = (job.rid, m_hash, instruments_key(job.dataset_config)) if m_hash else None
+            cached = cache.get(*key, dates) if key else {}
+            missing = [d for d in dates if d not in cached]
+            if missing:
+                todo.append(InferJob(
+                    job.exp_name, job.rid, job.rec,
+                    inference_dataset_config({"dataset": job.dataset_config}, missing[0], missing[-1]),
+                ))
+            plan.append((job, key, cached, missing))
+        hits = sum(len(cached) for _, _, cached, _ in plan)
+        logger.info(f"预测缓存命中 {hits}/{len(jobs) * len(dates)} (模型 x 交易日)，需要预测的模型 {len(todo)} 个")
+
+        fresh = {(exp_name, rid): pred for exp_name, rid, pred in self._run_inference(todo)} if todo else {}
+        results = []
+        for job, key, cached, missing in plan:
+            parts = [cached[d] for d in dates if d in cached]
+            if missing:
+                pred = fresh.get((job.exp_name, job.rid))
+                if pred is None:
+                    continue
+                pred = pred[pred.index.get_level_values("datetime").isin(missing)]
+                if key:
+                    cache.put(*key, pred, missing)
+                parts.append(pred)
+            results.append([job.exp_name, job.rid, pd.concat(parts).sort_index()])
+        cache.evict()
+        return results
+
+    def clean_predict_cache(self, *rids):
+        """删除预测缓存；指定 rid 时只删除这些 recorder 的缓存"""
+        cache = PredictionCache(self.kwargs.get("predict_cache_dir"), self.kwargs.get("predict_cache_max_mb"))
+        removed = cache.invalidate(list(rids) or None)
+        logger.info(f"已删除 {removed} 个预测缓存条目 ({cache.cache_dir})")
+        return removed
+
+    def _keep_alpha_features(self, dataset_config, dataset):
+        """推理用的默认处理器 Alpha158 (csi300) 特征与 get_alpha_data 计算的完全一致，留下来免得再算一遍"""
+        handler_config = dataset_config["kwargs"]["handler"]
+        if not isinstance(handler_config, dict) or not is_fit_free(handler_config):
+            return
+        h_kwargs = handler_config["kwargs"]
+        if h_kwargs.get("instruments") != ALPHA_INSTRUMENTS:
+            return
+        key = (pd.Timestamp(h_kwargs["start_time"]), pd.Timestamp(h_kwargs["end_time"]))
+        if key not in self._alpha_features:
+            self._alpha_features[key] = dataset.handler.fetch(col_set="feature")
 
     def selection(self):
-        results = self.analysis()
-        if results: self.collect(results)
-
-    def collect(self, results):
-        func_name = "selection"
-        latest_stock_list = get_normalized_stock_list()
-
+        """
+        预测 predict_dates 中的所有区间：区间并集按 predict_chunk_days 个交易日分块，
+        每块只计算一次特征并预测，算完立即写出块内各日结果，内存占用与总天数无关。
+        """
+        chunks = self._predict_chunks()
+        if not chunks:
+            logger.warning(f"predict_dates 中没有交易日: {self.kwargs['predict_dates']}")
+            return
+        recs = self._inference_recs()
+        latest_stock_list = get_normalized_stock_list(
+            cache_path=self.kwargs.get("stock_list_cache"),
+            ttl_hours=self.kwargs.get("stock_list_ttl_hours"),
+            offline=bool(self.kwargs.get("stock_list_offline")),
+        )
+        save_dir = None
+        for i, (start, end) in enumerate(chunks, 1):
+            logger.info(f"预测分块 {i}/{len(chunks)}: {start.date()} ~ {end.date()}")
+            dates = {'start': start, 'end': end}
+            df_final = self.collect(self._predict(start, end, recs), dates)
+            if df_final is None:
+                continue
+            if save_dir is None:
+                save_dir = self._new_save_dir("selection")
+            self._save_results(df_final, save_dir, latest_stock_list, dates)
+        if save_dir is not None:
+            logger.info(f"预测结果已写入: {save_dir}")
+
+    def collect(self, results, dates=None):
+        """汇总各模型预测并合并真实标签，返回长表 (无可用结果时返回 None)"""
         processed_list = []
         for exp_name, rid, series_data in results:
             df = series_data.to_frame(name='score').reset_index()
@@ -235,11 +432,15 @@ class ModelCLI:
             df['weight'] = self.rid_weight.get(rid, 0.0)
             processed_list.append(df)
 
+        if not processed_list:
+            logger.warning("没有可用的预测结果")
+            return None
+
         df_final = pd.concat(processed_list, axis=0, ignore_index=True)
         df_final['datetime'] = pd.to_datetime(df_final['datetime'])
         df_final = df_final.sort_values(by='datetime')
 
-        real_df = self.get_real_label()
+        real_df = self.get_real_label(dates)
         label_clean = real_df.reset_index()
         label_clean = label_clean[['datetime', 'instrument', 'real_label']]
         df_final['datetime'] = pd.to_datetime(df_final['datetime'])
@@ -253,10 +454,8 @@ class ModelCLI:
         )
         result_df['error'] = result_df['score'] - result_df['real_label']
         result_df['abs_error'] = result_df['error'].abs()
-        df_final = result_df
         print(result_df.head())
-
-        self._save_results(df_final, func_name, latest_stock_list)
+        return result_df
 
     def _record_model_info(self, md_file = "model_info.md"):
         print(f"record model info to {md_file}")
@@ -271,7 +470,8 @@ class ModelCLI:
                 append_to_file(md_file, f"\n\tRecorder: {rid}\n")
                 append_to_file(md_file, f"\n\t\tModel: {info}\n")
 
-    def _save_results(self, df_final, func_name, latest_stock_list):
+    def _new_save_dir(self, func_name):
+        """创建本次结果目录并写入参数与模型信息"""
         base_dir = Path(self.kwargs['analysis_folder']).expanduser()
         save_dir = base_dir / f"{func_name}_{datetime.now().strftime('%Y%m%d_%H_%M_%S')}"
         save_dir.mkdir(parents=True, exist_ok=True)
@@ -280,26 +480,18 @@ class ModelCLI:
         append_to_file(md_file, f"# params \n")
         append_to_file(md_file, f" {self.kwargs}\n\n")
         self._record_model_info(md_file)
-
-        alpha158_df = self.get_alpha_data().reset_index()
+        return save_dir
+
+    def _save_results(self, df_final, save_dir, latest_stock_list, dates=None):
+        """写出 df_final 中各日的 _ret / _filter_ret 结果 (CSV 与按日分区的 Parquet 打分库)，并把明细追加到 total.csv"""
+        # ret_alpha_features 关闭时只计算过滤所需的几列
+        columns = None if self.kwargs.get("ret_alpha_features", True) else FILTER_FEATURES
+        alpha158_df = self.get_alpha_data(columns=columns, dates=dates).reset_index()
+        # 使用模型权重(基于 rid_rank_icir 归一化得到的 self.rid_weight)一次性计算所有日期的加权平均分
+        score_groups = aggregate_scores(df_final).groupby('datetime')
         for date, group_df in df_final.groupby('datetime'):
             date_str = str(date.date())
-            # 使用模型权重(基于 rid_rank_icir 归一化得到的 self.rid_weight)计算加权平均分
-            group_df = group_df.copy()
-            ret_df = (
-                group_df.groupby('instrument')
-                .apply(
-                    lambda g: pd.Series(
-                        {
-                            "avg_score": (g['score'] * g['weight']).sum() / g['weight'].sum()
-                            if g['weight'].sum() != 0
-                            else g['score'].mean(),
-                            "pos_ratio": (g['score'] > 0).mean(),
-                        }
-                    )
-                )
-                .reset_index()
-            )
+            ret_df = score_groups.get_group(date).drop(columns='datetime').reset_index(drop=True)
 
             cols_to_restore = ['instrument', 'real_label', 'error', 'abs_error']
             existing_cols = [c for c in cols_to_restore if c in group_df.columns]
@@ -320,8 +512,15 @@ class ModelCLI:
             ret_df.to_csv(save_dir / f"{date_str}_ret.csv", index=True, encoding="utf-8-sig")
             ret_filter_df = ret_filter_df.reset_index(drop=True)
             ret_filter_df.to_csv(save_dir / f"{date_str}_filter_ret.csv", index=True, encoding="utf-8-sig")
+            if self.kwargs.get("score_store"):
+                write_scores(save_dir, "ret", date, ret_df)
+                write_scores(save_dir, "filter_ret", date, ret_filter_df)
+                write_scores(save_dir, "total", date, group_df)
 
-        df_final.to_csv(save_dir / "total.csv", index=True, encoding="utf-8-sig")
+        # 分块追加：不写行号 (每块都从 0 开始会重复)；utf-8-sig 只在文件开头写 BOM，追加时不会重复写入
+        total_csv = save_dir / "total.csv"
+        exists = total_csv.exists()
+        df_final.to_csv(total_csv, index=False, mode="a" if exists else "w", header=not exists, encoding="utf-8-sig")
 
     def filter_ret_df(self, df):
         # 稳健性过滤逻辑
@@ -334,14 +533,14 @@ class ModelCLI:
     def get_real_label(self, dates = None, instruments='csi300'):
         if dates is None:
             dates = self.kwargs['predict_dates'][0]
-        df = D.features(D.instruments(instruments), ['Ref($close, -2)/Ref($close, -1) - 1'], start_time=dates['start'], end_time=dates['end'], freq='day')
+        df = D.features(D.instruments(instruments), [REAL_LABEL_FIELD], start_time=dates['start'], end_time=dates['end'], freq='day')
         df.columns = ['real_label']
         return df
 
     def get_real_label_csi300(self, dates = None):
         if dates is None:
             dates = self.kwargs['predict_dates'][0]
-        df = D.features(['SH000300'], ['Ref($close, -2)/Ref($close, -1) - 1'], start_time=dates['start'], end_time=dates['end'], freq='day')
+        df = D.features(['SH000300'], [REAL_LABEL_FIELD], start_time=dates['start'], end_time=dates['end'], freq='day')
         df.columns = ['real_label']
         return df
 
@@ -349,33 +548,70 @@ class ModelCLI:
     def get_orignal_data(self, dates=None, instruments='csi300'):
         if dates is None:
             dates = self.kwargs['predict_dates'][0]
-        fields = [
-            '$close * $factor', 
-            '$open * $factor', 
-            '$high * $factor', 
-            '$low * $factor',
-        ]
-
         df = D.features(
             D.instruments(instruments),
-            fields,
+            list(ORIGINAL_FIELDS.values()),
             start_time=dates['start'],
             end_time=dates['end'],
             freq='day'
         )
-        df.columns = ['close', 'open', 'high', 'low']
+        df.columns = list(ORIGINAL_FIELDS)
         df = df.reset_index()
         # 检查返回结果是否为空，并提醒用户
         if df.empty:
             print(f"数据为空, 请检查参数: instruments={instruments}, dates={dates}")
         return df
 
-    def get_alpha_data(self, name="Alpha158"):
-        dates = self.kwargs['predict_dates'][0]
-        handler_kwargs = {"instruments": "csi300", "start_time": dates['start'], "end_time": dates['end'], "infer_processors": []}
+    def get_review_panel(self, dates=None, instruments='csi300'):
+        """
+        复盘用面板：一次 D.features 取出整个区间的 real_label 与复权价格 (与 get_real_label / get_orignal_data 同样的表达式)，
+        索引为 (datetime, instrument)，复盘各日直接切片
+        """
+        if dates is None:
+            dates = self.kwargs['predict_dates'][0]
+        df = D.features(
+            D.instruments(instruments),
+            [REAL_LABEL_FIELD, *ORIGINAL_FIELDS.values()],
+            start_time=dates['start'],
+            end_time=dates['end'],
+            freq='day'
+        )
+        df.columns = ['real_label', *ORIGINAL_FIELDS]
+        return df.swaplevel().sort_index()
+
+    def get_alpha_data(self, name="Alpha158", columns=None, dates=None):
+        """
+        预测区间 (默认 predict_dates 的第一个区间) 的原始 Alpha158/Alpha360 特征。
+        Alpha158 优先复用推理阶段已算好的特征；指定 columns 时只计算这几列的表达式，不再构建完整的 handler。
+        """
+        if dates is None:
+            dates = self.kwargs['predict_dates'][0]
+        if name == "Alpha158":
+            cached = self._alpha_features.get((pd.Timestamp(dates['start']), pd.Timestamp(dates['end'])))
+            if cached is not None:
+                logger.info("复用推理阶段计算的 Alpha158 特征")
+                return cached if columns is None else cached[columns]
+            if columns is not None:
+                return self._alpha158_columns(dates, columns)
+        handler_kwargs = {"instruments": ALPHA_INSTRUMENTS, "start_time": dates['start'], "end_time": dates['end'], "infer_processors": []}
         handler = Alpha158(**handler_kwargs) if name == "Alpha158" else Alpha360(**handler_kwargs)
         return handler.fetch(col_set="feature")
 
+    @staticmethod
+    def _alpha158_columns(dates, columns):
+        """只计算 Alpha158 中指定的几列，返回与 handler.fetch 相同的 (datetime, instrument) 索引"""
+        fields, names = Alpha158DL.get_feature_config()
+        expressions = dict(zip(names, fields))
+        df = D.features(
+            D.instruments(ALPHA_INSTRUMENTS),
+            [expressions[c] for c in columns],
+            start_time=dates['start'],
+            end_time=dates['end'],
+            freq='day',
+        )
+        df.columns = list(columns)
+        return df.swaplevel().sort_index()
+
     def review(self):
         """马后炮：复盘逻辑委托给 ModelReviewHelper"""
         self.reviewer.review()
@@ -383,6 +619,20 @@ class ModelCLI:
     def backtest(self):
         self.reviewer.backtest()
 
+    def serve(self):
+        """常驻打分服务：模型与最近 serve_days 个交易日的预测常驻内存，通过本地 HTTP 接口查询集成分数"""
+        from model_serve import serve as _serve
+        _serve(self, host=self.kwargs.get("serve_host"), port=self.kwargs.get("serve_port"), days=self.kwargs.get("serve_days"))
+
+    def serve_reload(self):
+        """通知运行中的打分服务重新加载模型与特征 (训练出新模型或数据更新后调用)"""
+        import json
+        from urllib.request import Request, urlopen
+        url = f"http://{self.kwargs.get('serve_host')}:{self.kwargs.get('serve_port')}/reload"
+        with urlopen(Request(url, method="POST")) as resp:
+            info = json.loads(resp.read())
+        logger.info(f"打分服务已重新加载: {info.get('models')} 个模型, {info.get('start')} ~ {info.get('end')}")
+
     def compress_mlruns(self):
         """调用独立的备份助手进行压缩"""
         _compress_mlruns(self.kwargs["provider_uri"])
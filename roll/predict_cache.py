@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+from loguru import logger
+
+from utils import calculate_file_sha256
+
+DEFAULT_CACHE_DIR = "~/.qlibAssistant/predict_cache/"
+DEFAULT_MAX_MB = 1024
+CACHE_SUFFIX = ".pkl"
+PARAMS_ARTIFACT = os.path.join("artifacts", "params.pkl")
+
+
+def model_hash(rec) -> Optional[str]:
+    """recorder 中 params.pkl 的内容哈希；模型不在本地文件存储中时返回 None (不缓存)"""
+    try:
+        path = os.path.join(rec.get_local_dir(), PARAMS_ARTIFACT)
+    except Exception:
+        return None
+    return calculate_file_sha256(path) if os.path.exists(path) else None
+
+
+def instruments_key(dataset_config: dict) -> str:
+    """推理 handler 的股票池 (字符串或列表) 的短哈希"""
+    handler = dataset_config["kwargs"]["handler"]
+    instruments = handler.get("kwargs", {}).get("instruments") if isinstance(handler, dict) else handler
+    text = json.dumps(instruments, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+class PredictionCache:
+    """
+    磁盘预测缓存：以 (数据版本, recorder id, params.pkl 哈希, 股票池, 日期) 为键，每个键一个 pickle 的预测 Series。
+    数据版本一般取 utils.data_fingerprint(provider_uri)；本地数据、模型文件或股票池变化后键随之变化，
+    旧条目不会再命中，由按大小的淘汰 (最久未使用优先) 逐步清理。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_mb: Optional[float] = None, data_version: str = ""):
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR).expanduser()
+        self.max_bytes = int(float(max_mb if max_mb is not None else DEFAULT_MAX_MB) * 1024 * 1024)
+        self.data_version = str(data_version).strip()
+
+    def _entry_dir(self, rid: str, m_hash: str, inst_key: str) -> Path:
+        return self.cache_dir / rid / f"{self.data_version}_{m_hash[:16]}_{inst_key}"
+
+    @staticmethod
+    def _date_file(entry_dir: Path, date) -> Path:
+        return entry_dir / f"{pd.Timestamp(date).date()}{CACHE_SUFFIX}"
+
+    def get(self, rid: str, m_hash: str, inst_key: str, dates: List) -> Dict[pd.Timestamp, pd.Series]:
+        """返回已缓存日期的预测 {date: Series}，命中的文件刷新访问时间"""
+        entry_dir = self._entry_dir(rid, m_hash, inst_key)
+        hits = {}
+        if not entry_dir.is_dir():
+            return hits
+        for date in dates:
+            path = self._date_file(entry_dir, date)
+            if not path.exists():
+                continue
+            try:
+                hits[pd.Timestamp(date)] = pd.read_pickle(path)
+                os.utime(path)
+            except Exception as e:
+                logger.warning(f"预测缓存读取失败，重新预测: {path} ({e})")
+        return hits
+
+    def put(self, rid: str, m_hash: str, inst_key: str, pred: pd.Series, dates: List):
+        """按日期拆分写入；dates 中没有预测结果的日期不写入 (可能是当日数据尚未就绪)，下次重新预测"""
+        entry_dir = self._entry_dir(rid, m_hash, inst_key)
+        pred_dates = pred.index.get_level_values("datetime")
+        for date in dates:
+            date = pd.Timestamp(date)
+            day_pred = pred[pred_dates == date]
+            if day_pred.empty:
+                continue
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            path = self._date_file(entry_dir, date)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            day_pred.to_pickle(tmp)
+            os.replace(tmp, path)
+
+    def _files(self) -> list:
+        return list(self.cache_dir.glob(f"*/*/*{CACHE_SUFFIX}")) if self.cache_dir.exists() else []
+
+    def size_bytes(self) -> int:
+        return sum(f.stat().st_size for f in self._files())
+
+    def evict(self) -> int:
+        """总大小超过上限时，按最近访问时间从旧到新删除，直到低于上限；返回删除的文件数"""
+        files = [(f, f.stat()) for f in self._files()]
+        total = sum(st.st_size for _, st in files)
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for f, st in sorted(files, key=lambda item: item[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= st.st_size
+            removed += 1
+        logger.info(f"预测缓存超过 {self.max_bytes / 1024 / 1024:.0f}MB，淘汰 {removed} 个条目")
+        return removed
+
+    def invalidate(self, rids: Optional[List[str]] = None) -> int:
+        """删除指定 recorder (默认全部) 的缓存，返回删除的文件数"""
+        if not self.cache_dir.exists():
+            return 0
+        targets = [self.cache_dir / rid for rid in rids] if rids else [d for d in self.cache_dir.iterdir() if d.is_dir()]
+        removed = 0
+        for target in targets:
+            if target.is_dir():
+                removed += len(list(target.glob(f"*/*{CACHE_SUFFIX}")))
+                shutil.rmtree(target, ignore_errors=True)
+        return removed
@@ -0,0 +1,43 @@
+import os
+import pickle
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+DEFAULT_CACHE_DIR = "~/.qlibAssistant/review_cache/"
+# 复盘指标或报告格式变化时递增，旧缓存全部失效
+REVIEW_CACHE_VERSION = 1
+
+
+class ReviewCache:
+    """
+    复盘结果缓存：每个结果目录 (selection_xxx) 一个 pickle，保存该目录复盘得到的两张结果表与 markdown 片段。
+    键由调用方给出 (输入文件哈希、所用交易日等)，与缓存中的键不一致时视为未命中并在重算后覆盖。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR).expanduser()
+
+    def _path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}.pkl"
+
+    def get(self, name: str, key: dict) -> Optional[dict]:
+        path = self._path(name)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"复盘缓存读取失败，重新复盘: {path} ({e})")
+            return None
+        return entry if entry.get("key") == key else None
+
+    def put(self, name: str, key: dict, entry: dict):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(name)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(dict(entry, key=key), f)
+        os.replace(tmp, path)
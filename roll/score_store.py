@@ -0,0 +1,119 @@
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 每次 selection 结果目录下的列式打分库:
+#   selection_YYYYMMDD_HH_MM_SS/store/<kind>/date=YYYY-MM-DD/part-0.parquet
+# kind: ret / filter_ret (与同名 CSV 内容一致) 以及 total (各模型逐条打分)
+STORE_DIR = "store"
+PART_FILE = "part-0.parquet"
+KINDS = ("ret", "filter_ret", "total")
+# 取值重复度高的字符串列按字典编码存储
+DICT_COLUMNS = ("instrument", "code", "name", "exp_name", "rid")
+_DATE_DIR = re.compile(r"date=(\d{4}-\d{2}-\d{2})$")
+
+
+def partition_path(run_dir: Union[str, Path], kind: str, date) -> Path:
+    return Path(run_dir) / STORE_DIR / kind / f"date={pd.Timestamp(date).date()}" / PART_FILE
+
+
+def _to_table(df: pd.DataFrame) -> pa.Table:
+    # 混合类型的 object 列 (如股票列表中数字与字符串并存) 统一按字符串存储
+    mixed = [c for c in df.columns if df[c].dtype == object and pd.api.types.infer_dtype(df[c], skipna=True) not in ("string", "empty")]
+    if mixed:
+        df = df.astype({c: "string" for c in mixed})
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for name in DICT_COLUMNS:
+        idx = table.schema.get_field_index(name)
+        if idx >= 0 and (pa.types.is_string(table.schema.field(idx).type) or pa.types.is_large_string(table.schema.field(idx).type)):
+            table = table.set_column(idx, name, table.column(name).dictionary_encode())
+    return table
+
+
+def write_scores(run_dir: Union[str, Path], kind: str, date, df: pd.DataFrame) -> Path:
+    """写入一次 selection 中某日某类结果 (整份覆盖该分区)"""
+    path = partition_path(run_dir, kind, date)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(_to_table(df), tmp)
+    tmp.replace(path)
+    return path
+
+
+def partition_columns(path: Union[str, Path]) -> List[str]:
+    """分区的列名 (只读文件元数据)"""
+    return pq.read_schema(path).names
+
+
+def read_partition(path: Union[str, Path], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """读取单个分区，只取需要的列"""
+    if columns is not None:
+        available = set(partition_columns(path))
+        columns = [c for c in columns if c in available]
+    df = pq.read_table(path, columns=columns).to_pandas()
+    # 字典编码只用于落盘，读出后还原为普通字符串列，map / merge 的行为与读 CSV 一致
+    for name in df.columns:
+        if isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = df[name].astype(df[name].cat.categories.dtype)
+    return df
+
+
+class ScoreStore:
+    """
+    按日期分区的打分库读取接口。root 可以是单次 selection 的结果目录，
+    也可以是包含多次结果的上级目录 (analysis_folder / qlib_score_csv)。
+    同一日期出现在多次结果中时，默认只取最新一次 (目录名中的时间戳最大)。
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root).expanduser()
+
+    def runs(self) -> List[Path]:
+        """含打分库的结果目录，按目录名 (时间戳) 升序"""
+        if (self.root / STORE_DIR).is_dir():
+            return [self.root]
+        if not self.root.is_dir():
+            return []
+        return sorted(d for d in self.root.iterdir() if (d / STORE_DIR).is_dir())
+
+    def partitions(self, kind: str = "ret", start=None, end=None, latest: bool = True) -> List[tuple]:
+        """[(date, run_dir, path)]，按 (date, run_dir) 升序"""
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        parts = []
+        for run in self.runs():
+            kind_dir = run / STORE_DIR / kind
+            if not kind_dir.is_dir():
+                continue
+            for date_dir in kind_dir.iterdir():
+                m = _DATE_DIR.match(date_dir.name)
+                if not m or not (date_dir / PART_FILE).exists():
+                    continue
+                date = pd.Timestamp(m.group(1))
+                if (start is not None and date < start) or (end is not None and date > end):
+                    continue
+                parts.append((date, run, date_dir / PART_FILE))
+        parts.sort(key=lambda p: (p[0], p[1].name))
+        if latest:
+            parts = list({date: (date, run, path) for date, run, path in parts}.values())
+        return parts
+
+    def dates(self, kind: str = "ret") -> List[pd.Timestamp]:
+        return [date for date, _, _ in self.partitions(kind)]
+
+    def columns(self, kind: str = "ret") -> List[str]:
+        """最新一个分区的列名"""
+        parts = self.partitions(kind)
+        return partition_columns(parts[-1][2]) if parts else []
+
+    def read(self, kind: str = "ret", start=None, end=None, columns: Optional[Sequence[str]] = None,
+             latest: bool = True) -> pd.DataFrame:
+        """读取日期区间 [start, end] 内的结果；columns 指定时只解码这些列"""
+        frames = [read_partition(path, columns) for _, _, path in self.partitions(kind, start, end, latest)]
+        if not frames:
+            return pd.DataFrame(columns=list(columns) if columns is not None else None)
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,202 @@
+import copy
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from qlib.data.dataset import Dataset
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.model.trainer import _log_task_info
+from qlib.utils import init_instance_by_config
+from qlib.workflow import R
+
+from train_profile import StageProfiler, generate_records
+
+# 支持 warm start 的模型：均使用库自带的 init_model 能力继续训练
+INCREMENTAL_MODELS = {"LGBModel", "XGBModel", "CatBoostModel"}
+
+# recorder tags
+TAG_TRAIN_MODE = "train_mode"
+TAG_BASE_RECORDER = "base_recorder"
+TAG_FULL_TRAIN_DATE = "full_train_date"
+
+# 同一窗口在相邻两天生成的训练区间长度可能差几天（月份天数不同），按此容差匹配
+WINDOW_TOLERANCE_DAYS = 7
+
+
+def _train_days(seg) -> int:
+    return (pd.Timestamp(seg[1]) - pd.Timestamp(seg[0])).days
+
+
+def _prepare_train(dataset):
+    df = dataset.prepare("train", col_set=["feature", "label"], data_key=DataHandlerLP.DK_L)
+    if df.empty:
+        return None, None
+    x, y = df["feature"], df["label"]
+    if y.values.ndim == 2 and y.values.shape[1] == 1:
+        return x, np.squeeze(y.values)
+    raise ValueError("增量训练不支持多标签")
+
+
+def warm_start(model, dataset, rounds=50, mode="boost"):
+    """
+    在已训练好的 qlib 模型上，用 dataset 的 train 段（只含新增行）继续训练。
+    mode="boost": 继续追加 rounds 棵树；mode="refit": 保持树结构，仅用新数据重估叶子值 (仅 LightGBM)
+    """
+    model_class = type(model).__name__
+    if model_class not in INCREMENTAL_MODELS:
+        raise ValueError(f"{model_class} 不支持增量训练")
+
+    x, y = _prepare_train(dataset)
+    if x is None:
+        # 新增区间内没有交易日（如周末），沿用上次的模型
+        logger.info("新增区间没有数据，沿用上次的模型")
+        return model
+
+    if model_class == "LGBModel":
+        import lightgbm as lgb
+
+        if mode == "refit":
+            model.model = model.model.refit(x.values, y)
+        else:
+            params = {k: v for k, v in model.params.items() if k not in ("early_stopping_rounds", "early_stopping_round")}
+            model.model = lgb.train(
+                params,
+                lgb.Dataset(x.values, label=y),
+                num_boost_round=rounds,
+                init_model=model.model,
+            )
+    elif model_class == "XGBModel":
+        import xgboost as xgb
+
+        model.model = xgb.train(
+            model._params,
+            dtrain=xgb.DMatrix(x.values, label=y),
+            num_boost_round=rounds,
+            xgb_model=model.model,
+        )
+    elif model_class == "CatBoostModel":
+        from catboost import CatBoost, Pool
+
+        params = dict(model._params)
+        params["iterations"] = rounds
+        params.pop("early_stopping_rounds", None)
+        new_model = CatBoost(params)
+        new_model.fit(Pool(data=x, label=y), init_model=model.model, verbose=False)
+        model.model = new_model
+    return model
+
+
+def find_base_recorder(exp, task, recorders: dict):
+    """
+    在实验的训练清单 recorders ({rid: entry}) 中找到与 task 模型相同、窗口长度一致、训练区间最新的已完成 recorder，
+    返回 (rec, train_seg)；只读清单，仅加载选中的那一个 recorder
+    """
+    target_days = _train_days(task["dataset"]["kwargs"]["segments"]["train"])
+    model_class = task["model"]["class"]
+    best = None
+    for rid, entry in recorders.items():
+        if not entry.get("complete") or "train" not in entry or entry.get("model", model_class) != model_class:
+            continue
+        seg = tuple(entry["train"])
+        if abs(_train_days(seg) - target_days) > WINDOW_TOLERANCE_DAYS:
+            continue
+        if best is None or seg[1] > best[1][1]:
+            best = (rid, seg)
+    if best is None:
+        return None
+    return exp.get_recorder(recorder_id=best[0]), best[1]
+
+
+def get_full_train_date(rec) -> str:
+    """该 recorder 所在增量链上最近一次全量训练的日期；全量训练的 recorder 取其结束时间"""
+    tags = rec.list_tags()
+    return tags.get(TAG_FULL_TRAIN_DATE) or rec.info["end_time"].split()[0]
+
+
+def plan_incremental(tasks, exp, manifest, full_every=7, today=None):
+    """
+    为每个待训练任务决定全量训练还是增量训练，基础模型从实验的训练清单 manifest 中查找。
+    增量任务会附带 task["incremental"] = {base_recorder, new_rows, full_train_date}，
+    由训练子进程据此加载上一次的模型，只在 new_rows 区间上继续训练。
+    """
+    today = pd.Timestamp(today or datetime.now().date())
+    recorders = manifest.load()
+    planned = []
+    for task in tasks:
+        model_class = task["model"]["class"]
+        train_seg = task["dataset"]["kwargs"]["segments"]["train"]
+        if model_class not in INCREMENTAL_MODELS:
+            logger.info(f"{model_class} 不支持增量训练，全量训练 {train_seg}")
+            planned.append(task)
+            continue
+
+        base = find_base_recorder(exp, task, recorders)
+        if base is None:
+            logger.info(f"没有可续训的历史模型，全量训练 {train_seg}")
+            planned.append(task)
+            continue
+
+        rec, base_seg = base
+        full_date = get_full_train_date(rec)
+        if (today - pd.Timestamp(full_date)).days >= full_every:
+            logger.info(f"距上次全量训练 ({full_date}) 已满 {full_every} 天，全量训练 {train_seg}")
+            planned.append(task)
+            continue
+
+        new_start = pd.Timestamp(base_seg[1]) + pd.Timedelta(days=1)
+        if new_start > pd.Timestamp(train_seg[1]):
+            logger.info(f"没有新增数据，全量训练 {train_seg}")
+            planned.append(task)
+            continue
+
+        new_task = copy.deepcopy(task)
+        new_task["incremental"] = {
+            "base_recorder": rec.id,
+            "new_rows": (new_start.strftime("%Y-%m-%d"), str(train_seg[1])),
+            "full_train_date": full_date,
+        }
+        logger.info(f"增量训练 {train_seg}: 基于 {rec.id}，新增区间 {new_task['incremental']['new_rows']}")
+        planned.append(new_task)
+    return planned
+
+
+def incremental_task_train(
+    task_config, experiment_name, recorder_name=None, exec_config=None, rounds=50, mode="boost", profiler=None
+):
+    """
+    与 qlib task_train 对应的增量版本：
+    recorder 中保存目标窗口的 task，模型从 base recorder 的 params.pkl 加载后只在新增行上继续训练，
+    预测 / 信号分析仍在 test 段上生成，并打上 train_mode=incremental 等 tag。
+    """
+    profiler = profiler or StageProfiler()
+    inc = task_config["incremental"]
+    exec_config = copy.deepcopy(exec_config or task_config)
+    exec_config["dataset"]["kwargs"]["segments"]["train"] = tuple(inc["new_rows"])
+
+    with R.start(experiment_name=experiment_name, recorder_name=recorder_name):
+        _log_task_info(task_config)
+        rec = R.get_recorder()
+
+        with profiler.span("load_model"):
+            base_rec = R.get_exp(experiment_name=experiment_name, create=False).get_recorder(
+                recorder_id=inc["base_recorder"]
+            )
+            model = base_rec.load_object("params.pkl")
+        with profiler.span("dataset"):
+            dataset = init_instance_by_config(exec_config["dataset"], accept_types=Dataset)
+        with profiler.span("warm_start"):
+            warm_start(model, dataset, rounds=rounds, mode=mode)
+
+        with profiler.span("save"):
+            R.save_objects(**{"params.pkl": model})
+            dataset.config(dump_all=False, recursive=True)
+            R.save_objects(**{"dataset": dataset})
+            R.set_tags(**{
+                TAG_TRAIN_MODE: "incremental",
+                TAG_BASE_RECORDER: inc["base_recorder"],
+                TAG_FULL_TRAIN_DATE: inc["full_train_date"],
+            })
+
+        generate_records(exec_config, rec, model, dataset, profiler)
+        return rec
@@ -0,0 +1,178 @@
+import copy
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import qlib
+from loguru import logger
+
+from train_resource import THREAD_KWARGS
+
+MANIFEST_NAME = "train_manifest.json"
+MANIFEST_VERSION = 4
+# 训练代码中影响模型结果的逻辑有变化时递增，让旧的 task 哈希失效
+TASK_CODE_VERSION = 1
+TASK_HASH_TAG = "task_hash"
+# 训练完成的 recorder 至少要有这些 artifacts
+REQUIRED_ARTIFACTS = ("params.pkl", "sig_analysis")
+
+
+def task_hash(task: dict) -> str:
+    """
+    task 的规范化内容哈希: 模型参数、handler 参数、segments、增量训练信息 (基础 recorder、新增区间) 以及代码 / qlib 版本。
+    增量训练出的模型取决于基础模型，与同区间的全量训练哈希不同，不会被当作重复任务跳过。
+    忽略按核数预算改写的线程数，它不改变训练出的模型。
+    """
+    payload = copy.deepcopy(task)
+    model_kwargs = payload.get("model", {}).get("kwargs", {})
+    for key in THREAD_KWARGS:
+        model_kwargs.pop(key, None)
+    payload["_code_version"] = TASK_CODE_VERSION
+    payload["_qlib_version"] = qlib.__version__
+    text = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def manifest_path(uri_folder, exp_id) -> Path:
+    """manifest 放在 mlflow 实验目录下: <uri_folder>/<exp_id>/train_manifest.json"""
+    return Path(uri_folder).expanduser() / str(exp_id) / MANIFEST_NAME
+
+
+def ic_stats(rec) -> list:
+    """由 sig_analysis 的 ic.pkl / ric.pkl 计算 [IC, ICIR, Rank IC, Rank ICIR]"""
+    ic_pkl = rec.load_object("sig_analysis/ic.pkl")
+    ric_pkl = rec.load_object("sig_analysis/ric.pkl")
+    ic, rank_ic = ic_pkl.mean(), ric_pkl.mean()
+    return [float(ic), float(ic / ic_pkl.std()), float(rank_ic), float(rank_ic / ric_pkl.std())]
+
+
+def _handler_class(task: dict) -> str:
+    handler = task["dataset"]["kwargs"]["handler"]
+    return handler.get("class") if isinstance(handler, dict) else str(handler)
+
+
+def recorder_entry(rec, task: dict = None, artifacts=None) -> dict:
+    """
+    从 recorder 提取清单条目: artifacts 是否完整、训练区间、task 哈希，
+    训练完成的还包括 IC 统计、模型 / 数据集类和训练起止时间 (供 ModelCLI 直接读取，不再反序列化 pickle)
+    """
+    if artifacts is None:
+        artifacts = rec.list_artifacts()
+    complete = bool(artifacts) and all(name in artifacts for name in REQUIRED_ARTIFACTS)
+    entry = {"complete": complete}
+    if complete or task is not None:
+        task = task if task is not None else rec.load_object("task")
+        entry["train"] = [str(t) for t in task["dataset"]["kwargs"]["segments"]["train"]]
+        entry["task_hash"] = task_hash(task)
+    if complete:
+        info = rec.info
+        entry["ic"] = ic_stats(rec)
+        entry["model"] = task["model"]["class"]
+        entry["dataset"] = _handler_class(task)
+        # 训练子进程里 recorder 刚结束，info 中还没有 end_time
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        entry["start_time"] = str(info.get("start_time") or now)
+        entry["end_time"] = str(info.get("end_time") or now)
+    return entry
+
+
+class TrainManifest:
+    """
+    每个实验一份的训练清单 {rid: {complete, train, task_hash, ic, model, dataset, start_time, end_time}}。
+    断点续训和 ModelCLI 只读这一个小文件，不再逐个 recorder 列 artifacts、反序列化 task / sig_analysis。
+    写入时加文件锁并先写临时文件再 rename，并行训练子进程同时更新也不会损坏。
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def exists(self) -> bool:
+        """清单存在且版本与当前代码一致（版本不一致时需要重新补建）"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("version") == MANIFEST_VERSION
+        except (OSError, ValueError):
+            return False
+
+    def load(self) -> dict:
+        """读取 {rid: entry}，文件不存在或损坏时返回空字典"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"训练清单读取失败，将重新扫描: {self.path} {e}")
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+        return data.get("recorders", {})
+
+    @contextmanager
+    def _locked(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(f"{self.path.name}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write(self, recorders: dict):
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "recorders": recorders}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def update(self, entries: dict):
+        """合并写入若干条目 {rid: entry}"""
+        with self._locked():
+            recorders = self.load()
+            recorders.update(entries)
+            self._write(recorders)
+
+    def remove(self, rids):
+        with self._locked():
+            recorders = self.load()
+            for rid in rids:
+                recorders.pop(rid, None)
+            self._write(recorders)
+
+    def trained_segments(self) -> list:
+        """已训练完成的训练区间列表 [(start, end), ...]"""
+        return [tuple(e["train"]) for e in self.load().values() if e.get("complete") and "train" in e]
+
+
+def find_trained_hashes(uri_folder) -> dict:
+    """汇总 uri_folder 下所有实验清单中已训练完成的 {task_hash: (exp_id, rid)}"""
+    hashes = {}
+    for path in Path(uri_folder).expanduser().glob(f"*/{MANIFEST_NAME}"):
+        for rid, entry in TrainManifest(path).load().items():
+            if entry.get("complete") and entry.get("task_hash"):
+                hashes.setdefault(entry["task_hash"], (path.parent.name, rid))
+    return hashes
+
+
+def build_manifest(exp, manifest: TrainManifest) -> TrainManifest:
+    """老实验没有清单时扫描一次所有 recorder 补建"""
+    entries = {}
+    for rid in exp.list_recorders():
+        entries[rid] = recorder_entry(exp.get_recorder(recorder_id=rid))
+    manifest.update(entries)
+    logger.info(f"补建训练清单: {manifest.path} ({len(entries)} 个 recorder)")
+    return manifest
+
+
+def backfill_manifests(uri_folder, exps) -> int:
+    """为 uri_folder 下还没有 (或版本过旧) 训练清单的实验各补建一次，供跨实验查重；返回补建的实验数"""
+    built = 0
+    for exp in exps:
+        manifest = TrainManifest(manifest_path(uri_folder, exp.id))
+        if not manifest.exists():
+            build_manifest(exp, manifest)
+            built += 1
+    return built
@@ -0,0 +1,184 @@
+import copy
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from loguru import logger
+from qlib.data.dataset import Dataset
+from qlib.data.dataset.handler import DataHandler
+from qlib.model.base import Model
+from qlib.utils import auto_filter_kwargs, fill_placeholder, init_instance_by_config
+from qlib.workflow import R
+from tabulate import tabulate
+
+DEFAULT_PROFILE_DIR = "~/.qlibAssistant/train_profile/"
+PROFILE_SUFFIX = ".jsonl"
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存 (MB)；ru_maxrss 在 Linux 上是 KB，在 macOS 上是字节"""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return maxrss / 1024 / 1024
+    return maxrss / 1024
+
+
+class StageProfiler:
+    """
+    记录训练子进程各阶段的 wall 时间、CPU 时间与结束时的峰值 RSS。
+    用法: with profiler.span("fit"): model.fit(...)
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def span(self, stage: str):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.spans.append({
+                "stage": stage,
+                "wall": round(time.perf_counter() - wall_start, 3),
+                "cpu": round(time.process_time() - cpu_start, 3),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+            })
+
+    def dump(self, path, **info):
+        """把本任务的各阶段耗时作为一行 JSON 追加到 path（单次 write，多进程追加互不穿插）"""
+        record = dict(info, pid=os.getpid(), stages=self.spans, peak_rss_mb=round(peak_rss_mb(), 1))
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+
+def _record_stage(record) -> str:
+    cls = record.get("class", "record") if isinstance(record, dict) else type(record).__name__
+    return f"record:{cls}"
+
+
+def generate_records(task_config, rec, model, dataset, profiler=None):
+    """生成 task 中的 records (预测 / 信号分析等)，与 qlib _exe_task 的 record 部分一致，每个 record 一个阶段"""
+    profiler = profiler or StageProfiler()
+    records = fill_placeholder(task_config, {"<MODEL>": model, "<DATASET>": dataset}).get("record", [])
+    if isinstance(records, dict):
+        records = [records]
+    for record in records:
+        with profiler.span(_record_stage(record)):
+            r = init_instance_by_config(
+                record,
+                recorder=rec,
+                default_module="qlib.workflow.record_temp",
+                try_kwargs={"model": model, "dataset": dataset},
+            )
+            r.generate()
+
+
+def exe_task_staged(task_config, profiler=None):
+    """
+    qlib _exe_task 的分阶段版本：handler 加载/计算、dataset 组装、fit、保存、各 record 分别计时。
+    handler 先单独实例化再交给 DatasetH，这样特征计算（或读特征缓存）与 fit 的耗时能分开统计。
+    """
+    profiler = profiler or StageProfiler()
+    rec = R.get_recorder()
+    with profiler.span("model_init"):
+        model = init_instance_by_config(task_config["model"], accept_types=Model)
+    with profiler.span("handler"):
+        dataset_config = copy.copy(task_config["dataset"])
+        dataset_config["kwargs"] = dict(dataset_config["kwargs"])
+        dataset_config["kwargs"]["handler"] = init_instance_by_config(
+            dataset_config["kwargs"]["handler"], accept_types=DataHandler
+        )
+    with profiler.span("dataset"):
+        dataset = init_instance_by_config(dataset_config, accept_types=Dataset)
+    with profiler.span("fit"):
+        auto_filter_kwargs(model.fit)(dataset, reweighter=task_config.get("reweighter", None))
+    with profiler.span("save"):
+        R.save_objects(**{"params.pkl": model})
+        # 保存的 dataset 用于线上推理，不保存具体数据
+        dataset.config(dump_all=False, recursive=True)
+        R.save_objects(**{"dataset": dataset})
+    generate_records(task_config, rec, model, dataset, profiler)
+    return rec
+
+
+def new_profile_path(profile_dir=None) -> Path:
+    """每次训练运行一个 JSONL 文件，文件名按时间排序"""
+    name = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}{PROFILE_SUFFIX}"
+    return Path(profile_dir or DEFAULT_PROFILE_DIR).expanduser() / name
+
+
+def load_profile(path) -> list:
+    path = Path(path)
+    if not path.exists():
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def previous_profile_path(path):
+    """同目录下 path 之前最近的一次运行记录"""
+    path = Path(path)
+    earlier = sorted(p for p in path.parent.glob(f"*{PROFILE_SUFFIX}") if p.name < path.name)
+    return earlier[-1] if earlier else None
+
+
+def stage_stats(records: list) -> dict:
+    """按阶段汇总: {stage: {tasks, wall, cpu, mean_wall, peak_rss_mb}}，阶段顺序按首次出现"""
+    stats = {}
+    for record in records:
+        for span in record.get("stages", []):
+            item = stats.setdefault(span["stage"], {"tasks": 0, "wall": 0.0, "cpu": 0.0, "peak_rss_mb": 0.0})
+            item["tasks"] += 1
+            item["wall"] += span["wall"]
+            item["cpu"] += span["cpu"]
+            item["peak_rss_mb"] = max(item["peak_rss_mb"], span["peak_rss_mb"])
+    for item in stats.values():
+        item["mean_wall"] = item["wall"] / item["tasks"]
+    return stats
+
+
+def summarize_profile(path):
+    """打印本次运行各阶段耗时 / 峰值内存，并与上一次运行的每任务平均耗时对比"""
+    records = load_profile(path)
+    if not records:
+        return
+    stats = stage_stats(records)
+    prev_path = previous_profile_path(path)
+    prev_stats = stage_stats(load_profile(prev_path)) if prev_path else {}
+
+    rows = []
+    for stage, item in stats.items():
+        prev = prev_stats.get(stage)
+        change = f"{(item['mean_wall'] / prev['mean_wall'] - 1) * 100:+.0f}%" if prev and prev["mean_wall"] > 0 else "-"
+        rows.append([
+            stage,
+            item["tasks"],
+            f"{item['wall']:.1f}",
+            f"{item['cpu']:.1f}",
+            f"{item['mean_wall']:.2f}",
+            change,
+            f"{item['peak_rss_mb']:.0f}",
+        ])
+    print(tabulate(
+        rows,
+        headers=["阶段", "任务数", "wall(s)", "cpu(s)", "平均wall(s)", "较上次", "峰值RSS(MB)"],
+        tablefmt="github",
+    ))
+    logger.info(f"训练各阶段耗时记录: {path}" + (f" (对比 {prev_path.name})" if prev_path else ""))
@@ -0,0 +1,44 @@
+import copy
+import os
+from typing import Optional
+
+from loguru import logger
+
+# 各模型控制线程数的参数名: LightGBM / DoubleEnsemble 用 num_threads，XGBoost 用 nthread，CatBoost 用 thread_count
+THREAD_KWARGS = ("num_threads", "nthread", "thread_count")
+
+
+def get_core_budget(core_budget: Optional[int] = None) -> int:
+    """整机可用于训练的核数，未配置时取本机 CPU 核数"""
+    if core_budget:
+        return max(1, int(core_budget))
+    return os.cpu_count() or 1
+
+
+def threads_per_fit(core_budget: int, concurrency: int) -> int:
+    """把核数预算平均分给同时运行的 concurrency 个训练，每个至少 1 线程"""
+    return max(1, int(core_budget) // max(1, int(concurrency)))
+
+
+def apply_thread_budget(task: dict, n_threads: int) -> dict:
+    """
+    按分配的线程数改写 task 中模型的线程参数，返回新的 task（不修改原始配置）。
+    没有线程参数的模型（如 Linear）原样返回。
+    """
+    model_kwargs = task.get("model", {}).get("kwargs", {})
+    keys = [k for k in THREAD_KWARGS if k in model_kwargs]
+    if not keys:
+        return task
+
+    new_task = copy.deepcopy(task)
+    for k in keys:
+        new_task["model"]["kwargs"][k] = n_threads
+    return new_task
+
+
+def allocate_threads(tasks: list, concurrency: int, core_budget: Optional[int] = None) -> list:
+    """对一批将要并发执行的任务统一分配线程数"""
+    budget = get_core_budget(core_budget)
+    n_threads = threads_per_fit(budget, concurrency)
+    logger.info(f"核数预算 {budget}, 并发训练数 {concurrency}, 每个训练分配 {n_threads} 线程")
+    return [apply_thread_budget(task, n_threads) for task in tasks]
@@ -9,62 +9,217 @@ from qlib.workflow.task.gen import RollingGen, task_generator
 from qlib.workflow.task.manage import TaskManager, run_task
 from qlib.workflow.task.collect import RecorderCollector
 from qlib.model.ens.group import RollingGroup
-from qlib.model.trainer import TrainerR, TrainerRM, task_train
+from qlib.model.trainer import TrainerR, TrainerRM, task_train, _log_task_info
 from pathlib import Path
 from myconfig import get_my_config
 import os
 from pprint import pprint
 from datetime import datetime
 import gc
+import itertools
+import time
 import multiprocessing
+from multiprocessing.connection import wait as mp_wait
 from tqdm import tqdm
 from functools import partialmethod
-from utils import generate_qlib_segments, get_mlruns_dates, get_local_data_date
+from dataclasses import dataclass
+from typing import Optional
+from tabulate import tabulate
+from utils import data_fingerprint, generate_qlib_segments, get_mlruns_dates, get_local_data_date
+from train_resource import allocate_threads
+from feature_cache import FeatureCache, panel_handler, widest_panel
+from train_incremental import incremental_task_train, plan_incremental
+from train_profile import StageProfiler, exe_task_staged, new_profile_path, summarize_profile
+from train_manifest import (
+    TASK_HASH_TAG,
+    TrainManifest,
+    backfill_manifests,
+    build_manifest,
+    find_trained_hashes,
+    manifest_path,
+    recorder_entry,
+    task_hash,
+)
 
 tqdm.__init__ = partialmethod(tqdm.__init__, disable=True)
 
 from qlib.workflow.task.gen import handler_mod as default_handler_mod
 
 
-def _train_worker(task, exp_name, region=REG_CN, **kwargs):
+# forkserver 模式下模板进程预先导入的模块：
+# 训练子进程从这个已完成 qlib / numpy / pandas / 各模型库导入的进程 fork 出来，省去每次冷启动导入。
+# 模板进程本身从不训练，子进程仍是一任务一进程、结束即释放内存。
+FORKSERVER_PRELOAD = [
+    "traincli",
+    "qlib.contrib.data.handler",
+    "qlib.contrib.model.gbdt",
+    "qlib.contrib.model.xgboost",
+    "qlib.contrib.model.linear",
+    "qlib.contrib.model.double_ensemble",
+    "qlib.contrib.model.catboost_model",
+    "qlib.workflow.record_temp",
+]
+
+
+def resolve_start_method(start_method=None):
+    """
+    确定训练子进程的启动方式: spawn (默认) 或 forkserver。
+    forkserver 不可用的平台退回 spawn；fork 对 qlib / numpy 不安全，不支持。
+    """
+    method = start_method or "spawn"
+    if method not in ("spawn", "forkserver") or method not in multiprocessing.get_all_start_methods():
+        logger.warning(f"不支持的子进程启动方式 {method}，改用 spawn")
+        method = "spawn"
+    if method == "forkserver":
+        multiprocessing.set_forkserver_preload(FORKSERVER_PRELOAD)
+    return method
+
+
+@dataclass
+class TrainResult:
+    """单个训练任务的结果：子进程退出代码与耗时"""
+    exitcode: Optional[int]
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.exitcode == 0
+
+
+def _init_worker_qlib(region, **kwargs):
+    """子进程重新初始化 qlib（spawn 出来的进程不继承主进程的 qlib 配置）"""
+    uri_folder = kwargs["uri_folder"]
+    provider_uri = kwargs["provider_uri"]
+    exp_manager = C["exp_manager"]
+    exp_manager["kwargs"]["uri"] = "file:" + str(Path(uri_folder).expanduser())
+    logger.info(f"Experiment uri: {exp_manager['kwargs']['uri']}")
+    qlib.init(provider_uri=provider_uri, region=region, exp_manager=exp_manager)
+
+
+def get_feature_cache(**kwargs):
+    """配置开启 feature_cache 时返回 FeatureCache，否则返回 None"""
+    if not kwargs.get("feature_cache"):
+        return None
+    # 与预测缓存使用同一数据指纹：历史数据被修正 (最新交易日不变) 时旧特征也会失效
+    return FeatureCache(kwargs.get("feature_cache_dir"), data_version=data_fingerprint(kwargs["provider_uri"]))
+
+
+def cached_task_train(task_config, experiment_name, recorder_name=None, exec_config=None, profiler=None):
+    """
+    与 qlib 的 task_train 相同，区别是 recorder 里保存原始 task，
+    实际训练使用 exec_config（handler 已替换为特征缓存文件）。
+    这样后续的断点续训 / 预测仍然拿到完整的 handler 配置。
+    各阶段耗时记录在 profiler 中。
+    """
+    with R.start(experiment_name=experiment_name, recorder_name=recorder_name):
+        _log_task_info(task_config)
+        exe_task_staged(exec_config or task_config, profiler)
+        return R.get_recorder()
+
+
+def _dump_profile(profiler, task, exp_name, status, seconds, **kwargs):
+    """把子进程各阶段耗时追加到本次运行的 JSONL（profile_file 由主进程在调度前生成）"""
+    profile_file = kwargs.get("profile_file")
+    if not profile_file:
+        return
+    try:
+        profiler.dump(
+            profile_file,
+            exp_name=exp_name,
+            model=task["model"]["class"],
+            train=task["dataset"]["kwargs"]["segments"]["train"],
+            incremental="incremental" in task,
+            status=status,
+            seconds=round(seconds, 3),
+        )
+    except OSError as e:
+        logger.warning(f"写入训练耗时记录失败: {e}")
+
+
+def _train_worker(task, exp_name, region=REG_CN, panel=None, **kwargs):
     """
     这是子进程实际执行的函数。
+    panel: start_custom 各窗口共享的特征面板区间，只作用于实际训练的 exec_task，recorder 中保存原始 task。
     """
+    start = time.time()
+    profiler = StageProfiler()
     try:
         # 每个子进程重新初始化
-        uri_folder = kwargs["uri_folder"]
-        provider_uri = kwargs["provider_uri"]
-        exp_manager = C["exp_manager"]
-        exp_manager["kwargs"]["uri"] = "file:" + str(Path(uri_folder).expanduser())
-        logger.info(f"Experiment uri: {exp_manager['kwargs']['uri']}")
-        qlib.init(provider_uri=provider_uri, region=region, exp_manager=exp_manager)
+        with profiler.span("init"):
+            _init_worker_qlib(region, **kwargs)
 
         # 打印 PID 方便观察
         logger.info(f"🔵 [子进程 PID: {os.getpid()}] 开始训练...", flush=True)
 
         # 实例化 Trainer 并开始训练
         trainer = TrainerR(experiment_name=exp_name)
-        trainer.train(task)
-
+        cache = get_feature_cache(**kwargs)
+        exec_task = cache.cached_task(task, panel) if cache else task
+        if "incremental" in task:
+            recs = trainer.train(
+                task,
+                train_func=incremental_task_train,
+                exec_config=exec_task,
+                rounds=int(kwargs.get("incremental_rounds") or 50),
+                mode=kwargs.get("incremental_mode") or "boost",
+                profiler=profiler,
+            )
+        else:
+            if exec_task is not task:
+                logger.info(f"使用特征缓存: {exec_task['dataset']['kwargs']['handler']}")
+            recs = trainer.train(task, train_func=cached_task_train, exec_config=exec_task, profiler=profiler)
+
+        # 训练完成后登记到实验的训练清单，供断点续训快速判断
+        with profiler.span("manifest"):
+            for rec in recs:
+                entry = recorder_entry(rec, task)
+                rec.set_tags(**{TASK_HASH_TAG: entry["task_hash"]})
+                manifest = TrainManifest(manifest_path(kwargs["uri_folder"], rec.experiment_id))
+                manifest.update({rec.id: entry})
+
+        _dump_profile(profiler, task, exp_name, "ok", time.time() - start, **kwargs)
         logger.info(f"🟢 [子进程 PID: {os.getpid()}] 训练完成，准备释放内存。", flush=True)
         os._exit(0)  # 确保子进程正常退出，exitcode 0
     except Exception as e:
         # 捕获异常打印出来，并再次抛出以确保 exitcode 非 0
+        _dump_profile(profiler, task, exp_name, "failed", time.time() - start, **kwargs)
         logger.info(f"🔴 [子进程 PID: {os.getpid()}] 训练出错: {e}", flush=True)
         raise e
 
-def run_train_blocking(task, exp_name, region, **kwargs):
+
+def _feature_cache_worker(handler_config, region=REG_CN, **kwargs):
+    """子进程中构建特征缓存，构建完即退出，主进程内存不受影响"""
+    try:
+        _init_worker_qlib(region, **kwargs)
+        get_feature_cache(**kwargs).build(handler_config)
+        os._exit(0)
+    except Exception as e:
+        logger.info(f"🔴 [子进程 PID: {os.getpid()}] 特征缓存构建出错: {e}", flush=True)
+        raise e
+
+
+def run_feature_cache_blocking(handler_config, region, **kwargs):
+    """在子进程中构建一份特征缓存并阻塞等待，返回是否成功"""
+    ctx = multiprocessing.get_context(resolve_start_method(kwargs.get("worker_start_method")))
+    p = ctx.Process(target=_feature_cache_worker, args=(handler_config, region), kwargs=kwargs)
+    p.start()
+    p.join()
+    logger.info(f"特征缓存子进程 PID: {p.pid} 已结束，退出代码: {p.exitcode}")
+    return p.exitcode == 0
+
+def run_train_blocking(task, exp_name, region, panel=None, **kwargs):
     """
     主进程调用的函数。
     功能：启动子进程 -> 阻塞等待 -> 返回结果
     """
     # "spawn" 在 mac / linux 都能用
     # "fork" 在 mac 上不安全（尤其涉及 qlib / numpy / torch）
-    multiprocessing.set_start_method("spawn", force=True)
+    # "forkserver" 从预加载好的模板进程 fork，启动更快（见 FORKSERVER_PRELOAD）
+    multiprocessing.set_start_method(resolve_start_method(kwargs.get("worker_start_method")), force=True)
     # 1. 创建子进程，目标是上面的 _train_worker 函数
     p = multiprocessing.Process(
         target=_train_worker,
-        args=(task, exp_name, region),
+        args=(task, exp_name, region, panel),
         kwargs=kwargs   # ✅ 正确传递
     )
     # 2. 启动子进程
@@ -83,6 +238,46 @@ def run_train_blocking(task, exp_name, region, **kwargs):
         return False # 失败
 
 
+def run_train_parallel(jobs, region=REG_CN, max_workers=1, panels=None, **kwargs):
+    """
+    有界进程池调度：同时最多保持 max_workers 个 _train_worker 子进程在跑。
+    jobs: [(task, exp_name), ...]；panels: 与 jobs 一一对应的共享特征面板区间 (可为 None)
+    返回: 与 jobs 一一对应的 TrainResult 列表
+
+    依旧是一任务一进程（任务结束即释放内存），只是不再逐个 join。
+    实验必须在主进程里提前创建好，子进程只会在各自的 recorder 目录下写文件，
+    不会并发改写同一个 experiment 的 meta.yaml。
+    """
+    ctx = multiprocessing.get_context(resolve_start_method(kwargs.get("worker_start_method")))
+    max_workers = max(1, int(max_workers))
+    pending = list(enumerate(jobs))
+    running = {}
+    results = [None] * len(jobs)
+    panels = panels or [None] * len(jobs)
+
+    while pending or running:
+        # 1. 补满空闲槽位
+        while pending and len(running) < max_workers:
+            idx, (task, exp_name) = pending.pop(0)
+            p = ctx.Process(
+                target=_train_worker,
+                args=(task, exp_name, region, panels[idx]),
+                kwargs=kwargs,
+            )
+            p.start()
+            running[p.sentinel] = (idx, p, time.time())
+            logger.info(f"任务 {idx + 1}/{len(jobs)} 已启动，子进程 PID: {p.pid}")
+
+        # 2. 等任意一个子进程结束，立刻回收槽位
+        for sentinel in mp_wait(list(running)):
+            idx, p, start = running.pop(sentinel)
+            p.join()
+            results[idx] = TrainResult(p.exitcode, time.time() - start)
+            logger.info(f"任务 {idx + 1}/{len(jobs)} 子进程 PID: {p.pid} 已结束，退出代码: {p.exitcode}")
+
+    return results
+
+
 def my_enhanced_handler_mod(task, rg):
     # 1. 先调用官方自带的逻辑，帮你处理 end_time 不够长的问题
     default_handler_mod(task, rg)
@@ -98,6 +293,13 @@ def my_enhanced_handler_mod(task, rg):
     h_kwargs["fit_start_time"] = train_start
     h_kwargs["fit_end_time"] = train_end
 
+def _as_list(value):
+    """CLI 参数统一转成列表：支持列表/元组或逗号分隔字符串"""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+
 class TrainCLI:
     """
     [子模块] 训练引擎: 负责滚动训练 (Rolling)
@@ -123,6 +325,7 @@ class TrainCLI:
         self.task_config = get_my_config(model_name, dataset_name, stock_pool)
         rolling_type = kwargs["rolling_type"]
         self.rolling_gen = RollingGen(step=step, rtype=rolling_type, ds_extra_mod_func=my_enhanced_handler_mod)
+        self._manifests_backfilled = False
 
     def start(self):
         """开始自动滚动训练"""
@@ -139,9 +342,18 @@ class TrainCLI:
         pprint(tasks)
         return tasks
 
-    def task_training(self, tasks):
+    def task_training(self, tasks, panel=None):
         print("========== task_training ==========")
-        task = tasks[0]
+        exp_name = self._get_exp_name(tasks[0], self.kwargs["rolling_type"])
+        pending_tasks = self._pending_tasks(tasks, exp_name)
+        pending_tasks = self._plan_incremental(pending_tasks, exp_name)
+
+        results = self._dispatch([(task, exp_name) for task in pending_tasks], [panel] * len(pending_tasks))
+        self._log_task_status(pending_tasks, results)
+        self._summarize_profile()
+
+    def _get_exp_name(self, task, rolling_type):
+        """根据任务生成实验名；同名(忽略时间后缀)实验已存在时沿用，实现断点续训"""
         model_class = task["model"]["class"]
         data_set = task["dataset"]["kwargs"]["handler"]["class"]
 
@@ -152,14 +364,12 @@ class TrainCLI:
         sfx_name = self.kwargs['sfx_name']
         stock_pool =  task["dataset"]['kwargs']['handler']['kwargs']['instruments']
         step = self.step
-        rolling_type = self.kwargs["rolling_type"]
         if rolling_type == "custom":
             step = "0"
 
         exp_name = f"{pfx_name}_{model_class}_{data_set}_{stock_pool}_{rolling_type}_step{step}_{sfx_name}_{time_str}"
         print(f"Experiment name: {exp_name}")
 
-
         ## 断点续训功能
         exps = R.list_experiments()
         for name in exps:
@@ -167,45 +377,257 @@ class TrainCLI:
                 exp_name = name
 
         logger.info(f"Using experiment name: {exp_name}")
+        return exp_name
+
+    def _pending_tasks(self, tasks, exp_name):
+        """过滤掉实验中已训练完成的时间段，返回仍需训练的任务"""
         self.trainer = TrainerR(experiment_name=exp_name)
 
+        # 在主进程中创建实验，避免并行子进程同时创建同名 experiment
         exp = R.get_exp(experiment_name=exp_name)
-        exp_train_time_segs_list = []
-        for rid in exp.list_recorders():
-            rec = exp.get_recorder(recorder_id=rid)
-            if not rec.list_artifacts():
-                continue
-            lista = rec.list_artifacts()
-            if "params.pkl" not in lista or "sig_analysis" not in lista:
-                continue
-
-            task = rec.load_object("task")
-            train_time_seg = task["dataset"]["kwargs"]["segments"]["train"]
-            exp_train_time_segs_list.append(train_time_seg)
+        # 断点续训只读实验的训练清单；老实验没有清单时扫描一次补建
+        manifest = TrainManifest(manifest_path(self.kwargs["uri_folder"], exp.id))
+        if not manifest.exists():
+            build_manifest(exp, manifest)
+        exp_train_time_segs_list = manifest.trained_segments()
 
         print(f"Already trained time segments in experiment: {len(exp_train_time_segs_list)}")
 
+        # 内容完全相同的任务在其它实验 (不同 pfx_name / sfx_name / 时间后缀) 训练过也直接跳过
+        trained_hashes = {}
+        if self.kwargs.get("dedup_tasks"):
+            self._backfill_manifests()
+            trained_hashes = find_trained_hashes(self.kwargs["uri_folder"])
+
+        pending_tasks = []
         for idx, task in enumerate(tasks):
-            logger.info(f"----- Training task {idx + 1}/{len(tasks)} -----")
             train_time_seg = task["dataset"]["kwargs"]["segments"]["train"]
             print(f"Train time segment: {train_time_seg}")
 
-            if train_time_seg in exp_train_time_segs_list:
+            if tuple(str(t) for t in train_time_seg) in exp_train_time_segs_list:
                 logger.info(f"Skipping training for segment {train_time_seg} as it already exists in the experiment.")
                 continue
-
-            run_train_blocking(task, exp_name, self.region, **self.kwargs)
+            found = trained_hashes.get(task_hash(task))
+            if found:
+                logger.info(f"Skipping training for segment {train_time_seg}: identical task trained in experiment {found[0]} recorder {found[1]}.")
+                continue
+            pending_tasks.append(task)
+        return pending_tasks
+
+    def _backfill_manifests(self):
+        """跨实验查重前，为 uri_folder 下所有还没有训练清单的老实验补建一次 (每个 TrainCLI 实例只扫描一次)"""
+        if self._manifests_backfilled:
+            return
+        built = backfill_manifests(self.kwargs["uri_folder"], R.list_experiments().values())
+        if built:
+            logger.info(f"为 {built} 个实验补建训练清单")
+        self._manifests_backfilled = True
+
+    @staticmethod
+    def _dedup_jobs(tasks, seen):
+        """同一批调度中内容相同 (task 哈希相同) 的任务只训练一次；seen 为已加入调度的哈希集合"""
+        unique = []
+        for task in tasks:
+            h = task_hash(task)
+            if h in seen:
+                logger.info(f"Skipping duplicate task in this batch: train={task['dataset']['kwargs']['segments']['train']}")
+                continue
+            seen.add(h)
+            unique.append(task)
+        return unique
+
+    def _plan_incremental(self, tasks, exp_name):
+        """开启 incremental 时，为可续训的任务挂上增量信息，其余任务照常全量训练"""
+        if not self.kwargs.get("incremental") or not tasks:
+            return tasks
+        full_every = int(self.kwargs.get("incremental_full_every") or 7)
+        exp = R.get_exp(experiment_name=exp_name)
+        manifest = TrainManifest(manifest_path(self.kwargs["uri_folder"], exp.id))
+        return plan_incremental(tasks, exp, manifest, full_every=full_every)
+
+    def _dispatch(self, jobs, panels=None):
+        """
+        执行一批训练任务 jobs: [(task, exp_name), ...]，返回对应的 TrainResult 列表。
+        panels 为与 jobs 一一对应的共享特征面板区间 (见 _shared_panel)，缺省不共享。
+        train_workers 为 1 时逐个阻塞训练，否则交给有界进程池并行调度。
+        """
+        panels = panels or [None] * len(jobs)
+        self._prepare_feature_cache([task for task, _ in jobs], panels)
+        # 本次运行的各阶段耗时记录文件，训练子进程各追加一行
+        self.kwargs["profile_file"] = str(new_profile_path(self.kwargs.get("profile_dir")))
+
+        train_workers = int(self.kwargs.get("train_workers") or 1)
+        # 按同时运行的训练数切分核数预算，改写各模型的线程参数；任务数少于 train_workers 时按任务数切分
+        concurrent_fits = max(1, min(train_workers, len(jobs))) * int(self.kwargs.get("concurrent_runs") or 1)
+        tasks = allocate_threads([task for task, _ in jobs], concurrent_fits, self.kwargs.get("core_budget"))
+        jobs = [(task, exp_name) for task, (_, exp_name) in zip(tasks, jobs)]
+
+        if train_workers > 1:
+            logger.info(f"并行训练 {len(jobs)} 个任务, train_workers={train_workers}")
+            return run_train_parallel(jobs, self.region, max_workers=train_workers, panels=panels, **self.kwargs)
+
+        results = []
+        for idx, ((task, exp_name), panel) in enumerate(zip(jobs, panels)):
+            logger.info(f"----- Training task {idx + 1}/{len(jobs)} -----")
+            start = time.time()
+            ok = run_train_blocking(task, exp_name, self.region, panel=panel, **self.kwargs)
+            results.append(TrainResult(0 if ok else 1, time.time() - start))
             gc.collect()
+        return results
+
+    def batch(self, model_names=None, dataset_names=None, stock_pools=None, rolling_types=None):
+        """
+        进程内批量训练：qlib 初始化、配置解析、路径修复都只做一次，
+        所有 model/dataset/pool/rolling 组合的任务统一交给训练进程池，最后打印每个组合的耗时表。
+        参数可传列表或逗号分隔字符串；缺省时依次取配置中的 model_names 等复数项、
+        model_name 等单值（命令行 --model_names=... 会经 RollingTrader 合并进配置）。
+        """
+        model_names = _as_list(model_names or self.kwargs.get("model_names") or self.kwargs["model_name"])
+        dataset_names = _as_list(dataset_names or self.kwargs.get("dataset_names") or self.kwargs["dataset_name"])
+        stock_pools = _as_list(stock_pools or self.kwargs.get("stock_pools") or self.kwargs["stock_pool"])
+        rolling_types = _as_list(rolling_types or self.kwargs.get("rolling_types") or self.kwargs["rolling_type"])
+
+        combinations = list(itertools.product(model_names, dataset_names, stock_pools, rolling_types))
+        logger.info(f"🚀 总共生成了 {len(combinations)} 个组合任务")
+
+        batch_start = time.time()
+        jobs, panels, labels, summary = [], [], [], {}
+        seen_hashes = set()
+        for model_name, dataset_name, stock_pool, rolling_type in combinations:
+            label = f"{model_name}/{dataset_name}/{stock_pool}/{rolling_type}"
+            # 单个组合规划失败 (配置错误、数据缺失等) 只记录到汇总表，不影响其它组合
+            try:
+                task_config = get_my_config(model_name, dataset_name, stock_pool)
+                tasks = self._gen_tasks(task_config, rolling_type)
+                exp_name = self._get_exp_name(tasks[0], rolling_type)
+                pending_tasks = self._pending_tasks(tasks, exp_name)
+                pending_tasks = self._plan_incremental(pending_tasks, exp_name)
+                panel = self._shared_panel(tasks) if rolling_type == "custom" else None
+            except Exception as e:
+                logger.exception(f"组合 {label} 任务规划失败，跳过: {e}")
+                summary[label] = {"tasks": 0, "skipped": 0, "results": [], "error": str(e)}
+                continue
+            if self.kwargs.get("dedup_tasks"):
+                pending_tasks = self._dedup_jobs(pending_tasks, seen_hashes)
 
-    def start_custom(self):
+            summary[label] = {"tasks": len(tasks), "skipped": len(tasks) - len(pending_tasks), "results": []}
+            jobs.extend((task, exp_name) for task in pending_tasks)
+            panels.extend([panel] * len(pending_tasks))
+            labels.extend([label] * len(pending_tasks))
+
+        results = self._dispatch(jobs, panels)
+        for label, result in zip(labels, results):
+            summary[label]["results"].append(result)
+
+        self._log_task_status([task for task, _ in jobs], results)
+        self._summarize_profile()
+        self._print_batch_table(summary, time.time() - batch_start)
+
+    def _gen_tasks(self, task_config, rolling_type):
+        """按滚动类型生成任务列表：custom 为 5 个嵌套窗口，其余交给 qlib RollingGen"""
+        if rolling_type == "custom":
+            return self._custom_tasks(task_config)
+        rolling_gen = RollingGen(step=self.step, rtype=rolling_type, ds_extra_mod_func=my_enhanced_handler_mod)
+        return task_generator(tasks=task_config, generators=rolling_gen)
+
+    @staticmethod
+    def _print_batch_table(summary, wall_seconds):
+        """打印每个组合的任务数与耗时"""
+        rows = []
+        for label, item in summary.items():
+            results = item["results"]
+            ok = sum(1 for r in results if r.ok)
+            rows.append([
+                label,
+                item["tasks"],
+                item["skipped"],
+                ok,
+                len(results) - ok,
+                f"{sum(r.seconds for r in results):.1f}",
+                item.get("error", ""),
+            ])
+        print(tabulate(rows, headers=["组合", "任务数", "跳过", "成功", "失败", "训练耗时(s)", "错误"], tablefmt="github"))
+        print(f"批量训练总耗时: {wall_seconds:.1f}s")
+
+    def _prepare_feature_cache(self, tasks, panels):
+        """
+        训练前为每种不同的 handler 配置 (共享面板的任务按加宽后的区间) 各构建一次特征缓存，
+        之后所有训练子进程直接加载缓存，不再各自计算 Alpha158。
+        """
+        cache = get_feature_cache(**self.kwargs)
+        if cache is None:
+            return
+
+        todo = {}
+        for task, panel in zip(tasks, panels):
+            handler_config = panel_handler(task["dataset"]["kwargs"]["handler"], panel)
+            path = cache.path_for(handler_config)
+            if not path.exists():
+                todo.setdefault(path, handler_config)
+
+        logger.info(f"特征缓存: {len(tasks)} 个任务, 需新建 {len(todo)} 份")
+        for path, handler_config in todo.items():
+            if not run_feature_cache_blocking(handler_config, self.region, **self.kwargs):
+                logger.warning(f"特征缓存构建失败，相关任务将直接从原始数据计算: {path.name}")
+
+    def _summarize_profile(self):
+        """打印本次运行训练子进程的分阶段耗时与峰值内存"""
+        if self.kwargs.get("profile_file"):
+            summarize_profile(self.kwargs["profile_file"])
+
+    @staticmethod
+    def _log_task_status(tasks, results):
+        """打印每个训练任务的退出状态"""
+        failed = 0
+        for task, result in zip(tasks, results):
+            train_time_seg = task["dataset"]["kwargs"]["segments"]["train"]
+            status = "✅" if result.ok else "❌"
+            if not result.ok:
+                failed += 1
+            logger.info(f"{status} train={train_time_seg} exitcode={result.exitcode} ({result.seconds:.1f}s)")
+        logger.info(f"训练结束: 成功 {len(tasks) - failed}, 失败 {failed}")
+
+    def start_custom(self, shared_panel=None):
+        """
+        训练 12~60 个月共 5 个嵌套窗口。
+        shared_panel: 只在最宽窗口上计算一次特征面板，其余窗口从中切片（默认读取配置）
+        """
         self.kwargs["rolling_type"] = "custom"
+        tasks = self._custom_tasks(self.task_config)
+        self.task_training(tasks, panel=self._shared_panel(tasks, shared_panel))
+
+    def start_incremental(self, shared_panel=None):
+        """
+        每日增量更新：LightGBM / XGBoost / CatBoost 在上一次的模型上只用新增交易日继续训练，
+        新 recorder 打上 train_mode=incremental；距上次全量训练满 incremental_full_every 天时自动全量重训。
+        """
+        self.kwargs["incremental"] = True
+        self.start_custom(shared_panel)
+
+    def _custom_tasks(self, task_config):
         tasks = []
         for i in range(1, 6):
             segments = generate_qlib_segments(months_total=12 * i)
-            _task = copy.deepcopy(self.task_config)
+            _task = copy.deepcopy(task_config)
             _task["dataset"]["kwargs"]["segments"] = segments
             tasks.append(_task)
-        self.task_training(tasks)
+        return tasks
+
+    def _shared_panel(self, tasks, shared_panel=None):
+        """
+        开启 shared_panel 时返回 start_custom 各窗口共用的特征面板区间，否则返回 None。
+        面板只用于训练子进程实际执行的 exec_task，recorder 中保存的 task (及其哈希) 与不共享时相同。
+        """
+        if shared_panel is None:
+            shared_panel = self.kwargs.get("shared_panel", False)
+        if not shared_panel or not tasks:
+            return None
+        # 共享面板依赖特征缓存把数据交给各训练子进程
+        if not self.kwargs.get("feature_cache"):
+            raise ValueError("shared_panel 需要同时开启 feature_cache (--feature_cache=True)")
+        panel = widest_panel(tasks)
+        logger.info(f"{len(tasks)} 个窗口共用特征面板: {panel[0]} ~ {panel[1]}")
+        return panel
     
     def need_train(self):
         mlruns_dates = get_mlruns_dates()
@@ -3,6 +3,8 @@ import re
 import sys
 import subprocess
 import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, List, Union
 from pathlib import Path
 from datetime import datetime
@@ -18,6 +20,9 @@ from loguru import logger
 # --- 常量定义 ---
 DEFAULT_ENCODING = "utf-8"
 DEFAULT_TIMEOUT = (10, 30)  # (连接超时, 读取超时)
+# 股票列表本地快照：TTL 内直接读取，联网失败时使用任意时间的旧快照
+STOCK_LIST_CACHE = "~/.qlibAssistant/stock_list.csv"
+STOCK_LIST_TTL_HOURS = 24
 GITHUB_ASSETS_PATTERN = re.compile(r"expanded_assets")
 # MLflow 路径修复正则：使用命名组提高可读性
 MLFLOW_PATH_PATTERN = re.compile(
@@ -152,44 +157,37 @@ def _stock_list_from_sina() -> Optional[pd.DataFrame]:
     return df[["code", "name"]]
 
 
-def _stock_list_from_exchanges() -> Optional[pd.DataFrame]:
-    """沪深京交易所官网：非东方财富，海外 IP 通常可访问"""
-    parts = []
-    try:
-        sh_df = ak.stock_info_sh_name_code(symbol="主板A股")
-        sh_df = sh_df.rename(columns={"证券代码": "code", "证券简称": "name"})
-        sh_df["code"] = sh_df["code"].apply(process_stock_code_v2)
-        parts.append(sh_df[["code", "name"]])
-    except Exception as e:
-        logger.warning(f"上交所股票列表获取失败: {e}")
-    try:
-        sh_kcb = ak.stock_info_sh_name_code(symbol="科创板")
-        sh_kcb = sh_kcb.rename(columns={"证券代码": "code", "证券简称": "name"})
-        sh_kcb["code"] = sh_kcb["code"].apply(process_stock_code_v2)
-        parts.append(sh_kcb[["code", "name"]])
-    except Exception as e:
-        logger.warning(f"科创板股票列表获取失败: {e}")
-    try:
-        sz_df = ak.stock_info_sz_name_code(symbol="A股列表")
-        sz_df = sz_df.rename(columns={"A股代码": "code", "A股简称": "name"})
-        sz_df["code"] = sz_df["code"].apply(process_stock_code_v2)
-        parts.append(sz_df[["code", "name"]])
-    except Exception as e:
-        logger.warning(f"深交所股票列表获取失败: {e}")
+# 交易所数据源: (名称, 拉取函数, 代码列, 简称列)
+_EXCHANGE_SOURCES = [
+    ("上交所", lambda: ak.stock_info_sh_name_code(symbol="主板A股"), "证券代码", "证券简称"),
+    ("科创板", lambda: ak.stock_info_sh_name_code(symbol="科创板"), "证券代码", "证券简称"),
+    ("深交所", lambda: ak.stock_info_sz_name_code(symbol="A股列表"), "A股代码", "A股简称"),
+    ("北交所", lambda: ak.stock_info_bj_name_code(), "证券代码", "证券简称"),
+]
+
+
+def _fetch_exchange(source) -> Optional[pd.DataFrame]:
+    name, fetch, code_col, name_col = source
     try:
-        bj_df = ak.stock_info_bj_name_code()
-        bj_df = bj_df.rename(columns={"证券代码": "code", "证券简称": "name"})
-        bj_df["code"] = bj_df["code"].apply(process_stock_code_v2)
-        parts.append(bj_df[["code", "name"]])
+        df = fetch().rename(columns={code_col: "code", name_col: "name"})
+        df["code"] = df["code"].apply(process_stock_code_v2)
+        return df[["code", "name"]]
     except Exception as e:
-        logger.warning(f"北交所股票列表获取失败: {e}")
+        logger.warning(f"{name}股票列表获取失败: {e}")
+        return None
+
+
+def _stock_list_from_exchanges() -> Optional[pd.DataFrame]:
+    """沪深京交易所官网：非东方财富，海外 IP 通常可访问；四个板块并发拉取"""
+    with ThreadPoolExecutor(max_workers=len(_EXCHANGE_SOURCES)) as pool:
+        parts = [df for df in pool.map(_fetch_exchange, _EXCHANGE_SOURCES) if df is not None]
     if not parts:
         return None
     return pd.concat(parts, ignore_index=True).drop_duplicates(subset=["code"])
 
 
-def get_normalized_stock_list() -> Optional[pd.DataFrame]:
-    """获取并标准化 A 股股票列表，多源 fallback 避免东方财富在 GitHub Actions 失败"""
+def _fetch_stock_list() -> Optional[pd.DataFrame]:
+    """联网获取并标准化 A 股股票列表，多源 fallback 避免东方财富在 GitHub Actions 失败"""
     for env_key in ['HTTP_PROXY', 'HTTPS_PROXY', 'http_proxy', 'https_proxy']:
         os.environ.pop(env_key, None)
 
@@ -218,6 +216,51 @@ def get_normalized_stock_list() -> Optional[pd.DataFrame]:
         logger.error(f"AkShare 股票列表全部数据源拉取失败: {e}")
         return None
 
+
+def _load_stock_list_snapshot(path: Path) -> Optional[pd.DataFrame]:
+    try:
+        return pd.read_csv(path, dtype=str, keep_default_na=False, encoding=DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning(f"股票列表快照读取失败 {path}: {e}")
+        return None
+
+
+def get_normalized_stock_list(cache_path: Optional[str] = None, ttl_hours: Optional[float] = None,
+                              offline: bool = False) -> Optional[pd.DataFrame]:
+    """
+    获取标准化 A 股股票列表 (code, name)，带本地快照缓存：
+    - 快照未超过 ttl_hours 时直接读取，不联网
+    - 过期后联网刷新并覆盖快照；联网失败时退回旧快照
+    - offline=True 时只读快照，完全不联网
+    """
+    path = Path(cache_path or STOCK_LIST_CACHE).expanduser()
+    ttl_hours = STOCK_LIST_TTL_HOURS if ttl_hours is None else float(ttl_hours)
+
+    if path.exists():
+        age_hours = (time.time() - path.stat().st_mtime) / 3600
+        if offline or age_hours < ttl_hours:
+            df = _load_stock_list_snapshot(path)
+            if df is not None:
+                logger.info(f"使用股票列表快照 {path} ({age_hours:.1f} 小时前, {len(df)} 只)")
+                return df
+    if offline:
+        logger.warning(f"离线模式下没有可用的股票列表快照: {path}")
+        return None
+
+    df = _fetch_stock_list()
+    if df is not None:
+        df = df[["code", "name"]].reset_index(drop=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        df.to_csv(tmp, index=False, encoding=DEFAULT_ENCODING)
+        os.replace(tmp, path)
+        return df
+
+    if path.exists():
+        logger.warning(f"股票列表联网刷新失败，使用旧快照 {path}")
+        return _load_stock_list_snapshot(path)
+    return None
+
 def get_latest_trade_date_ak():
     """获取最近一个已收盘的交易日"""
     try:
@@ -240,6 +283,35 @@ def get_local_data_date(provider_uri):
     _, stdout, _ = run_command(f"tail -n 1 {provider_uri}/calendars/day.txt")
     return stdout
 
+def data_fingerprint(provider_uri) -> str:
+    """
+    本地 qlib 数据的版本指纹，预测缓存与特征缓存共用：
+    日历最后一个交易日 + 日历及每个 features/*/*.bin 的 (文件名, 大小, 修改时间)。
+    qlib 按文件原地改写 .bin (更新或修正历史数据) 不会改变上层目录的修改时间，因此逐个文件统计。
+    """
+    root = Path(provider_uri).expanduser()
+    calendar = root / "calendars" / "day.txt"
+    digest = hashlib.sha256()
+    try:
+        with open(calendar, "r", encoding=DEFAULT_ENCODING) as f:
+            lines = [line.strip() for line in f if line.strip()]
+        st = calendar.stat()
+        digest.update(f"{lines[-1] if lines else ''}|{st.st_size}|{st.st_mtime_ns}\n".encode(DEFAULT_ENCODING))
+    except OSError:
+        pass
+
+    try:
+        inst_dirs = sorted(entry.path for entry in os.scandir(root / "features") if entry.is_dir())
+    except OSError:
+        inst_dirs = []
+    for inst_dir in inst_dirs:
+        with os.scandir(inst_dir) as entries:
+            files = sorted((entry.name, entry.stat()) for entry in entries if entry.name.endswith(".bin"))
+        inst = os.path.basename(inst_dir)
+        for name, st in files:
+            digest.update(f"{inst}/{name}|{st.st_size}|{st.st_mtime_ns}\n".encode(DEFAULT_ENCODING))
+    return digest.hexdigest()[:12]
+
 def fix_mlflow_paths(mlruns_dir: Optional[str] = None):
     """精准修复 MLflow 配置文件中的用户路径"""
     current_home = str(Path.home())
@@ -0,0 +1,95 @@
+"""
+集成打分聚合基准：比较 _save_results 原先逐日 groupby(instrument).apply 的写法与
+model_infer.aggregate_scores 一次性向量化聚合的耗时，并校验两者结果一致。
+
+数据为随机长表 (datetime, instrument, model)，规模为 股票数 x 模型数 x 天数。
+
+用法: python script/bench_aggregate.py --instruments=300,800,5000 --models=25 --days=60
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import fire
+import numpy as np
+import pandas as pd
+from loguru import logger
+from tabulate import tabulate
+
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from model_infer import aggregate_scores
+
+
+def _make_df(n_instruments, n_models, n_days, seed=0):
+    """构造与 ModelCLI.collect 输出同结构的长表"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2025-01-02", periods=n_days)
+    instruments = [f"SH{600000 + i}" for i in range(n_instruments)]
+    weights = rng.random(n_models)
+    weights /= weights.sum()
+    index = pd.MultiIndex.from_product([range(n_models), dates, instruments], names=["model", "datetime", "instrument"])
+    df = index.to_frame(index=False)
+    df["score"] = rng.normal(0, 0.01, len(df))
+    df["weight"] = weights[df["model"].to_numpy()]
+    return df.drop(columns="model")
+
+
+def _legacy_aggregate(df_final):
+    """_save_results 原实现：每个日期、每只股票调用一次 Python 函数"""
+    frames = []
+    for date, group_df in df_final.groupby('datetime'):
+        ret_df = (
+            group_df.groupby('instrument')
+            .apply(
+                lambda g: pd.Series(
+                    {
+                        "avg_score": (g['score'] * g['weight']).sum() / g['weight'].sum()
+                        if g['weight'].sum() != 0
+                        else g['score'].mean(),
+                        "pos_ratio": (g['score'] > 0).mean(),
+                    }
+                )
+            )
+            .reset_index()
+        )
+        ret_df.insert(0, "datetime", date)
+        frames.append(ret_df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    ret = func(*args)
+    return ret, time.perf_counter() - start
+
+
+def main(instruments=(300, 800, 5000), models=25, days=60, skip_legacy_above=None):
+    if isinstance(instruments, int):
+        instruments = (instruments,)
+    rows = []
+    for n in instruments:
+        df = _make_df(n, models, days)
+        logger.info(f"{n} 股票 x {models} 模型 x {days} 天 = {len(df)} 行")
+        new, t_new = _timed(aggregate_scores, df)
+        if skip_legacy_above and n > skip_legacy_above:
+            rows.append([n, len(df), "-", f"{t_new:.3f}", "-", "-"])
+            continue
+        old, t_old = _timed(_legacy_aggregate, df)
+        diff = (new[["avg_score", "pos_ratio"]] - old[["avg_score", "pos_ratio"]]).abs().to_numpy().max()
+        assert new[["datetime", "instrument"]].equals(old[["datetime", "instrument"]])
+        rows.append([n, len(df), f"{t_old:.2f}", f"{t_new:.3f}", f"{t_old / t_new:.0f}x", f"{diff:.1e}"])
+
+    print(tabulate(
+        rows,
+        headers=["股票数", "行数", "逐组 apply(s)", "向量化(s)", "加速", "最大误差"],
+        tablefmt="github",
+    ))
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,136 @@
+"""
+TopK 回测基准：比较 _backtest_handle_df_topk 原先逐日拼字典、逐行逐位 .loc 重建集合计算换手率的写法与
+model_review.topk_backtest 基于 (日期 x 排名) 整数编码矩阵一次算出全部 K 的耗时，并校验结果一致。
+
+数据为随机的每日打分结果 (股票池每日部分轮换，含缺失的真实收益)，另校验基准缺少部分日期的情形。
+
+用法: python script/bench_backtest.py --days=250,500 --instruments=300
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import fire
+import numpy as np
+import pandas as pd
+from loguru import logger
+from tabulate import tabulate
+
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from model_review import top_num_list, topk_backtest
+
+
+def _make_data(n_days, n_instruments, seed=0, missing_benchmark=False):
+    """构造与 append_review_result 输出同结构的 {日期: 打分结果} 与 CSI300 基准"""
+    rng = np.random.default_rng(seed)
+    dates = [str(d.date()) for d in pd.bdate_range("2025-01-02", periods=n_days)]
+    pool = np.array([f"SH{600000 + i}" for i in range(n_instruments * 2)], dtype=object)
+    df_ret = {}
+    for date in dates:
+        instruments = rng.choice(pool, n_instruments, replace=False)
+        df = pd.DataFrame({
+            "instrument": instruments,
+            "avg_score": rng.normal(0, 0.01, n_instruments),
+            "real_label": rng.normal(0, 0.02, n_instruments),
+        }).sort_values("avg_score", ascending=False, ignore_index=True)
+        df.loc[rng.random(n_instruments) < 0.02, "real_label"] = np.nan
+        df_ret[date] = df
+    df_ret[dates[-1]]["real_label"] = np.nan  # 最新一日还没有真实收益
+    # 与 D.features 一样为 float32
+    csi300_df = pd.DataFrame({"datetime": pd.to_datetime(dates), "csi300_real_label": rng.normal(0, 0.01, n_days).astype(np.float32)})
+    if missing_benchmark:
+        csi300_df = csi300_df.iloc[1:]
+    return df_ret, csi300_df, dates
+
+
+def _legacy_equity(df, initial_cash=1.0, fee_rate=0.002):
+    """_calculate_daily_equity 原实现"""
+    df = df.dropna(subset=['avg_real_label']).copy()
+    df['daily_net_ret'] = df['avg_real_label'] - (df['turnover_rate'] * fee_rate)
+    df['strategy_equity'] = initial_cash * (1 + df['daily_net_ret']).cumprod()
+    df['csi300_equity'] = initial_cash * (1 + df['csi300_real_label']).cumprod()
+    df['max_equity'] = df['strategy_equity'].cummax()
+    df['drawdown'] = (df['strategy_equity'] - df['max_equity']) / df['max_equity']
+    return df
+
+
+def _legacy_backtest_topk(df_ret, csi300_df, date_range_list, top_num):
+    """_backtest_handle_df_topk 原实现"""
+    df_topk = []
+    for date in date_range_list:
+        df_topk_ret = df_ret[date]
+        topk_instruments = df_topk_ret['instrument'].head(top_num).tolist()
+        avg_real_label = df_topk_ret[df_topk_ret['instrument'].isin(topk_instruments)]['real_label'].mean()
+        csi300_row = csi300_df[csi300_df['datetime'] == pd.to_datetime(date)]
+        if not csi300_row.empty:
+            csi300_label = csi300_row.iloc[0]["csi300_real_label"]
+        else:
+            csi300_label = None
+        row_dict = {'date': date}
+        for i, inst in enumerate(topk_instruments):
+            row_dict[f'top{i+1}'] = inst
+        for i in range(len(topk_instruments), top_num):
+            row_dict[f'top{i+1}'] = None
+        row_dict['avg_real_label'] = avg_real_label
+        row_dict['csi300_real_label'] = csi300_label
+        df_topk.append(row_dict)
+    df_topk = pd.DataFrame(df_topk)
+    turnover_rates = []
+    for i in range(len(df_topk)):
+        if i == len(df_topk) - 1:
+            turnover_rates.append(float('nan'))
+        else:
+            curr_top = set([df_topk.loc[i, f"top{j+1}"] for j in range(top_num) if pd.notnull(df_topk.loc[i, f"top{j+1}"])])
+            next_top = set([df_topk.loc[i+1, f"top{j+1}"] for j in range(top_num) if pd.notnull(df_topk.loc[i+1, f"top{j+1}"])])
+            if len(curr_top) == 0:
+                turnover_rates.append(float('nan'))
+            else:
+                changed = curr_top - next_top
+                turnover_rates.append(len(changed) / top_num)
+    df_topk["turnover_rate"] = turnover_rates
+    return _legacy_equity(df_topk)
+
+
+def _legacy_backtest(df_ret, csi300_df, date_range_list):
+    return {k: _legacy_backtest_topk(df_ret, csi300_df, date_range_list, k) for k in top_num_list}
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    ret = func(*args)
+    return ret, time.perf_counter() - start
+
+
+def main(days=(250, 500), instruments=300):
+    if isinstance(days, int):
+        days = (days,)
+    rows = []
+    for n in days:
+        df_ret, csi300_df, dates = _make_data(n, instruments)
+        logger.info(f"{n} 天 x {instruments} 股票, K = {top_num_list}")
+        new, t_new = _timed(topk_backtest, df_ret, csi300_df, dates)
+        old, t_old = _timed(_legacy_backtest, df_ret, csi300_df, dates)
+        for k in top_num_list:
+            pd.testing.assert_frame_equal(new[k], old[k], check_exact=True)
+        rows.append([n, instruments, f"{t_old:.2f}", f"{t_new:.3f}", f"{t_old / t_new:.0f}x"])
+
+    # 基准缺少部分日期时的列类型与结果
+    df_ret, csi300_df, dates = _make_data(20, instruments, missing_benchmark=True)
+    new, old = topk_backtest(df_ret, csi300_df, dates), _legacy_backtest(df_ret, csi300_df, dates)
+    for k in top_num_list:
+        pd.testing.assert_frame_equal(new[k], old[k], check_exact=True)
+
+    print(tabulate(
+        rows,
+        headers=["天数", "股票数", "逐行 .loc(s)", "编码矩阵(s)", "加速"],
+        tablefmt="github",
+    ))
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
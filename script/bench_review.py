@@ -0,0 +1,102 @@
+"""
+复盘 TopK 指标基准：比较 _review_csv 原先每个 K 重新排序、每条止盈线单独统计的写法与
+model_review.topk_review_metrics 一次排序 + (K x 止盈线) 前缀累计计数的耗时，并校验结果一致。
+
+数据为随机单日打分表 (含并列分数与缺失价格)，止盈线网格分为默认 1% ~ 10% 与 0.1% ~ 20% (步长 0.1%)。
+价格列分别用 float64 与 float32 (D.features 的类型，且部分 n2high 恰好等于 n1close * 1.1) 各测一遍。
+
+用法: python script/bench_review.py --instruments=300,5000 --repeat=20
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import fire
+import numpy as np
+import pandas as pd
+from loguru import logger
+from tabulate import tabulate
+
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from model_review import profit_num_list, top_num_list, topk_review_metrics
+
+FINE_PROFIT_NUM_LIST = [0.001 * i for i in range(1, 201)]
+
+
+def _make_df(n_instruments, seed=0, dtype="float64"):
+    """构造与 _review_csv 合并 n1close / n2high 后同结构的表"""
+    rng = np.random.default_rng(seed)
+    close = rng.uniform(5, 50, n_instruments)
+    n2high = close * (1 + np.abs(rng.normal(0, 0.05, n_instruments)))
+    # 约 1/5 的股票最高价恰好涨停 (+10%)，检验阈值比较的边界
+    limit_up = rng.random(n_instruments) < 0.2
+    n2high[limit_up] = close[limit_up] * 1.1
+    close, n2high = close.astype(dtype), n2high.astype(dtype)
+    df = pd.DataFrame({
+        "instrument": [f"SH{600000 + i}" for i in range(n_instruments)],
+        "avg_score": np.round(rng.uniform(0, 0.02, n_instruments), 4),  # 保留 4 位小数制造并列
+        "real_label": rng.normal(0, 0.02, n_instruments),
+        "n1close": close,
+        "n2high": n2high,
+    })
+    df.loc[df.sample(frac=0.02, random_state=seed).index, ["real_label", "n2high"]] = np.nan
+    return df
+
+
+def _legacy_metrics(df, top_nums, profit_nums):
+    """_review_csv 原实现：每个 K 排序一次，每条止盈线扫描一次"""
+    topk_result_dict = {}
+    for top_num in top_nums:
+        topk_df = df.sort_values(by="avg_score", ascending=False).head(top_num)
+        topk_avg_profit = topk_df["real_label"].mean()
+        topk_radio = ((topk_df["real_label"] * topk_df["avg_score"]) > 0).sum() / len(topk_df)
+        profit_list = []
+        for profit_num in profit_nums:
+            profit_list.append((topk_df["n2high"] > topk_df["n1close"] * (1 + profit_num)).sum() / len(topk_df))
+        profit_list.append(topk_avg_profit)
+        profit_list.append(topk_radio)
+        topk_result_dict[f"Top{top_num}"] = profit_list
+    return pd.DataFrame(topk_result_dict)
+
+
+def _timed(func, repeat, *args):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ret = func(*args)
+    return ret, (time.perf_counter() - start) / repeat
+
+
+def main(instruments=(300, 5000), repeat=20):
+    if isinstance(instruments, int):
+        instruments = (instruments,)
+    top_nums_fine = list(range(5, 505, 5))
+    grids = [
+        ("默认", top_num_list, profit_num_list),
+        ("细网格", top_num_list, FINE_PROFIT_NUM_LIST),
+        ("100 个 K x 细网格", top_nums_fine, FINE_PROFIT_NUM_LIST),
+    ]
+    rows = []
+    for n in instruments:
+        for dtype in ("float64", "float32"):
+            df = _make_df(n, dtype=dtype)
+            for name, top_nums, profit_nums in grids:
+                logger.info(f"{n} 股票 ({dtype}), {name}: {len(top_nums)} 个 K x {len(profit_nums)} 条止盈线")
+                new, t_new = _timed(topk_review_metrics, repeat, df, top_nums, profit_nums)
+                old, t_old = _timed(_legacy_metrics, max(repeat // 10, 1), df, top_nums, profit_nums)
+                assert np.array_equal(new.to_numpy(), old.to_numpy(), equal_nan=True), f"{n} {dtype} {name} 结果不一致"
+                rows.append([n, dtype, name, f"{t_old * 1000:.1f}", f"{t_new * 1000:.2f}", f"{t_old / t_new:.0f}x"])
+
+    print(tabulate(
+        rows,
+        headers=["股票数", "价格类型", "网格", "逐 K 排序(ms)", "向量化(ms)", "加速"],
+        tablefmt="github",
+    ))
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
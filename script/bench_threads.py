@@ -0,0 +1,74 @@
+"""
+并发训练吞吐基准：固定核数预算，比较 1/2/4/8 个 LightGBM 训练同时运行时的吞吐。
+
+每种并发度都完成同样数量的训练，线程数由 train_resource 按预算切分，
+另外给出「每个训练都用满预算线程」的对照组，用来观察超订带来的抖动。
+
+用法: python script/bench_threads.py --core_budget=16 --n_fits=8
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import fire
+import numpy as np
+from loguru import logger
+from tabulate import tabulate
+
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from myconfig import GBDT_MODEL
+from train_resource import apply_thread_budget, get_core_budget, threads_per_fit
+
+
+def _fit_once(n_threads, n_rows, n_features, seed):
+    """子进程里跑一次 LightGBM 训练（参数取自 myconfig.GBDT_MODEL）"""
+    import lightgbm as lgb
+
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((n_rows, n_features), dtype=np.float32)
+    y = x[:, :10].sum(axis=1) + rng.standard_normal(n_rows, dtype=np.float32)
+
+    task = apply_thread_budget({"model": GBDT_MODEL}, n_threads)
+    params = dict(task["model"]["kwargs"])
+    params["objective"] = "regression"
+    params.pop("loss", None)
+    params["verbosity"] = -1
+
+    lgb.train(params, lgb.Dataset(x, label=y), num_boost_round=100)
+    return n_threads
+
+
+def _run(concurrency, n_threads, n_fits, n_rows, n_features):
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(_fit_once, [n_threads] * n_fits, [n_rows] * n_fits, [n_features] * n_fits, range(n_fits)))
+    return time.perf_counter() - start
+
+
+def main(core_budget=None, n_fits=8, n_rows=200_000, n_features=158, concurrency=(1, 2, 4, 8)):
+    budget = get_core_budget(core_budget)
+    logger.info(f"核数预算 {budget}, 每组训练次数 {n_fits}, 数据 {n_rows}x{n_features}")
+
+    rows = []
+    for c in concurrency:
+        n_threads = threads_per_fit(budget, c)
+        t_budget = _run(c, n_threads, n_fits, n_rows, n_features)
+        t_over = _run(c, budget, n_fits, n_rows, n_features)
+        rows.append([c, n_threads, f"{t_budget:.1f}", f"{n_fits * 60 / t_budget:.2f}",
+                     f"{t_over:.1f}", f"{n_fits * 60 / t_over:.2f}"])
+
+    print(tabulate(
+        rows,
+        headers=["并发数", "每训练线程", "预算分配耗时(s)", "吞吐(次/分)", "满线程耗时(s)", "满线程吞吐(次/分)"],
+        tablefmt="github",
+    ))
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
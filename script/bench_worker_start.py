@@ -0,0 +1,70 @@
+"""
+训练子进程启动延迟基准：spawn vs forkserver。
+
+测量从 Process.start() 到子进程完成 qlib / 模型库导入并执行 qlib.init、可以开始训练的时间。
+forkserver 的第一次启动包含模板进程自身的预加载，单独列出。
+
+用法 (在 roll 目录下): python ../script/bench_worker_start.py --n_runs=5
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import fire
+import yaml
+from loguru import logger
+from tabulate import tabulate
+
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+import multiprocessing
+
+
+def _probe(queue, region, kwargs):
+    """子进程: 完成与 _train_worker 相同的导入和初始化后回报时间"""
+    from traincli import _init_worker_qlib, FORKSERVER_PRELOAD
+    import importlib
+
+    for name in FORKSERVER_PRELOAD:
+        importlib.import_module(name)
+    _init_worker_qlib(region, **kwargs)
+    queue.put(time.perf_counter())
+
+
+def _measure(method, n_runs, kwargs):
+    from traincli import resolve_start_method
+
+    ctx = multiprocessing.get_context(resolve_start_method(method))
+    queue = ctx.Queue()
+    latencies = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        p = ctx.Process(target=_probe, args=(queue, "cn", kwargs))
+        p.start()
+        ready = queue.get()
+        p.join()
+        latencies.append(ready - start)
+    return latencies
+
+
+def main(config_path="./config.yaml", n_runs=5, **cli_kwargs):
+    with open(config_path, "r", encoding="utf-8") as f:
+        kwargs = yaml.safe_load(f) or {}
+    kwargs.update(cli_kwargs)
+
+    rows = []
+    for method in ["spawn", "forkserver"]:
+        latencies = _measure(method, n_runs, kwargs)
+        steady = latencies[1:] if method == "forkserver" and len(latencies) > 1 else latencies
+        rows.append([method, f"{latencies[0]:.2f}", f"{sum(steady) / len(steady):.2f}", f"{min(steady):.2f}"])
+        logger.info(f"{method}: {[round(x, 2) for x in latencies]}")
+
+    print(tabulate(rows, headers=["启动方式", "首次(s)", "平均(s)", "最快(s)"], tablefmt="github"))
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
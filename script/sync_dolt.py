@@ -37,6 +37,13 @@ import numpy as np
 import pandas as pd
 import requests
 
+# roll 目录下的打分库读取接口
+_roll_dir = os.path.join(Path(__file__).resolve().parent.parent, "roll")
+if _roll_dir not in sys.path:
+    sys.path.insert(0, _roll_dir)
+
+from score_store import partition_path, read_partition
+
 # 默认仓库（可被 Fire 顶层参数覆盖）
 OWNER = "touhoufan"
 DATABASE = "qlibDailyCsv"
@@ -57,6 +64,8 @@ EXPORT_TABLES = (
 
 # push_qlib_score_*（目录合并）递归扫描时跳过的文件名（小写比较）
 QLIB_SCORE_EXCLUDED_CSV_BASENAMES: frozenset[str] = frozenset({"total.csv"})
+# qlib_score 单日结果文件名: <日期>_ret.csv / <日期>_filter_ret.csv
+_QLIB_SCORE_CSV_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})_(ret|filter_ret)\.csv$")
 
 
 def _default_out_dir() -> str:
@@ -448,6 +457,19 @@ def _read_review_csv_normalized(path: str) -> pd.DataFrame:
     return df
 
 
+def _read_qlib_score_normalized(path: str) -> pd.DataFrame:
+    """
+    读取 qlib_score 单日结果：同一结果目录下有 Parquet 打分库（``store/``）时直接读对应分区，
+    否则回退到 CSV（去掉首列无名列）。
+    """
+    m = _QLIB_SCORE_CSV_NAME.match(os.path.basename(path))
+    if m:
+        part = partition_path(os.path.dirname(path), m.group(2), m.group(1))
+        if part.exists():
+            return read_partition(part)
+    return _read_review_csv_normalized(path)
+
+
 def _review_date_column_name(df: pd.DataFrame) -> str | None:
     """优先 ``datetime`` 列，否则第一个列名含 ``date`` 的列。"""
     for c in df.columns:
@@ -475,9 +497,12 @@ def _sort_merged_review_by_date_only(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-def _merge_review_csvs_to_tempfile(paths: list[str]) -> tuple[str, int]:
-    """合并多个 CSV 到临时文件，返回 (路径, 行数)。"""
-    dfs = [_read_review_csv_normalized(p) for p in paths]
+def _merge_review_csvs_to_tempfile(
+    paths: list[str],
+    reader: Callable[[str], pd.DataFrame] = _read_review_csv_normalized,
+) -> tuple[str, int]:
+    """合并多个 CSV（``reader`` 逐个读取）到临时文件，返回 (路径, 行数)。"""
+    dfs = [reader(p) for p in paths]
     merged = pd.concat(dfs, ignore_index=True)
     merged = _sort_merged_review_by_date_only(merged)
     n = len(merged)
@@ -652,6 +677,7 @@ def push_merged_review_csvs_to_table(
     insert_batch_rows: int = 80,
     match_dolt_columns: bool = True,
     omit_name_column: bool = False,
+    reader: Callable[[str], pd.DataFrame] = _read_review_csv_normalized,
 ) -> None:
     """
     将多个本地 CSV 合并后 push 到指定 Dolt 表（整表覆盖，逻辑同 push_table_from_csv）。
@@ -659,7 +685,7 @@ def push_merged_review_csvs_to_table(
     if not paths:
         print(f"⚠️ {label}: 没有匹配的 CSV 文件，已跳过。")
         return
-    tmp, n = _merge_review_csvs_to_tempfile(paths)
+    tmp, n = _merge_review_csvs_to_tempfile(paths, reader)
     try:
         print(
             f"📎 {label}: 合并 {len(paths)} 个文件 → 临时表 {n} 行，目标 Dolt 表 `{table}`",
@@ -700,6 +726,7 @@ def push_csv_group_by_name_rule(
     insert_batch_rows: int = 80,
     match_dolt_columns: bool = True,
     omit_name_column: bool = False,
+    reader: Callable[[str], pd.DataFrame] = _read_review_csv_normalized,
 ) -> None:
     """
     合并本地目录下符合文件名规则的 CSV（可选递归子目录），push 到 ``table``。
@@ -708,6 +735,7 @@ def push_csv_group_by_name_rule(
     - ``name_contains_filter=False``：只选文件名不含 ``filter`` 的 .csv
     - ``exclude_basenames``：按文件名（小写）再排除，例如 qlib_score 排除 ``total.csv``
     - ``omit_name_column``：合并上传前去掉列 ``name``（qlib_score 流程为 True）
+    - ``reader``：单个文件的读取函数（qlib_score 流程优先读 Parquet 打分库）
     """
     if path:
         if not os.path.isfile(path):
@@ -748,6 +776,7 @@ def push_csv_group_by_name_rule(
         insert_batch_rows=insert_batch_rows,
         match_dolt_columns=match_dolt_columns,
         omit_name_column=omit_name_column,
+        reader=reader,
     )
 
 
@@ -794,7 +823,10 @@ def push_qlib_score_csvs_by_name_rule(
     insert_batch_rows: int = 80,
     match_dolt_columns: bool = True,
 ) -> None:
-    """``qlib_score_csv`` 下**递归**遍历所有子目录中的 .csv（默认排除 ``total.csv``）；上传前会去掉 ``name`` 列（INSERT 不包含）。"""
+    """
+    ``qlib_score_csv`` 下**递归**遍历所有子目录中的 .csv（默认排除 ``total.csv``）；上传前会去掉 ``name`` 列（INSERT 不包含）。
+    结果目录带 Parquet 打分库时按分区读取，不再解析 CSV。
+    """
     other = "push_qlib_score_filter_ret" if not name_contains_filter else "push_qlib_score_ret"
     push_csv_group_by_name_rule(
         table,
@@ -811,6 +843,7 @@ def push_qlib_score_csvs_by_name_rule(
         insert_batch_rows=insert_batch_rows,
         match_dolt_columns=match_dolt_columns,
         omit_name_column=True,
+        reader=_read_qlib_score_normalized,
     )
 
 
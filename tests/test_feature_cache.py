@@ -0,0 +1,101 @@
+import os
+import sys
+from pathlib import Path
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from feature_cache import FeatureCache, handler_key, panel_handler, widest_panel
+from myconfig import get_dataset_config, get_my_config
+
+
+def _handler(dataset_class="Alpha158", train=("2020-01-01", "2020-12-31"), **handler_kwargs):
+    handler_kwargs.setdefault("instruments", "csi300")
+    return get_dataset_config(dataset_class=dataset_class, train=train, handler_kwargs=handler_kwargs)["kwargs"]["handler"]
+
+
+def test_handler_key_ignores_fit_window_for_alpha158():
+    """Alpha158 默认处理器与 fit 区间无关，不同训练窗口应命中同一份缓存"""
+    a = _handler(train=("2020-01-01", "2020-12-31"))
+    b = _handler(train=("2021-01-01", "2021-12-31"))
+    assert handler_key(a) == handler_key(b)
+
+
+def test_handler_key_keeps_fit_window_when_needed():
+    # Alpha360 默认带 ZScoreNorm，fit 区间会影响结果
+    a = _handler("Alpha360", train=("2020-01-01", "2020-12-31"))
+    b = _handler("Alpha360", train=("2021-01-01", "2021-12-31"))
+    assert handler_key(a) != handler_key(b)
+
+    # 显式配置处理器时也保留 fit 区间
+    procs = [{"class": "RobustZScoreNorm", "kwargs": {"fields_group": "feature"}}]
+    a = _handler(train=("2020-01-01", "2020-12-31"))
+    b = _handler(train=("2021-01-01", "2021-12-31"))
+    a["kwargs"]["infer_processors"] = procs
+    b["kwargs"]["infer_processors"] = procs
+    assert handler_key(a) != handler_key(b)
+
+
+def test_handler_key_depends_on_instruments():
+    assert handler_key(_handler(instruments="csi300")) != handler_key(_handler(instruments="csi100"))
+
+
+def test_cached_task(tmp_path):
+    cache = FeatureCache(tmp_path, data_version="2024-01-02")
+    task = get_my_config("LightGBM", "Alpha158", "csi300")
+
+    # 缓存不存在时原样返回
+    assert cache.cached_task(task) is task
+
+    path = cache.path_for(task["dataset"]["kwargs"]["handler"])
+    path.write_bytes(b"")
+    exec_task = cache.cached_task(task)
+    assert exec_task["dataset"]["kwargs"]["handler"] == f"file://{path}"
+    # 原始 task 不被修改
+    assert isinstance(task["dataset"]["kwargs"]["handler"], dict)
+
+
+def test_clean_stale(tmp_path):
+    old = tmp_path / "2024-01-01_Alpha158_csi300_abc.pkl"
+    old.write_bytes(b"")
+    cur = tmp_path / "2024-01-02_Alpha158_csi300_abc.pkl"
+    cur.write_bytes(b"")
+
+    FeatureCache(tmp_path, data_version="2024-01-02").clean_stale()
+    assert not old.exists()
+    assert cur.exists()
+
+
+def test_widest_panel_only_in_exec_task(tmp_path):
+    tasks = []
+    for train, test in [(("2024-01-01", "2024-09-30"), ("2024-12-01", "2024-12-31")),
+                        (("2020-01-01", "2024-06-30"), ("2024-09-01", "2024-12-31"))]:
+        task = get_my_config("LightGBM", "Alpha158", "csi300")
+        task["dataset"]["kwargs"]["segments"] = {"train": train, "valid": train, "test": test}
+        tasks.append(task)
+
+    panel = widest_panel(tasks)
+    assert panel == ("2020-01-01", "2024-12-31")
+    handlers = [panel_handler(t["dataset"]["kwargs"]["handler"], panel) for t in tasks]
+    for h in handlers:
+        assert h["kwargs"]["start_time"] == "2020-01-01"
+        assert h["kwargs"]["end_time"] == "2024-12-31"
+    # 各窗口命中同一份缓存
+    assert handler_key(handlers[0]) == handler_key(handlers[1])
+
+    cache = FeatureCache(tmp_path, data_version="v1")
+    cache.path_for(handlers[0]).write_bytes(b"")
+    exec_task = cache.cached_task(tasks[0], panel)
+    assert exec_task["dataset"]["kwargs"]["handler"] == f"file://{cache.path_for(handlers[0])}"
+    assert exec_task["dataset"]["kwargs"]["segments"]["train"] == ("2024-01-01", "2024-09-30")
+    # 不共享面板时不命中加宽后的缓存；保存到 recorder 的原始 task 不变
+    assert cache.cached_task(tasks[0]) is tasks[0]
+    assert tasks[0]["dataset"]["kwargs"]["handler"]["kwargs"]["start_time"] == "2018-01-01"
+
+    # 处理器依赖 fit 区间的 handler 不加宽
+    fitted = dict(tasks[0]["dataset"]["kwargs"]["handler"])
+    fitted["kwargs"] = dict(fitted["kwargs"], learn_processors=[])
+    assert panel_handler(fitted, panel) is fitted
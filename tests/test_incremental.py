@@ -0,0 +1,127 @@
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from myconfig import get_my_config
+from train_incremental import plan_incremental, warm_start
+from train_manifest import TrainManifest
+
+
+def _task(model_name="LightGBM", train=("2025-01-03", "2026-01-02")):
+    task = get_my_config(model_name, "Alpha158", "csi300")
+    task["dataset"]["kwargs"]["segments"] = {
+        "train": train,
+        "valid": ("2026-01-03", "2026-03-02"),
+        "test": ("2026-03-03", "2026-04-02"),
+    }
+    return task
+
+
+def _recorder(rid, task, tags=None, end_time="2026-01-01 20:00:00"):
+    rec = MagicMock()
+    rec.id = rid
+    rec.task = task
+    rec.list_tags.return_value = tags or {}
+    rec.info = {"end_time": end_time}
+    return rec
+
+
+def _exp(recorders):
+    exp = MagicMock()
+    exp.get_recorder.side_effect = lambda recorder_id: next(r for r in recorders if r.id == recorder_id)
+    return exp
+
+
+def _manifest(tmp_path, recorders):
+    manifest = TrainManifest(tmp_path / "train_manifest.json")
+    manifest.update({
+        rec.id: {
+            "complete": True,
+            "train": [str(t) for t in rec.task["dataset"]["kwargs"]["segments"]["train"]],
+            "model": rec.task["model"]["class"],
+        }
+        for rec in recorders
+    })
+    return manifest
+
+
+def test_plan_incremental_uses_latest_same_window(tmp_path):
+    old = _recorder("old", _task(train=("2025-01-01", "2025-12-31")))
+    base = _recorder("base", _task(train=("2025-01-02", "2026-01-01")))
+    # 长度不同的窗口、不同模型都不能作为续训基础
+    other = _recorder("other", _task(train=("2023-01-02", "2026-01-01")))
+    xgb = _recorder("xgb", _task("XGBoost", train=("2025-01-03", "2026-01-02")))
+    recorders = [old, base, other, xgb]
+
+    exp = _exp(recorders)
+    planned = plan_incremental([_task()], exp, _manifest(tmp_path, recorders), full_every=7, today="2026-01-03")
+    inc = planned[0]["incremental"]
+    assert inc["base_recorder"] == "base"
+    assert inc["new_rows"] == ("2026-01-02", "2026-01-02")
+    assert inc["full_train_date"] == "2026-01-01"
+    # 只读训练清单，不逐个加载 recorder 的 task
+    exp.list_recorders.assert_not_called()
+    exp.get_recorder.assert_called_once_with(recorder_id="base")
+
+
+def test_plan_incremental_falls_back_to_full(tmp_path):
+    base = _recorder("base", _task(train=("2025-01-02", "2026-01-01")), tags={"full_train_date": "2025-12-20"})
+    tasks = [_task(), _task("Linear")]
+
+    # 距上次全量训练已满 7 天 / 不支持增量的模型 -> 全量
+    planned = plan_incremental(tasks, _exp([base]), _manifest(tmp_path / "a", [base]), full_every=7, today="2026-01-03")
+    assert all("incremental" not in task for task in planned)
+
+    # 实验中没有可续训的模型 -> 全量
+    planned = plan_incremental([_task()], _exp([]), _manifest(tmp_path / "b", []), full_every=7, today="2026-01-03")
+    assert "incremental" not in planned[0]
+
+
+def _fake_dataset(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(n, 4))
+    y = x[:, 0] + rng.normal(scale=0.1, size=n)
+    columns = pd.MultiIndex.from_tuples(
+        [("feature", f"f{i}") for i in range(4)] + [("label", "LABEL0")]
+    )
+    df = pd.DataFrame(np.column_stack([x, y]), columns=columns)
+    dataset = MagicMock()
+    dataset.prepare.return_value = df
+    return dataset, x, y
+
+
+def test_warm_start_lightgbm_appends_trees():
+    import lightgbm as lgb
+    from qlib.contrib.model.gbdt import LGBModel
+
+    _, x, y = _fake_dataset()
+    model = LGBModel(loss="mse", num_threads=1)
+    model.model = lgb.train(model.params, lgb.Dataset(x, label=y), num_boost_round=10)
+
+    dataset, _, _ = _fake_dataset(seed=1)
+    warm_start(model, dataset, rounds=5)
+    assert model.model.num_trees() == 15
+
+    warm_start(model, dataset, mode="refit")
+    assert model.model.num_trees() == 15
+
+
+def test_warm_start_skips_empty_rows():
+    from qlib.contrib.model.gbdt import LGBModel
+
+    model = LGBModel(loss="mse")
+    booster = object()
+    model.model = booster
+    dataset = MagicMock()
+    dataset.prepare.return_value = pd.DataFrame()
+    assert warm_start(model, dataset).model is booster
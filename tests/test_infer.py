@@ -0,0 +1,152 @@
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from model_infer import InferJob, group_jobs, inference_dataset_config, run_grouped_inference
+from myconfig import get_my_config
+
+
+def _task(dataset_name="Alpha158", train=("2020-01-01", "2022-12-31"), start_time="2020-01-01"):
+    task = get_my_config("LightGBM", dataset_name, "csi300")
+    task["dataset"]["kwargs"]["segments"] = {
+        "train": train,
+        "valid": ("2023-01-01", "2023-06-30"),
+        "test": ("2023-07-01", "2023-12-31"),
+    }
+    h_kwargs = task["dataset"]["kwargs"]["handler"]["kwargs"]
+    h_kwargs["start_time"], h_kwargs["end_time"] = start_time, "2023-12-31"
+    h_kwargs["fit_start_time"], h_kwargs["fit_end_time"] = train
+    return task
+
+
+def test_inference_config_trims_fit_free_handler():
+    config = inference_dataset_config(_task(), "2024-01-02", "2024-01-05")
+    h_kwargs = config["kwargs"]["handler"]["kwargs"]
+    assert config["kwargs"]["segments"]["test"] == (pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-05"))
+    assert h_kwargs["start_time"] == pd.Timestamp("2024-01-02")
+    assert h_kwargs["end_time"] == pd.Timestamp("2024-01-05")
+
+    # Alpha360 的处理器依赖 fit 区间，handler 需保留原始起点
+    config = inference_dataset_config(_task("Alpha360"), "2024-01-02", "2024-01-05")
+    assert config["kwargs"]["handler"]["kwargs"]["start_time"] == "2020-01-01"
+
+
+def test_group_jobs_by_effective_handler():
+    configs = [
+        inference_dataset_config(_task(train=("2020-01-01", "2022-12-31")), "2024-01-02", "2024-01-05"),
+        inference_dataset_config(_task(train=("2019-01-01", "2022-12-31"), start_time="2019-01-01"), "2024-01-02", "2024-01-05"),
+        inference_dataset_config(_task("Alpha360"), "2024-01-02", "2024-01-05"),
+        inference_dataset_config(_task("Alpha360", train=("2019-01-01", "2022-12-31")), "2024-01-02", "2024-01-05"),
+    ]
+    jobs = [InferJob("exp", f"rid_{i}", MagicMock(), config) for i, config in enumerate(configs)]
+    groups = group_jobs(jobs)
+    # 两个 Alpha158 窗口共用一份；两个 Alpha360 窗口 fit 区间不同，各自一份
+    assert sorted(len(g) for g in groups.values()) == [1, 1, 2]
+
+
+def test_run_grouped_inference_builds_dataset_once_per_group():
+    config = inference_dataset_config(_task(), "2024-01-02", "2024-01-05")
+    jobs = []
+    for i in range(3):
+        rec = MagicMock()
+        rec.load_object.return_value.predict.return_value = pd.Series([float(i)])
+        jobs.append(InferJob("exp", f"rid_{i}", rec, config))
+
+    with patch("model_infer.init_instance_by_config") as mock_init:
+        results = run_grouped_inference(jobs)
+    assert mock_init.call_count == 1
+    assert [r[1] for r in results] == ["rid_0", "rid_1", "rid_2"]
+    assert [r[2].iloc[0] for r in results] == [0.0, 1.0, 2.0]
+
+
+def _fake_worker_init(*args):
+    pass
+
+
+def _fake_worker_predict(exp_name, rid, dataset_config):
+    if rid == "rid_bad":
+        raise RuntimeError("broken model")
+    return pd.Series([float(rid[-1])])
+
+
+def test_run_parallel_inference_keeps_order_and_skips_failures():
+    import multiprocessing
+    from model_infer import run_parallel_inference
+
+    config = inference_dataset_config(_task(), "2024-01-02", "2024-01-05")
+    jobs = [InferJob("exp", rid, None, config) for rid in ["rid_1", "rid_bad", "rid_2", "rid_3"]]
+    with patch("model_infer._infer_worker_init", _fake_worker_init), \
+         patch("model_infer._infer_worker_predict", _fake_worker_predict), \
+         patch("model_infer._share_group_dataset", return_value=config):
+        results = list(run_parallel_inference(
+            jobs, workers=2, threads=1, mp_context=multiprocessing.get_context("fork"),
+            provider_uri="~/fake_data", uri_folder="~/mlruns",
+        ))
+    assert [r[1] for r in results] == ["rid_1", "rid_2", "rid_3"]
+    assert [r[2].iloc[0] for r in results] == [1.0, 2.0, 3.0]
+
+
+def test_limit_model_threads():
+    import numpy as np
+    import lightgbm as lgb
+    import xgboost as xgb
+    from model_infer import limit_model_threads
+
+    x, y = np.random.rand(50, 3), np.random.rand(50)
+    lgb_model = MagicMock(model=lgb.train({"verbosity": -1, "num_threads": 8}, lgb.Dataset(x, label=y), 2))
+    limit_model_threads(lgb_model, 2)
+    assert lgb_model.model.predict.keywords == {"num_threads": 2}
+    assert len(lgb_model.model.predict(x)) == 50
+
+    xgb_model = MagicMock(model=xgb.train({"nthread": 8}, xgb.DMatrix(x, label=y), 2))
+    limit_model_threads(xgb_model, 2)
+    assert '"nthread":"2"' in xgb_model.model.save_config().replace(" ", "")
+
+
+def test_aggregate_scores_matches_groupby_apply_exactly():
+    import numpy as np
+    from model_infer import aggregate_scores
+
+    rng = np.random.default_rng(0)
+    n = 3000
+    df = pd.DataFrame({
+        "datetime": pd.to_datetime("2024-01-02") + pd.to_timedelta(rng.integers(0, 3, n), unit="D"),
+        "instrument": rng.choice([f"SH{600000 + i}" for i in range(40)], n),  # 每组模型数不等
+        "score": rng.normal(0, 0.01, n),
+        "weight": rng.random(n),
+    })
+    df.loc[::97, "score"] = np.nan
+    df.loc[df["instrument"] == "SH600000", "weight"] = 0.0
+
+    expected = (
+        df.groupby(["datetime", "instrument"])
+        .apply(lambda g: pd.Series({
+            "avg_score": (g["score"] * g["weight"]).sum() / g["weight"].sum()
+            if g["weight"].sum() != 0 else g["score"].mean(),
+            "pos_ratio": (g["score"] > 0).mean(),
+        }))
+        .reset_index()
+    )
+    pd.testing.assert_frame_equal(aggregate_scores(df), expected, check_exact=True)
+
+
+def test_predict_chunks_union_and_split():
+    from model_infer import predict_chunks
+
+    calendar = pd.bdate_range("2024-01-01", "2024-03-29")
+    ranges = [("2024-01-01", "2024-01-12"), ("2024-01-08", "2024-01-19"), ("2024-03-01", "2024-03-05")]
+    chunks = predict_chunks(ranges, calendar, chunk_days=4)
+    days = [d for s, e in chunks for d in calendar[(calendar >= s) & (calendar <= e)]]
+    # 重叠区间只算一次，两段不相邻区间之间的空档不计算
+    assert days == list(calendar[(calendar <= "2024-01-19")]) + list(calendar[(calendar >= "2024-03-01") & (calendar <= "2024-03-05")])
+    assert [len(calendar[(calendar >= s) & (calendar <= e)]) for s, e in chunks] == [4, 4, 4, 3, 3]
+    assert predict_chunks([("2024-06-01", "2024-06-30")], calendar, 4) == []
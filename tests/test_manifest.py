@@ -0,0 +1,117 @@
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from train_manifest import (
+    TrainManifest,
+    build_manifest,
+    find_trained_hashes,
+    manifest_path,
+    recorder_entry,
+    task_hash,
+)
+
+
+def _task(train=("2025-01-01", "2025-12-31")):
+    return {
+        "model": {"class": "LGBModel"},
+        "dataset": {"kwargs": {"handler": {"class": "Alpha158"}, "segments": {"train": train}}},
+    }
+
+
+def _recorder(task, artifacts=("params.pkl", "sig_analysis", "task")):
+    ic = pd.Series([0.01, 0.03])
+    objects = {"task": task, "sig_analysis/ic.pkl": ic, "sig_analysis/ric.pkl": ic * 2}
+    rec = MagicMock()
+    rec.list_artifacts.return_value = list(artifacts)
+    rec.load_object.side_effect = lambda name: objects[name]
+    rec.info = {"start_time": "2026-01-01 10:00:00", "end_time": None}
+    return rec
+
+
+def test_manifest_update_and_remove(tmp_path):
+    manifest = TrainManifest(manifest_path(tmp_path, "123"))
+    assert not manifest.exists()
+    assert manifest.load() == {}
+
+    manifest.update({"a": recorder_entry(_recorder(_task()))})
+    manifest.update({"b": recorder_entry(_recorder(_task(("2024-01-01", "2024-12-31")), artifacts=["task"]))})
+    assert manifest.path == tmp_path / "123" / "train_manifest.json"
+    assert set(manifest.load()) == {"a", "b"}
+    # 只有 artifacts 完整的 recorder 算已训练
+    assert manifest.trained_segments() == [("2025-01-01", "2025-12-31")]
+
+    manifest.remove(["a"])
+    assert manifest.trained_segments() == []
+
+
+def test_recorder_entry_holds_ic_index():
+    entry = recorder_entry(_recorder(_task()))
+    assert entry["model"] == "LGBModel" and entry["dataset"] == "Alpha158"
+    ic, icir, rank_ic, rank_icir = entry["ic"]
+    assert round(ic, 6) == 0.02 and round(rank_ic, 6) == 0.04
+    assert icir == rank_icir
+    assert entry["start_time"] == "2026-01-01 10:00:00"
+    # 训练子进程中 end_time 尚未写入时用当前时间
+    assert entry["end_time"]
+
+
+def test_manifest_corrupt_file_is_empty(tmp_path):
+    manifest = TrainManifest(tmp_path / "train_manifest.json")
+    manifest.path.write_text("{not json")
+    assert manifest.load() == {}
+
+
+def test_recorder_entry_skips_task_pickle_when_incomplete():
+    rec = _recorder(_task(), artifacts=[])
+    assert recorder_entry(rec) == {"complete": False}
+    rec.load_object.assert_not_called()
+
+
+def test_task_hash_includes_incremental_base():
+    task = _task()
+    inc_task = dict(task, incremental={"base_recorder": "x", "new_rows": ("2025-12-31", "2025-12-31")})
+    # 增量训练的模型取决于基础 recorder，不能与同区间的全量训练互相去重
+    assert task_hash(task) != task_hash(inc_task)
+    assert task_hash(inc_task) != task_hash(dict(task, incremental=dict(inc_task["incremental"], base_recorder="y")))
+    assert task_hash(task) != task_hash(_task(("2024-01-01", "2024-12-31")))
+
+
+def test_task_hash_ignores_thread_budget():
+    task = _task()
+    task["model"]["kwargs"] = {"learning_rate": 0.1, "num_threads": 8}
+    budget_task = _task()
+    budget_task["model"]["kwargs"] = {"learning_rate": 0.1, "num_threads": 2}
+    assert task_hash(task) == task_hash(budget_task)
+
+    budget_task["model"]["kwargs"]["learning_rate"] = 0.2
+    assert task_hash(task) != task_hash(budget_task)
+
+
+def test_find_trained_hashes_across_experiments(tmp_path):
+    TrainManifest(manifest_path(tmp_path, "1")).update({"a": recorder_entry(_recorder(_task()))})
+    TrainManifest(manifest_path(tmp_path, "2")).update({"b": recorder_entry(_recorder(_task(), artifacts=[]), _task())})
+
+    hashes = find_trained_hashes(tmp_path)
+    # 未完成的 recorder 不参与查重
+    assert hashes == {task_hash(_task()): ("1", "a")}
+
+
+def test_build_manifest_backfills(tmp_path):
+    recs = {"a": _recorder(_task()), "b": _recorder(_task(), artifacts=[])}
+    exp = MagicMock()
+    exp.list_recorders.return_value = recs
+    exp.get_recorder.side_effect = lambda recorder_id: recs[recorder_id]
+
+    manifest = build_manifest(exp, TrainManifest(tmp_path / "train_manifest.json"))
+    assert manifest.load()["a"]["complete"] is True
+    assert manifest.load()["b"]["complete"] is False
@@ -58,10 +58,35 @@ def test_get_model_list(mock_get_exp, mock_list_exps, mock_cli_params):
     mock_exp.list_recorders.return_value = ["rid_1"]
     mock_get_exp.return_value = mock_exp
 
-    with patch.object(cli, '_is_valid_recorder', return_value=True):
+    # IC 统计来自训练清单索引，这里直接给出
+    with patch.object(cli, '_is_valid_recorder', return_value=True), \
+         patch.object(cli, 'get_ic_info', return_value=({}, [0.05, 0.1, 0.05, 0.2])):
         model_list = cli.get_model_list()
         assert len(model_list) == 1
         assert model_list[0].exp_name == "LGBM_Task"
+        assert cli.rid_rank_icir["rid_1"] == 0.2
+
+
+def test_rec_meta_reads_index_without_pickles(mock_cli_params, tmp_path):
+    from train_manifest import TrainManifest, manifest_path
+
+    mock_cli_params["uri_folder"] = str(tmp_path)
+    cli = ModelCLI(**mock_cli_params)
+    TrainManifest(manifest_path(tmp_path, "1")).update({
+        "rid_1": {
+            "complete": True, "train": ["2020-01-01", "2020-12-31"], "ic": [0.05, 0.5, 0.06, 0.6],
+            "model": "LGBModel", "dataset": "Alpha158",
+            "start_time": "2021-01-01 10:00:00", "end_time": "2021-01-01 10:05:00",
+        },
+    })
+    rec = MagicMock()
+    rec.id, rec.experiment_id = "rid_1", "1"
+
+    assert cli._is_valid_recorder(rec) is True
+    assert cli.get_ic_info(rec)[0] == {"IC": 0.05, "ICIR": 0.5, "Rank IC": 0.06, "Rank ICIR": 0.6}
+    assert cli.get_train_time(rec) == (["2020-01-01", "2020-12-31"], ["2021-01-01", "2021-01-01"])
+    rec.load_object.assert_not_called()
+    rec.list_artifacts.assert_not_called()
 
 def test_filter_ret_df_logic(mock_cli_params):
     cli = ModelCLI(**mock_cli_params)
@@ -71,3 +96,147 @@ def test_filter_ret_df_logic(mock_cli_params):
     })
     filtered = cli.filter_ret_df(df)
     assert len(filtered) == 1
+
+
+def test_alpha_data_reuses_inference_features(mock_cli_params):
+    from model_infer import inference_dataset_config
+    from myconfig import get_my_config
+    from modelcli import FILTER_FEATURES
+
+    cli = ModelCLI(**mock_cli_params)
+    config = inference_dataset_config(get_my_config("LightGBM", "Alpha158", "csi300"), "2023-01-01", "2023-01-05")
+    features = pd.DataFrame({c: [1.0] for c in FILTER_FEATURES + ["KMID"]})
+    dataset = MagicMock()
+    dataset.handler.fetch.return_value = features
+    cli._keep_alpha_features(config, dataset)
+
+    with patch('modelcli.Alpha158') as mock_handler, patch('modelcli.D') as mock_d:
+        assert cli.get_alpha_data() is features
+        assert list(cli.get_alpha_data(columns=FILTER_FEATURES).columns) == FILTER_FEATURES
+    mock_handler.assert_not_called()
+    mock_d.features.assert_not_called()
+
+    # 其他股票池的推理特征不复用
+    cli._alpha_features = {}
+    config = inference_dataset_config(get_my_config("LightGBM", "Alpha158", "csi500"), "2023-01-01", "2023-01-05")
+    cli._keep_alpha_features(config, dataset)
+    assert cli._alpha_features == {}
+
+
+def test_alpha_data_computes_only_filter_columns(mock_cli_params):
+    from modelcli import FILTER_FEATURES
+
+    cli = ModelCLI(**mock_cli_params)
+    index = pd.MultiIndex.from_tuples([("SH600000", pd.Timestamp("2023-01-03"))], names=["instrument", "datetime"])
+    with patch('modelcli.Alpha158') as mock_handler, patch('modelcli.D') as mock_d:
+        mock_d.features.return_value = pd.DataFrame([[0.0] * len(FILTER_FEATURES)], index=index)
+        df = cli.get_alpha_data(columns=FILTER_FEATURES)
+    mock_handler.assert_not_called()
+    assert mock_d.features.call_args[0][1] == [
+        "Std($close, 5)/$close", "Std($close, 20)/$close", "Std($close, 60)/$close",
+        "Ref($close, 10)/$close", "Ref($close, 20)/$close", "Ref($close, 60)/$close",
+    ]
+    assert list(df.columns) == FILTER_FEATURES
+    assert df.index.names == ["datetime", "instrument"]
+
+
+def test_selection_streams_each_chunk(mock_cli_params, tmp_path):
+    params = dict(mock_cli_params, analysis_folder=str(tmp_path), predict_chunk_days=2,
+                  predict_dates=[{"start": "2023-01-03", "end": "2023-01-05"}, {"start": "2023-01-05", "end": "2023-01-06"}])
+    cli = ModelCLI(**params)
+    calendar = pd.to_datetime(["2023-01-03", "2023-01-04", "2023-01-05", "2023-01-06"])
+
+    def _collect(results, dates):
+        return pd.DataFrame({"datetime": pd.date_range(dates["start"], dates["end"]), "instrument": "SH600000"})
+
+    with patch('modelcli.D') as mock_d, \
+         patch.object(cli, '_inference_recs', return_value=[]) as mock_recs, \
+         patch.object(cli, '_predict') as mock_predict, \
+         patch.object(cli, 'collect', side_effect=_collect), \
+         patch.object(cli, '_new_save_dir', return_value=tmp_path) as mock_dir, \
+         patch.object(cli, '_save_results') as mock_save, \
+         patch('modelcli.get_normalized_stock_list', return_value=None):
+        mock_d.calendar.return_value = calendar
+        cli.selection()
+
+    mock_recs.assert_called_once()
+    mock_dir.assert_called_once()
+    assert [(c.args[0], c.args[1]) for c in mock_predict.call_args_list] == [
+        (pd.Timestamp("2023-01-03"), pd.Timestamp("2023-01-04")),
+        (pd.Timestamp("2023-01-05"), pd.Timestamp("2023-01-06")),
+    ]
+    # 每块预测完立即写出
+    assert [len(c.args[0]) for c in mock_save.call_args_list] == [2, 2]
+
+
+def test_save_results_appends_total_csv(mock_cli_params, tmp_path):
+    from modelcli import FILTER_FEATURES
+
+    cli = ModelCLI(**mock_cli_params, score_store=False, ret_alpha_features=False)
+
+    def _chunk(date):
+        date = pd.Timestamp(date)
+        return pd.DataFrame({
+            "datetime": [date, date], "instrument": ["SH600000", "SH600001"],
+            "score": [0.1, 0.2], "exp_name": "exp", "rid": "rid1", "weight": 1.0, "real_label": [0.01, -0.01],
+        })
+
+    def _alpha(columns=None, dates=None):
+        index = pd.MultiIndex.from_product([[pd.Timestamp(dates["start"])], ["SH600000", "SH600001"]],
+                                           names=["datetime", "instrument"])
+        return pd.DataFrame(1.0, index=index, columns=FILTER_FEATURES)
+
+    with patch.object(cli, 'get_alpha_data', side_effect=_alpha):
+        for date in ("2023-01-03", "2023-01-04"):
+            cli._save_results(_chunk(date), tmp_path, None, {"start": date, "end": date})
+
+    raw = (tmp_path / "total.csv").read_bytes()
+    # 只在文件开头有一个 BOM，分块追加的行没有重复行号
+    assert raw.count(b"\xef\xbb\xbf") == 1 and raw.startswith(b"\xef\xbb\xbf")
+    total = pd.read_csv(tmp_path / "total.csv", encoding="utf-8-sig")
+    assert list(total.columns) == list(_chunk("2023-01-03").columns)
+    assert total["datetime"].tolist() == ["2023-01-03"] * 2 + ["2023-01-04"] * 2
+
+
+def test_analysis_returns_list_with_parallel_inference(mock_cli_params):
+    cli = ModelCLI(**mock_cli_params, infer_workers=2)
+    pred = pd.Series([0.1])
+    streamed = (r for r in [["exp", "rid1", pred], ["exp", "rid2", pred]])
+
+    with patch.object(cli, '_inference_jobs', return_value=[MagicMock(), MagicMock()]), \
+         patch('modelcli.run_parallel_inference', return_value=streamed):
+        results = cli.analysis("2023-01-03", "2023-01-04")
+
+    # 命令行入口拿到的是列表，可重复遍历 / 打印
+    assert isinstance(results, list)
+    assert [r[1] for r in results] == ["rid1", "rid2"]
+
+
+def test_analysis_predicts_only_missing_dates(mock_cli_params, tmp_path):
+    from model_infer import InferJob, inference_dataset_config
+    from myconfig import get_my_config
+
+    cli = ModelCLI(**mock_cli_params, predict_cache=True, predict_cache_dir=str(tmp_path))
+    calendar = pd.to_datetime(["2023-01-03", "2023-01-04", "2023-01-05"])
+    config = inference_dataset_config(get_my_config("LightGBM", "Alpha158", "csi300"), calendar[0], calendar[-1])
+    job = InferJob("exp", "rid1", MagicMock(), config)
+    index = pd.MultiIndex.from_product([calendar, ["SH600000"]], names=["datetime", "instrument"])
+    full = pd.Series([0.1, 0.2, 0.3], index=index)
+
+    def _run(jobs):
+        start, end = jobs[0].dataset_config["kwargs"]["segments"]["test"]
+        return [[j.exp_name, j.rid, full.loc[start:end]] for j in jobs]
+
+    with patch('modelcli.D') as mock_d, \
+         patch('modelcli.model_hash', return_value="a" * 64), \
+         patch.object(cli, '_inference_jobs', return_value=[job]), \
+         patch.object(cli, '_run_inference', side_effect=_run) as mock_run:
+        mock_d.calendar.return_value = calendar[:2]
+        cli.analysis(calendar[0], calendar[1])
+        mock_d.calendar.return_value = calendar
+        (_, rid, pred), = cli.analysis(calendar[0], calendar[-1])
+
+    # 第二次只预测缓存中没有的最后一日
+    assert mock_run.call_args_list[1].args[0][0].dataset_config["kwargs"]["segments"]["test"] == (calendar[2], calendar[2])
+    assert rid == "rid1"
+    pd.testing.assert_series_equal(pred, full)
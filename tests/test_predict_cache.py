@@ -0,0 +1,74 @@
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from predict_cache import PredictionCache, instruments_key, model_hash
+
+
+def _pred(dates, instruments=("SH600000", "SH600001")):
+    index = pd.MultiIndex.from_product([pd.to_datetime(dates), list(instruments)], names=["datetime", "instrument"])
+    return pd.Series(range(len(index)), index=index, dtype="float64", name="score")
+
+
+def test_put_get_by_date(tmp_path):
+    cache = PredictionCache(tmp_path)
+    dates = pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"])
+    pred = _pred(dates[:2])
+    cache.put("rid1", "a" * 64, "k", pred, dates)
+
+    hits = cache.get("rid1", "a" * 64, "k", dates)
+    # 没有预测结果的日期不写入，下次重新预测
+    assert sorted(hits) == list(dates[:2])
+    pd.testing.assert_series_equal(pd.concat([hits[d] for d in dates[:2]]), pred)
+    # 模型哈希、股票池或数据版本不同则不命中
+    assert cache.get("rid1", "b" * 64, "k", dates) == {}
+    assert cache.get("rid1", "a" * 64, "other", dates) == {}
+    assert PredictionCache(tmp_path, data_version="v2").get("rid1", "a" * 64, "k", dates) == {}
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = PredictionCache(tmp_path)
+    dates = pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"])
+    for i, date in enumerate(dates):
+        cache.put("rid1", "a" * 64, "k", _pred([date], [f"SH6{j:05d}" for j in range(200)]), [date])
+        path = next(cache.cache_dir.glob(f"*/*/{date.date()}.pkl"))
+        os.utime(path, (1000 + i, 1000 + i))
+    # 最早写入的日期刚被读取过，不应被淘汰
+    cache.get("rid1", "a" * 64, "k", dates[:1])
+
+    cache.max_bytes = cache.size_bytes() - 1
+    assert cache.evict() == 1
+    assert sorted(cache.get("rid1", "a" * 64, "k", dates)) == [dates[0], dates[2]]
+
+
+def test_invalidate_and_keys(tmp_path):
+    cache = PredictionCache(tmp_path)
+    date = pd.Timestamp("2024-01-02")
+    for rid in ("rid1", "rid2"):
+        cache.put(rid, "a" * 64, "k", _pred([date]), [date])
+    assert cache.invalidate(["rid1"]) == 1
+    assert cache.get("rid1", "a" * 64, "k", [date]) == {}
+    assert cache.invalidate() == 1
+    assert cache.size_bytes() == 0
+
+    handler = {"class": "Alpha158", "kwargs": {"instruments": "csi300"}}
+    assert instruments_key({"kwargs": {"handler": handler}}) != instruments_key(
+        {"kwargs": {"handler": {"class": "Alpha158", "kwargs": {"instruments": "csi500"}}}}
+    )
+
+    rec_dir = tmp_path / "rec"
+    (rec_dir / "artifacts").mkdir(parents=True)
+    rec = MagicMock()
+    rec.get_local_dir.return_value = str(rec_dir)
+    assert model_hash(rec) is None
+    (rec_dir / "artifacts" / "params.pkl").write_bytes(b"model")
+    assert len(model_hash(rec)) == 64
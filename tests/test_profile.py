@@ -0,0 +1,60 @@
+import os
+import sys
+from pathlib import Path
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+import pytest
+
+from train_profile import StageProfiler, load_profile, previous_profile_path, stage_stats, summarize_profile
+
+
+def test_span_records_stage_even_on_error():
+    profiler = StageProfiler()
+    with profiler.span("handler"):
+        sum(range(1000))
+    with pytest.raises(ValueError):
+        with profiler.span("fit"):
+            raise ValueError("boom")
+
+    assert [s["stage"] for s in profiler.spans] == ["handler", "fit"]
+    for span in profiler.spans:
+        assert span["wall"] >= 0 and span["cpu"] >= 0 and span["peak_rss_mb"] > 0
+
+
+def test_dump_appends_json_lines(tmp_path):
+    path = tmp_path / "run.jsonl"
+    for seconds in (1.0, 2.0):
+        profiler = StageProfiler()
+        with profiler.span("fit"):
+            pass
+        profiler.dump(path, status="ok", seconds=seconds)
+
+    records = load_profile(path)
+    assert [r["seconds"] for r in records] == [1.0, 2.0]
+    assert records[0]["stages"][0]["stage"] == "fit"
+
+
+def test_stage_stats_and_previous_run(tmp_path, capsys):
+    records = [
+        {"stages": [{"stage": "fit", "wall": 2.0, "cpu": 1.5, "peak_rss_mb": 300}]},
+        {"stages": [{"stage": "fit", "wall": 4.0, "cpu": 3.5, "peak_rss_mb": 500}]},
+    ]
+    stats = stage_stats(records)
+    assert stats["fit"]["tasks"] == 2
+    assert stats["fit"]["mean_wall"] == 3.0
+    assert stats["fit"]["peak_rss_mb"] == 500
+
+    old = tmp_path / "20260101_000000_1.jsonl"
+    new = tmp_path / "20260102_000000_1.jsonl"
+    old.write_text('{"stages": [{"stage": "fit", "wall": 2.0, "cpu": 2.0, "peak_rss_mb": 300}]}\n')
+    new.write_text('{"stages": [{"stage": "fit", "wall": 3.0, "cpu": 3.0, "peak_rss_mb": 300}]}\n')
+    assert previous_profile_path(new) == old
+    assert previous_profile_path(old) is None
+
+    summarize_profile(new)
+    assert "+50%" in capsys.readouterr().out
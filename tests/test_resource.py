@@ -0,0 +1,53 @@
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from myconfig import get_model_config
+from train_resource import (
+    allocate_threads,
+    apply_thread_budget,
+    get_core_budget,
+    threads_per_fit,
+)
+
+
+def test_get_core_budget():
+    assert get_core_budget(8) == 8
+    with patch("train_resource.os.cpu_count", return_value=16):
+        assert get_core_budget(None) == 16
+
+
+def test_threads_per_fit():
+    assert threads_per_fit(16, 1) == 16
+    assert threads_per_fit(16, 4) == 4
+    assert threads_per_fit(16, 3) == 5
+    # 并发数超过核数时至少保留 1 线程
+    assert threads_per_fit(4, 8) == 1
+
+
+def test_apply_thread_budget_rewrites_each_model():
+    for name, key in [("LightGBM", "num_threads"), ("XGBoost", "nthread"),
+                      ("CatBoost", "thread_count"), ("DoubleEnsemble", "num_threads")]:
+        task = {"model": get_model_config(name)}
+        new_task = apply_thread_budget(task, 4)
+        assert new_task["model"]["kwargs"][key] == 4
+        # 原始配置不被修改
+        assert get_model_config(name)["kwargs"][key] == 20
+
+
+def test_apply_thread_budget_without_thread_kwargs():
+    task = {"model": get_model_config("Linear")}
+    assert apply_thread_budget(task, 4) is task
+
+
+def test_allocate_threads():
+    tasks = [{"model": get_model_config("XGBoost")}] * 2
+    new_tasks = allocate_threads(tasks, concurrency=4, core_budget=16)
+    assert [t["model"]["kwargs"]["nthread"] for t in new_tasks] == [4, 4]
@@ -0,0 +1,205 @@
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+import pandas as pd
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from model_review import ModelReviewHelper, profit_num_list, topk_backtest, topk_review_metrics
+from review_cache import ReviewCache
+
+TRADE_DATES = ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05", "2024-01-08"]
+
+
+def _helper():
+    cli = MagicMock(kwargs={"provider_uri": "~/fake_data"})
+    with patch("model_review.TradeDate") as mock_trade_date:
+        trade_date = mock_trade_date.return_value
+        trade_date.get_trade_date_list.return_value = TRADE_DATES
+        trade_date.get_next_date.side_effect = lambda d, i: TRADE_DATES[min(TRADE_DATES.index(d) + i, len(TRADE_DATES) - 1)]
+        helper = ModelReviewHelper(cli)
+    return helper, cli
+
+
+def _panel():
+    index = pd.MultiIndex.from_product(
+        [pd.to_datetime(TRADE_DATES), ["SH600000", "SH600001"]], names=["datetime", "instrument"]
+    )
+    n = len(index)
+    return pd.DataFrame(
+        {"real_label": [0.01 * i for i in range(n)], "close": range(n), "open": range(n),
+         "high": range(n), "low": range(n)},
+        index=index,
+    ).astype("float32")  # 与 D.features 一致
+
+
+def test_preload_panel_covers_all_subdirs(tmp_path):
+    helper, cli = _helper()
+    subdirs = []
+    for date in ("2024-01-03", "2024-01-02", "2023-12-29"):  # 最后一个不在交易日历中
+        subdir = tmp_path / f"selection_{date.replace('-', '')}_10_00_00"
+        subdir.mkdir()
+        (subdir / f"{date}_ret.csv").write_text("")
+        subdirs.append(subdir)
+    cli.get_review_panel.return_value = _panel()
+
+    helper._preload_panel(subdirs)
+    cli.get_review_panel.assert_called_once_with(dates={"start": "2024-01-02", "end": "2024-01-05"})
+
+    real_df = helper._real_label("2024-01-03")
+    assert list(real_df.columns) == ["instrument", "real_label"]
+    assert real_df["real_label"].tolist() == pytest.approx([0.02, 0.03])
+    n1 = helper._original_data("2024-01-04")
+    assert list(n1.columns) == ["instrument", "close", "open", "high", "low"]
+    assert n1["close"].tolist() == [4.0, 5.0]
+    cli.get_real_label.assert_not_called()
+    cli.get_orignal_data.assert_not_called()
+
+
+def test_panel_falls_back_to_per_day_query():
+    helper, cli = _helper()
+    index = pd.MultiIndex.from_tuples([("SH600000", pd.Timestamp("2024-01-08"))], names=["instrument", "datetime"])
+    cli.get_real_label.return_value = pd.DataFrame({"real_label": [0.1]}, index=index)
+
+    # 未加载面板
+    assert helper._real_label("2024-01-08")["real_label"].tolist() == [0.1]
+    # 面板中没有该日
+    helper.panel = _panel().drop(index=pd.Timestamp("2024-01-08"), level="datetime")
+    helper._original_data("2024-01-08")
+    cli.get_orignal_data.assert_called_once_with(dates={"start": "2024-01-08", "end": "2024-01-08"})
+
+
+def test_topk_metrics_match_per_k_loop():
+    rng = np.random.default_rng(0)
+    n = 37
+    close = rng.uniform(5, 50, n)
+    df = pd.DataFrame({
+        "avg_score": np.round(rng.uniform(0, 0.02, n), 3),  # 含并列分数
+        "real_label": rng.normal(0, 0.02, n),
+        "n1close": close,
+        "n2high": close * (1 + np.abs(rng.normal(0, 0.05, n))),
+    })
+    df.loc[[3, 10], ["real_label", "n2high"]] = np.nan
+    top_nums = [1, 10, 30, 50]  # 50 超过股票数
+    profit_nums = [0.005 * i for i in range(1, 21)]
+
+    result = topk_review_metrics(df, top_nums, profit_nums)
+    assert result.index[0] == "止盈0.5%胜率" and result.index[-2:].tolist() == ["持有一天平均收益", "一天正收益占比"]
+    for k in top_nums:
+        topk = df.sort_values(by="avg_score", ascending=False).head(k)
+        expected = [(topk["n2high"] > topk["n1close"] * (1 + p)).sum() / len(topk) for p in profit_nums]
+        expected += [topk["real_label"].mean(), ((topk["real_label"] * topk["avg_score"]) > 0).sum() / len(topk)]
+        assert result[f"Top{k}"].tolist() == expected
+
+    # D.features 的价格为 float32：涨停附近 n2high ≈ n1close * 1.1，须按 float32 比较才与逐列计算一致
+    close = rng.uniform(5, 50, 400).astype(np.float32)
+    limit_df = pd.DataFrame({
+        "avg_score": rng.uniform(0, 0.02, 400),
+        "real_label": rng.normal(0, 0.02, 400),
+        "n1close": close,
+        "n2high": (close.astype(np.float64) * 1.1).astype(np.float32),
+    })
+    assert limit_df["n2high"].dtype == np.float32
+    result = topk_review_metrics(limit_df, [80, 100, 400])
+    for k in (80, 100, 400):
+        topk = limit_df.sort_values(by="avg_score", ascending=False).head(k)
+        assert result.loc["止盈10%胜率", f"Top{k}"] == (topk["n2high"] > topk["n1close"] * (1 + 0.1)).sum() / len(topk)
+
+    # 默认止盈线与原先的行名一致
+    assert topk_review_metrics(df).index[:10].tolist() == [f"止盈{i}%胜率" for i in range(1, 11)]
+    assert len(profit_num_list) == 10
+
+
+def test_review_cache_only_recomputes_changed_dirs(tmp_path):
+    helper, cli = _helper()
+    subdirs = []
+    for date in ("2024-01-02", "2024-01-05"):  # 后者还缺下下个交易日，不能复盘
+        subdir = tmp_path / f"selection_{date.replace('-', '')}_10_00_00"
+        subdir.mkdir()
+        for kind in ("ret", "filter_ret"):
+            (subdir / f"{date}_{kind}.csv").write_text("instrument,avg_score\nSH600000,0.1\n")
+        subdirs.append(subdir)
+
+    def _review(subdirs):
+        for subdir in subdirs:
+            result = (pd.DataFrame({"a": [1]}), pd.DataFrame({"a": [2]})) if subdir.name.startswith("selection_20240102") else None
+            yield subdir, f"## {subdir.name}\n", result
+
+    cache = ReviewCache(tmp_path / "cache")
+    with patch.object(helper, "_run_reviews", side_effect=_review) as mock_review:
+        start = len(helper.review_result_string)
+        assert helper._review_cached_subdirs(subdirs, cache) == set()
+        assert mock_review.call_args.args[0] == subdirs
+        first_report = helper.review_result_string[start:]
+
+        # 第二次只重算不能缓存的目录，报告与结果不变
+        helper.review_result_string, helper.review_result_df, helper.review_result_df_filter = "", {}, {}
+        assert helper._review_cached_subdirs(subdirs, cache) == {subdirs[0].name}
+        assert mock_review.call_args.args[0] == [subdirs[1]]
+        assert helper.review_result_string == first_report
+        assert helper.review_result_df_filter[subdirs[0].name]["a"].tolist() == [2]
+
+        # 打分文件变化后重新复盘
+        (subdirs[0] / "2024-01-02_ret.csv").write_text("instrument,avg_score\nSH600000,0.2\n")
+        assert helper._review_cached_subdirs(subdirs, cache) == set()
+        assert mock_review.call_args.args[0] == subdirs
+    cli.get_review_panel.assert_called()
+
+
+def test_parallel_review_matches_serial(tmp_path):
+    helper, _ = _helper()
+    helper.panel = _panel()
+    subdirs = []
+    for date, scores in (("2024-01-03", [0.2, 0.1]), ("2024-01-02", [0.3, -0.1]), ("2024-01-08", [0.1, 0.2])):
+        subdir = tmp_path / f"selection_{date.replace('-', '')}_10_00_00"
+        subdir.mkdir()
+        df = pd.DataFrame({"instrument": ["SH600000", "SH600001"], "avg_score": scores, "datetime": date, "KMID": 0.0})
+        for kind in ("ret", "filter_ret"):
+            df.to_csv(subdir / f"{date}_{kind}.csv", index=False)
+        subdirs.append(subdir)
+    helper.trade_date.get_date_index.side_effect = TRADE_DATES.index
+
+    serial = list(helper._run_reviews(subdirs))
+    helper.kwargs["review_workers"] = 2
+    parallel = list(helper._run_reviews(subdirs))
+
+    assert [(s.name, md) for s, md, _ in parallel] == [(s.name, md) for s, md, _ in serial]
+    assert serial[2][2] is None and "还不能复盘 2024-01-08" in serial[2][1]
+    for (_, _, a), (_, _, b) in zip(serial[:2], parallel[:2]):
+        pd.testing.assert_frame_equal(a[0], b[0])
+        pd.testing.assert_frame_equal(a[1], b[1])
+
+
+def test_topk_backtest_turnover_and_equity():
+    df_ret = {
+        "2024-01-02": pd.DataFrame({"instrument": ["A", "B", "C"], "real_label": [0.01, 0.02, np.nan]}),
+        "2024-01-03": pd.DataFrame({"instrument": ["B", "D"], "real_label": [0.03, -0.01]}),  # 不足 K 只
+        "2024-01-04": pd.DataFrame({"instrument": ["D", "E"], "real_label": [np.nan, np.nan]}),  # 还没有真实收益
+    }
+    csi300_df = pd.DataFrame({"datetime": pd.to_datetime(["2024-01-02", "2024-01-04"]), "csi300_real_label": [0.01, 0.02]})
+
+    results = topk_backtest(df_ret, csi300_df, list(df_ret), top_nums=[2, 3])
+    top2, top3 = results[2], results[3]
+    # 没有收益数据的最后一日不计入净值
+    assert top2["date"].tolist() == ["2024-01-02", "2024-01-03"]
+    assert list(top2.columns) == [
+        "date", "top1", "top2", "avg_real_label", "csi300_real_label", "turnover_rate",
+        "daily_net_ret", "strategy_equity", "csi300_equity", "max_equity", "drawdown",
+    ]
+    assert top2["avg_real_label"].tolist() == pytest.approx([0.015, 0.01])
+    assert top2["turnover_rate"].tolist() == [0.5, 0.5]
+    assert top2["strategy_equity"].tolist() == pytest.approx([1.014, 1.014 * 1.009])
+
+    assert top3["top3"].isna().tolist() == [False, True]
+    assert top3["turnover_rate"].tolist() == pytest.approx([2 / 3, 1 / 3])
+    assert top3["csi300_equity"].tolist()[0] == pytest.approx(1.01)
+    assert np.isnan(top3["csi300_equity"].tolist()[1])
+    assert (top3["drawdown"] <= 0).all()
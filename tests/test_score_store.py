@@ -0,0 +1,79 @@
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from score_store import ScoreStore, partition_path, write_scores
+
+
+def _ret(date, scores, name=("平安银行", 600000)):
+    return pd.DataFrame({
+        "instrument": [f"SH60000{i}" for i in range(len(scores))],
+        "avg_score": scores,
+        "pos_ratio": [1.0] * len(scores),
+        "name": [name[i % len(name)] for i in range(len(scores))],  # 混合类型的 object 列
+        "datetime": pd.Timestamp(date),
+        "KMID": [0.1] * len(scores),
+    })
+
+
+def test_write_and_read_partitions(tmp_path):
+    old_run, new_run = tmp_path / "selection_20240102_10_00_00", tmp_path / "selection_20240103_10_00_00"
+    write_scores(old_run, "ret", "2024-01-02", _ret("2024-01-02", [0.1, 0.2]))
+    write_scores(old_run, "ret", "2024-01-03", _ret("2024-01-03", [0.3]))
+    write_scores(new_run, "ret", "2024-01-03", _ret("2024-01-03", [0.5, 0.6, 0.7]))
+
+    path = partition_path(old_run, "ret", "2024-01-02")
+    schema = pq.read_schema(path)
+    assert str(schema.field("instrument").type).startswith("dictionary")
+    assert str(schema.field("name").type).startswith("dictionary")
+
+    store = ScoreStore(tmp_path)
+    assert store.runs() == [old_run, new_run]
+    assert store.dates() == [pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-03")]
+
+    # 同一日期取最新一次结果
+    df = store.read("ret", start="2024-01-03", columns=["instrument", "avg_score", "missing"])
+    assert list(df.columns) == ["instrument", "avg_score"]
+    assert df["avg_score"].tolist() == [0.5, 0.6, 0.7]
+    assert len(store.read("ret", latest=False)) == 6
+    assert store.read("filter_ret").empty
+
+    # 单次结果目录也可以直接作为 root
+    assert ScoreStore(old_run).read("ret", end="2024-01-02")["name"].tolist() == ["平安银行", "600000"]
+
+
+def test_review_reads_store_with_csv_fallback(tmp_path):
+    from unittest.mock import MagicMock, patch
+    from model_review import ModelReviewHelper
+
+    cli = MagicMock(kwargs={"provider_uri": "~/fake_data"})
+    with patch("model_review.TradeDate"):
+        helper = ModelReviewHelper(cli)
+
+    run = tmp_path / "selection_20240102_10_00_00"
+    df = _ret("2024-01-02", [0.1, 0.2])
+    write_scores(run, "ret", "2024-01-02", df)
+    ret = helper._read_scores(run, "2024-01-02", "ret", stop_column="KMID")
+    assert list(ret.columns) == ["instrument", "avg_score", "pos_ratio", "name", "datetime"]
+
+    df.to_csv(run / "2024-01-02_filter_ret.csv", index=True)
+    filter_ret = helper._read_scores(run, "2024-01-02", "filter_ret", stop_column="KMID", parse_dates=True)
+    assert list(filter_ret.columns) == ["Unnamed: 0", "instrument", "avg_score", "pos_ratio", "name", "datetime"]
+    assert filter_ret["datetime"].dtype.kind == "M"
+
+
+def test_read_decodes_dictionary_columns(tmp_path):
+    write_scores(tmp_path, "ret", "2024-01-02", _ret("2024-01-02", [0.1, 0.2]))
+    df = ScoreStore(tmp_path).read("ret")
+    assert not isinstance(df["instrument"].dtype, pd.CategoricalDtype)
+    # 与读 CSV 一样，map 得到普通数值列
+    assert df["instrument"].map({"SH600000": 1.0, "SH600001": 2.0}).sum() == 3.0
@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+
+# 1. 路径修复
+root_dir = Path(__file__).resolve().parent.parent
+roll_dir = os.path.join(root_dir, "roll")
+if roll_dir not in sys.path:
+    sys.path.insert(0, roll_dir)
+
+from model_infer import aggregate_scores
+from model_serve import ScoreService, _make_handler
+
+
+def _pred(dates, instruments, values):
+    index = pd.MultiIndex.from_product([pd.to_datetime(dates), instruments], names=["datetime", "instrument"])
+    return pd.Series(values, index=index)
+
+
+def test_aggregate_scores_weighted_and_zero_weight():
+    df = pd.DataFrame({
+        "datetime": pd.to_datetime(["2024-01-02"] * 4),
+        "instrument": ["A", "A", "B", "B"],
+        "score": [0.2, -0.1, 0.3, 0.1],
+        "weight": [0.75, 0.25, 0.0, 0.0],
+    })
+    ret = aggregate_scores(df).set_index("instrument")
+    assert np.isclose(ret.loc["A", "avg_score"], 0.2 * 0.75 - 0.1 * 0.25)
+    assert np.isclose(ret.loc["B", "avg_score"], 0.2)  # 权重和为 0 时取简单平均
+    assert ret.loc["A", "pos_ratio"] == 0.5 and ret.loc["B", "pos_ratio"] == 1.0
+
+
+def _service():
+    cli = MagicMock()
+    cli.kwargs = {"predict_dates": [{"start": "2024-01-02", "end": "2024-01-03"}]}
+    cli.rid_weight = {"r1": 0.5, "r2": 0.5}
+    cli._inference_jobs.return_value = ["job1", "job2"]
+    results = [
+        ["exp", "r1", _pred(["2024-01-02", "2024-01-03"], ["A", "B", "C"], [0.1, 0.2, 0.3, 0.4, 0.5, 0.6])],
+        ["exp", "r2", _pred(["2024-01-02", "2024-01-03"], ["A", "B", "C"], [0.5, 0.2, 0.1, 0.2, -0.3, -0.3])],
+    ]
+    service = ScoreService(cli)
+    with patch("model_serve.run_grouped_inference", return_value=results):
+        info = service.load()
+    assert info["models"] == 2 and info["dates"] == ["2024-01-02", "2024-01-03"]
+    return service
+
+
+def test_score_service_query():
+    service = _service()
+    latest = service.query()
+    assert latest["date"] == "2024-01-03"
+    assert [s["instrument"] for s in latest["scores"]] == ["A", "C", "B"]
+    assert np.isclose(latest["scores"][0]["avg_score"], 0.3)
+
+    day = service.query("2024-01-02", instruments=["A", "B"], top=1)
+    assert day["count"] == 1 and day["scores"][0]["instrument"] == "A"
+    assert np.isclose(day["scores"][0]["avg_score"], 0.3)
+
+
+def test_score_http_endpoint():
+    from http.server import ThreadingHTTPServer
+
+    service = _service()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urlopen(f"{base}/score?top=2&instruments=A,C") as resp:
+            ret = json.loads(resp.read())
+        assert [s["instrument"] for s in ret["scores"]] == ["A", "C"]
+        with urlopen(f"{base}/health") as resp:
+            assert json.loads(resp.read())["models"] == 2
+        # 日期格式错误返回 400 而不是 500
+        try:
+            urlopen(f"{base}/score?date=not-a-date")
+            assert False, "malformed date should be rejected"
+        except HTTPError as e:
+            assert e.code == 400
+            assert "not-a-date" in json.loads(e.read())["error"]
+        # 重载只接受 POST
+        with patch.object(service, "load", return_value={"models": 2}) as mock_load:
+            try:
+                urlopen(f"{base}/reload")
+                assert False, "GET /reload should be rejected"
+            except HTTPError as e:
+                assert e.code == 405
+            mock_load.assert_not_called()
+            with urlopen(Request(f"{base}/reload", method="POST")) as resp:
+                assert json.loads(resp.read())["models"] == 2
+            mock_load.assert_called_once()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_reload_picks_up_grown_calendar():
+    from qlib.data.cache import H
+
+    calendars = [pd.to_datetime(["2024-01-02", "2024-01-03"]), pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"])]
+    cli = MagicMock()
+    cli.rid_weight = {"r1": 1.0}
+    cli._inference_jobs.return_value = ["job1"]
+
+    def _run(jobs):
+        start, end = cli._inference_jobs.call_args.args
+        dates = [d for d in pd.date_range(start, end) if d in list(current[0])]
+        return [["exp", "r1", _pred(dates, ["A"], [0.1] * len(dates))]]
+
+    service = ScoreService(cli, days=1)
+    current = [calendars[0]]
+    # 模拟 qlib 进程内缓存：不清空时一直返回第一次读到的日历
+    H["c"]["day"] = calendars[0]
+    with patch("model_serve.D") as mock_d, patch("model_serve.run_grouped_inference", side_effect=_run):
+        mock_d.calendar.side_effect = lambda freq: H["c"]["day"] if "day" in H["c"] else current[0]
+        assert service.load()["end"] == "2024-01-03"
+        current[0] = calendars[1]
+        info = service.load()
+    assert info["end"] == "2024-01-04" and info["dates"] == ["2024-01-04"]
+    assert service.query()["date"] == "2024-01-04"
+    assert cli.reset_model_state.call_count == 2
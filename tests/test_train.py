@@ -30,7 +30,7 @@ def global_qlib_init():
     )
 
 # 延迟导入，确保初始化完成
-from traincli import TrainCLI, run_train_blocking, my_enhanced_handler_mod
+from traincli import TrainCLI, run_train_blocking, run_train_parallel, my_enhanced_handler_mod
 
 # === 3. 测试用例 ===
 
@@ -137,3 +137,247 @@ def test_train_cli_gen_output(mock_qlib_init, mock_get_config, mock_rolling_gen,
     assert len(tasks) == 2
     assert tasks[0]["dataset"]["kwargs"]["segments"]["train"][0] == "2020-01-01"
     assert tasks == expected_tasks
+
+
+@patch('traincli.mp_wait')
+@patch('traincli.multiprocessing.get_context')
+def test_run_train_parallel_bounded(mock_get_context, mock_wait):
+    """验证并行调度不超过 max_workers，并按任务顺序返回退出代码"""
+    procs = []
+    running_peak = []
+
+    def make_process(target, args, kwargs):
+        p = MagicMock()
+        p.sentinel = len(procs)
+        p.pid = 1000 + len(procs)
+        p.exitcode = 1 if args[1] == "exp_bad" else 0
+        procs.append(p)
+        return p
+
+    mock_get_context.return_value.Process.side_effect = make_process
+
+    def fake_wait(sentinels):
+        running_peak.append(len(sentinels))
+        return [sentinels[0]]
+
+    mock_wait.side_effect = fake_wait
+
+    jobs = [({"t": 1}, "exp"), ({"t": 2}, "exp_bad"), ({"t": 3}, "exp")]
+    results = run_train_parallel(jobs, "cn", max_workers=2, uri_folder="./mlruns")
+
+    assert [r.exitcode for r in results] == [0, 1, 0]
+    assert [r.ok for r in results] == [True, False, True]
+    assert len(procs) == 3
+    assert max(running_peak) == 2
+
+
+@patch('traincli.get_my_config')
+@patch('traincli.RollingGen')
+@patch('traincli.qlib.init')
+def test_train_cli_batch_dispatches_all_combinations(mock_qlib_init, mock_rolling_gen, mock_get_config, capsys):
+    """batch 将所有组合的待训练任务一次性交给 _dispatch，并打印每个组合的耗时表"""
+    from traincli import TrainResult
+
+    mock_get_config.side_effect = lambda m, d, p: {"model": m, "pool": p}
+    cli = TrainCLI(
+        uri_folder="./mlruns",
+        provider_uri="./data",
+        model_name="LightGBM",
+        dataset_name="Alpha158",
+        stock_pool="csi300",
+        rolling_type="custom",
+    )
+
+    with patch.object(cli, '_gen_tasks', side_effect=lambda cfg, r: [dict(cfg, i=0), dict(cfg, i=1)]), \
+         patch.object(cli, '_get_exp_name', side_effect=lambda task, r: f"exp_{task['model']}"), \
+         patch.object(cli, '_pending_tasks', side_effect=lambda tasks, exp: tasks[1:]), \
+         patch.object(cli, '_log_task_status'), \
+         patch.object(cli, '_dispatch', side_effect=lambda jobs, panels: [TrainResult(0, 1.0) for _ in jobs]) as mock_dispatch:
+        cli.batch(model_names="XGBoost,Linear", stock_pools=["csi300", "csi100"])
+
+    jobs = mock_dispatch.call_args[0][0]
+    assert len(jobs) == 4
+    assert {exp for _, exp in jobs} == {"exp_XGBoost", "exp_Linear"}
+    out = capsys.readouterr().out
+    assert "XGBoost/Alpha158/csi100/custom" in out
+
+
+@patch('traincli.get_my_config')
+@patch('traincli.RollingGen')
+@patch('traincli.qlib.init')
+def test_train_cli_batch_keeps_going_when_a_combination_fails(mock_qlib_init, mock_rolling_gen, mock_get_config, capsys):
+    """某个组合规划失败时记录到汇总表，其余组合照常训练"""
+    from traincli import TrainResult
+
+    def get_config(model_name, dataset_name, stock_pool):
+        if model_name == "Bad":
+            raise ValueError("unknown model Bad")
+        return {"model": model_name}
+
+    mock_get_config.side_effect = get_config
+    cli = TrainCLI(
+        uri_folder="./mlruns",
+        provider_uri="./data",
+        model_name="LightGBM",
+        dataset_name="Alpha158",
+        stock_pool="csi300",
+        rolling_type="custom",
+    )
+
+    with patch.object(cli, '_gen_tasks', side_effect=lambda cfg, r: [dict(cfg, i=0)]), \
+         patch.object(cli, '_get_exp_name', side_effect=lambda task, r: f"exp_{task['model']}"), \
+         patch.object(cli, '_pending_tasks', side_effect=lambda tasks, exp: tasks), \
+         patch.object(cli, '_log_task_status'), \
+         patch.object(cli, '_dispatch', side_effect=lambda jobs, panels: [TrainResult(0, 1.0) for _ in jobs]) as mock_dispatch:
+        cli.batch(model_names="Bad,Linear", stock_pools="csi300")
+
+    jobs = mock_dispatch.call_args[0][0]
+    assert [exp for _, exp in jobs] == ["exp_Linear"]
+    out = capsys.readouterr().out
+    assert "Bad/Alpha158/csi300/custom" in out
+    assert "unknown model Bad" in out
+
+
+@patch('traincli.get_my_config')
+@patch('traincli.RollingGen')
+@patch('traincli.qlib.init')
+def test_train_cli_batch_dedups_identical_tasks(mock_qlib_init, mock_rolling_gen, mock_get_config, capsys):
+    """开启 dedup_tasks 时，不同组合生成的内容相同的任务在一次 batch 中只训练一次"""
+    from traincli import TrainResult
+
+    mock_get_config.side_effect = lambda m, d, p: {"pool": p}
+    cli = TrainCLI(
+        uri_folder="./mlruns",
+        provider_uri="./data",
+        model_name="LightGBM",
+        dataset_name="Alpha158",
+        stock_pool="csi300",
+        rolling_type="custom",
+        dedup_tasks=True,
+    )
+
+    def gen_tasks(cfg, rolling_type):
+        return [dict(cfg, dataset={"kwargs": {"segments": {"train": (f"201{i}-01-01", "2020-12-31")}}}) for i in range(2)]
+
+    with patch.object(cli, '_gen_tasks', side_effect=gen_tasks), \
+         patch.object(cli, '_get_exp_name', side_effect=lambda task, r: "exp"), \
+         patch.object(cli, '_pending_tasks', side_effect=lambda tasks, exp: tasks), \
+         patch.object(cli, '_log_task_status'), \
+         patch.object(cli, '_dispatch', side_effect=lambda jobs, panels: [TrainResult(0, 1.0) for _ in jobs]) as mock_dispatch:
+        # 配置与 model_name 无关，两个模型名生成的任务完全相同
+        cli.batch(model_names="XGBoost,Linear", stock_pools="csi300")
+
+    jobs = mock_dispatch.call_args[0][0]
+    assert len(jobs) == 2
+
+
+@patch('train_manifest.build_manifest')
+@patch('traincli.R.list_experiments')
+@patch('traincli.RollingGen')
+@patch('traincli.qlib.init')
+def test_backfill_manifests_once_for_all_experiments(mock_qlib_init, mock_rolling_gen, mock_list_exps, mock_build, tmp_path):
+    """跨实验查重前只为缺少训练清单的实验补建，且每个实例只扫描一次"""
+    from train_manifest import MANIFEST_VERSION, manifest_path
+
+    exps = {name: MagicMock(id=str(i)) for i, name in enumerate(["old", "new"])}
+    mock_list_exps.return_value = exps
+    path = manifest_path(tmp_path, "1")
+    path.parent.mkdir(parents=True)
+    path.write_text(f'{{"version": {MANIFEST_VERSION}, "recorders": {{}}}}', encoding="utf-8")
+
+    cli = TrainCLI(
+        uri_folder=str(tmp_path),
+        provider_uri="./data",
+        model_name="LightGBM",
+        dataset_name="Alpha158",
+        stock_pool="csi300",
+        rolling_type="custom",
+    )
+    cli._backfill_manifests()
+    cli._backfill_manifests()
+
+    assert mock_list_exps.call_count == 1
+    assert mock_build.call_count == 1
+    assert mock_build.call_args[0][0] is exps["old"]
+
+
+@patch('traincli.generate_qlib_segments', side_effect=lambda months_total: {
+    "train": (f"{2024 - months_total // 12}-01-01", "2024-06-30"),
+    "valid": ("2024-07-01", "2024-09-30"),
+    "test": ("2024-10-01", "2024-12-31"),
+})
+@patch('traincli.RollingGen')
+@patch('traincli.qlib.init')
+def test_custom_tasks_shared_panel_requires_feature_cache(mock_qlib_init, mock_rolling_gen, mock_segments):
+    """shared_panel 不会偷偷打开 feature_cache；未开启时给出明确错误"""
+    from myconfig import get_my_config
+
+    params = dict(uri_folder="./mlruns", provider_uri="./data", model_name="LightGBM",
+                  dataset_name="Alpha158", stock_pool="csi300", rolling_type="custom")
+    task_config = get_my_config("LightGBM", "Alpha158", "csi300")
+
+    cli = TrainCLI(**params, feature_cache=False)
+    tasks = cli._custom_tasks(task_config)
+    assert len(tasks) == 5
+    with pytest.raises(ValueError, match="feature_cache"):
+        cli._shared_panel(tasks, shared_panel=True)
+    assert cli._shared_panel(tasks, shared_panel=False) is None
+    assert cli.kwargs["feature_cache"] is False
+
+    cli = TrainCLI(**params, feature_cache=True)
+    assert cli._shared_panel(tasks, shared_panel=True) == ("2019-01-01", "2024-12-31")
+    assert cli.kwargs["feature_cache"] is True
+    # 共享面板不写入任务：recorder 保存的 task 与其哈希和不共享时相同
+    assert tasks == cli._custom_tasks(task_config)
+
+
+@patch('traincli.RollingGen')
+@patch('traincli.qlib.init')
+def test_dispatch_splits_cores_by_running_jobs(mock_qlib_init, mock_rolling_gen, tmp_path):
+    """任务数少于 train_workers 时按实际同时运行的任务数切分核数预算"""
+    from myconfig import get_model_config
+
+    cli = TrainCLI(uri_folder="./mlruns", provider_uri="./data", model_name="XGBoost", dataset_name="Alpha158",
+                   stock_pool="csi300", rolling_type="custom", train_workers=8, core_budget=40,
+                   profile_dir=str(tmp_path))
+    jobs = [({"model": get_model_config("XGBoost")}, "exp")] * 5
+
+    with patch('traincli.run_train_parallel', return_value=[]) as mock_parallel:
+        cli._dispatch(jobs)
+    dispatched = mock_parallel.call_args[0][0]
+    assert [task["model"]["kwargs"]["nthread"] for task, _ in dispatched] == [8] * 5
+
+    with patch('traincli.run_train_parallel', return_value=[]) as mock_parallel:
+        cli._dispatch(jobs * 4)
+    assert mock_parallel.call_args[0][0][0][0]["model"]["kwargs"]["nthread"] == 5
+
+
+def test_resolve_start_method():
+    """forkserver 可用时返回 forkserver 并设置预加载，非法取值退回 spawn"""
+    from traincli import resolve_start_method, FORKSERVER_PRELOAD
+
+    assert resolve_start_method(None) == "spawn"
+    assert resolve_start_method("fork") == "spawn"
+    with patch('traincli.multiprocessing.set_forkserver_preload') as mock_preload, \
+         patch('traincli.multiprocessing.get_all_start_methods', return_value=["spawn", "forkserver"]):
+        assert resolve_start_method("forkserver") == "forkserver"
+        mock_preload.assert_called_once_with(FORKSERVER_PRELOAD)
+
+
+def test_feature_cache_version_follows_bin_files(tmp_path):
+    """历史数据被原地修正 (最新交易日不变) 时特征缓存也要失效"""
+    from traincli import get_feature_cache
+
+    data_dir = tmp_path / "cn_data"
+    (data_dir / "calendars").mkdir(parents=True)
+    (data_dir / "calendars" / "day.txt").write_text("2024-01-02\n")
+    (data_dir / "features" / "sh600000").mkdir(parents=True)
+    close_bin = data_dir / "features" / "sh600000" / "close.day.bin"
+    close_bin.write_bytes(b"\x00" * 8)
+
+    kwargs = {"feature_cache": True, "feature_cache_dir": str(tmp_path / "cache"), "provider_uri": str(data_dir)}
+    assert get_feature_cache(**dict(kwargs, feature_cache=False)) is None
+    before = get_feature_cache(**kwargs).data_version
+    close_bin.write_bytes(b"\x01" * 8)
+    os.utime(close_bin, ns=(1, 1))
+    assert get_feature_cache(**kwargs).data_version != before
@@ -85,3 +85,84 @@ def test_filter_csv_exception():
     # 传入一个不存在的路径
     result = filter_csv("invalid_path.csv")
     assert result == ""
+
+
+def test_stock_list_snapshot_ttl_and_offline(tmp_path):
+    import utils
+
+    cache = tmp_path / "stock_list.csv"
+    fresh = pd.DataFrame({"code": ["SH600000", "SZ000001"], "name": ["浦发银行", "平安银行"], "extra": [1, 2]})
+
+    # 1. 没有快照：联网拉取并写入快照
+    with patch("utils._fetch_stock_list", return_value=fresh) as mock_fetch:
+        df = utils.get_normalized_stock_list(cache_path=str(cache))
+    mock_fetch.assert_called_once()
+    assert list(df.columns) == ["code", "name"] and cache.exists()
+    assert [p.name for p in tmp_path.iterdir()] == ["stock_list.csv"]
+
+    # 2. TTL 内：直接读快照，不联网
+    with patch("utils._fetch_stock_list") as mock_fetch:
+        df = utils.get_normalized_stock_list(cache_path=str(cache), ttl_hours=1)
+    mock_fetch.assert_not_called()
+    assert df["code"].tolist() == ["SH600000", "SZ000001"]
+
+    # 3. 过期且联网失败：退回旧快照
+    with patch("utils._fetch_stock_list", return_value=None) as mock_fetch:
+        df = utils.get_normalized_stock_list(cache_path=str(cache), ttl_hours=0)
+    mock_fetch.assert_called_once()
+    assert df["name"].tolist() == ["浦发银行", "平安银行"]
+
+    # 4. 离线模式：过期也只读快照；没有快照或快照损坏时返回 None，不联网
+    broken = tmp_path / "broken.csv"
+    broken.write_bytes(b"")
+    with patch("utils._fetch_stock_list") as mock_fetch:
+        assert len(utils.get_normalized_stock_list(cache_path=str(cache), ttl_hours=0, offline=True)) == 2
+        assert utils.get_normalized_stock_list(cache_path=str(tmp_path / "none.csv"), offline=True) is None
+        assert utils.get_normalized_stock_list(cache_path=str(broken), offline=True) is None
+    mock_fetch.assert_not_called()
+
+
+def test_stock_list_from_exchanges_concurrent_and_partial():
+    import utils
+
+    def _sh(symbol):
+        if symbol == "科创板":
+            raise ConnectionError("timeout")
+        return pd.DataFrame({"证券代码": ["600000"], "证券简称": ["浦发银行"]})
+
+    with patch("utils.ak") as mock_ak:
+        mock_ak.stock_info_sh_name_code.side_effect = _sh
+        mock_ak.stock_info_sz_name_code.return_value = pd.DataFrame({"A股代码": ["000001"], "A股简称": ["平安银行"]})
+        mock_ak.stock_info_bj_name_code.return_value = pd.DataFrame({"证券代码": ["830000"], "证券简称": ["北交样例"]})
+        df = utils._stock_list_from_exchanges()
+    # 单个板块失败不影响其他板块，顺序与数据源列表一致
+    assert df["code"].tolist() == ["SH600000", "SZ000001", "BJ830000"]
+
+
+def test_data_fingerprint_tracks_bin_files(tmp_path):
+    import utils
+
+    (tmp_path / "calendars").mkdir()
+    calendar = tmp_path / "calendars" / "day.txt"
+    calendar.write_text("2024-01-02\n2024-01-03\n")
+    inst_dir = tmp_path / "features" / "sh600000"
+    inst_dir.mkdir(parents=True)
+    close_bin = inst_dir / "close.day.bin"
+    close_bin.write_bytes(b"\x00" * 12)
+    os.utime(close_bin, ns=(1_000, 1_000))
+    first = utils.data_fingerprint(tmp_path)
+    assert first == utils.data_fingerprint(tmp_path)
+
+    # 原地改写历史数据：日历与 features 目录都不变，只有 .bin 的修改时间变化
+    features_mtime = (tmp_path / "features").stat().st_mtime_ns
+    close_bin.write_bytes(b"\x01" * 12)
+    os.utime(close_bin, ns=(2_000, 2_000))
+    assert (tmp_path / "features").stat().st_mtime_ns == features_mtime
+    second = utils.data_fingerprint(tmp_path)
+    assert second != first
+
+    # 交易日增加
+    calendar.write_text("2024-01-02\n2024-01-03\n2024-01-04\n")
+    assert utils.data_fingerprint(tmp_path) != second
+    # 数据目录不存在时也能给出指纹
+    assert utils.data_fingerprint(tmp_path / "missing")